@@ -28,8 +28,19 @@
 
 #include "graph.impl.hh"
 
+#include <atomic>
+#include <boost/archive/binary_iarchive.hpp>
+#include <boost/archive/binary_oarchive.hpp>
+#include <boost/archive/xml_iarchive.hpp>
+#include <boost/archive/xml_oarchive.hpp>
+#include <boost/serialization/shared_ptr.hpp>
+#include <boost/serialization/string.hpp>
+#include <boost/serialization/vector.hpp>
+#include <chrono>
+#include <cmath>
 #include <fstream>
 #include <hpp/constraints/differentiable-function.hh>
+#include <hpp/constraints/implicit.hh>
 #include <hpp/corbaserver/conversions.hh>
 #include <hpp/corbaserver/manipulation/server.hh>
 #include <hpp/manipulation/connected-component.hh>
@@ -44,11 +55,16 @@
 #include <hpp/manipulation/problem.hh>
 #include <hpp/manipulation/roadmap.hh>
 #include <hpp/manipulation/steering-method/graph.hh>
+#include <hpp/pinocchio/serialization.hh>
 #include <hpp/util/debug.hh>
 #include <hpp/util/exception-factory.hh>
 #include <hpp/util/pointer.hh>
+#include <hpp/util/serialization.hh>
+#include <limits>
+#include <mutex>
 #include <pinocchio/multibody/model.hpp>
 #include <sstream>
+#include <thread>
 
 #include "tools.hh"
 
@@ -127,6 +143,343 @@ void setRule(const hpp::corbaserver::manipulation::Rule& in,
   out.handles_ = toStringVector(in.handles);
   out.link_ = in.link;
 }
+
+/// Description of a state or an edge saved by Graph::saveGraph.
+/// Components are referred to by their ID in the saved graph.
+struct ComponentArchive {
+  enum Kind { kState, kEdge, kWaypointEdge, kLevelSetEdge };
+
+  int kind;
+  std::string name;
+  std::size_t id;
+  core::NumericalConstraints_t constraints;
+  // States
+  bool waypoint;
+  core::NumericalConstraints_t constraintsForPath;
+  // Edges
+  std::size_t from, to, containingState;
+  size_type weight;
+  bool isShort;
+  // Non zero security margins between pairs of joints
+  std::vector<size_type> marginJoints1, marginJoints2;
+  std::vector<value_type> margins;
+  // Waypoint edges
+  std::vector<std::size_t> waypointEdges, waypointStates;
+  // Level set edges
+  core::NumericalConstraints_t conditionConstraints, paramConstraints;
+
+  ComponentArchive()
+      : kind(kState),
+        id(0),
+        waypoint(false),
+        from(0),
+        to(0),
+        containingState(0),
+        weight(0),
+        isShort(false) {}
+
+  template <class Archive>
+  void serialize(Archive& ar, const unsigned int version) {
+    (void)version;
+    ar& BOOST_SERIALIZATION_NVP(kind);
+    ar& BOOST_SERIALIZATION_NVP(name);
+    ar& BOOST_SERIALIZATION_NVP(id);
+    ar& BOOST_SERIALIZATION_NVP(constraints);
+    if (kind == kState) {
+      ar& BOOST_SERIALIZATION_NVP(waypoint);
+      ar& BOOST_SERIALIZATION_NVP(constraintsForPath);
+      return;
+    }
+    ar& BOOST_SERIALIZATION_NVP(from);
+    ar& BOOST_SERIALIZATION_NVP(to);
+    ar& BOOST_SERIALIZATION_NVP(containingState);
+    ar& BOOST_SERIALIZATION_NVP(weight);
+    ar& BOOST_SERIALIZATION_NVP(isShort);
+    ar& BOOST_SERIALIZATION_NVP(marginJoints1);
+    ar& BOOST_SERIALIZATION_NVP(marginJoints2);
+    ar& BOOST_SERIALIZATION_NVP(margins);
+    if (kind == kWaypointEdge) {
+      ar& BOOST_SERIALIZATION_NVP(waypointEdges);
+      ar& BOOST_SERIALIZATION_NVP(waypointStates);
+    } else if (kind == kLevelSetEdge) {
+      ar& BOOST_SERIALIZATION_NVP(conditionConstraints);
+      ar& BOOST_SERIALIZATION_NVP(paramConstraints);
+    }
+  }
+};
+
+/// Description of a constraint graph saved by Graph::saveGraph.
+/// States are stored in the order of the state selector, followed by the
+/// edges in the order of their IDs.
+struct GraphArchive {
+  std::string name;
+  value_type errorThreshold;
+  size_type maxIterations;
+  core::NumericalConstraints_t constraints;
+  std::vector<ComponentArchive> components;
+
+  GraphArchive() : errorThreshold(0), maxIterations(0) {}
+
+  template <class Archive>
+  void serialize(Archive& ar, const unsigned int version) {
+    (void)version;
+    ar& BOOST_SERIALIZATION_NVP(name);
+    ar& BOOST_SERIALIZATION_NVP(errorThreshold);
+    ar& BOOST_SERIALIZATION_NVP(maxIterations);
+    ar& BOOST_SERIALIZATION_NVP(constraints);
+    ar& BOOST_SERIALIZATION_NVP(components);
+  }
+};
+
+void saveGraphArchive(const graph::GraphPtr_t& g, GraphArchive& data) {
+  data.name = g->name();
+  data.errorThreshold = g->errorThreshold();
+  data.maxIterations = g->maxIterations();
+  data.constraints = g->numericalConstraints();
+  const graph::States_t& states = g->stateSelector()->getStates();
+  for (graph::States_t::const_iterator it = states.begin(); it != states.end();
+       ++it) {
+    ComponentArchive c;
+    c.kind = ComponentArchive::kState;
+    c.name = (*it)->name();
+    c.id = (*it)->id();
+    c.constraints = (*it)->numericalConstraints();
+    c.waypoint = (*it)->isWaypoint();
+    c.constraintsForPath = (*it)->numericalConstraintsForPath();
+    data.components.push_back(c);
+  }
+  for (std::size_t i = 0; i < g->nbComponents(); ++i) {
+    EdgePtr_t e = HPP_DYNAMIC_PTR_CAST(Edge, g->get(i).lock());
+    if (!e) continue;
+    ComponentArchive c;
+    c.kind = ComponentArchive::kEdge;
+    c.name = e->name();
+    c.id = e->id();
+    c.constraints = e->numericalConstraints();
+    c.from = e->stateFrom()->id();
+    c.to = e->stateTo()->id();
+    c.containingState = e->state()->id();
+    c.weight = e->stateFrom()->getWeight(e);
+    c.isShort = e->isShort();
+    const matrix_t& m = e->securityMargins();
+    for (size_type i1 = 0; i1 < m.rows(); ++i1) {
+      for (size_type i2 = i1; i2 < m.cols(); ++i2) {
+        if (m(i1, i2) == 0) continue;
+        c.marginJoints1.push_back(i1);
+        c.marginJoints2.push_back(i2);
+        c.margins.push_back(m(i1, i2));
+      }
+    }
+    WaypointEdgePtr_t we = HPP_DYNAMIC_PTR_CAST(WaypointEdge, e);
+    LevelSetEdgePtr_t le = HPP_DYNAMIC_PTR_CAST(LevelSetEdge, e);
+    if (we) {
+      c.kind = ComponentArchive::kWaypointEdge;
+      for (std::size_t j = 0; j <= we->nbWaypoints(); ++j) {
+        c.waypointEdges.push_back(we->waypoint(j)->id());
+        c.waypointStates.push_back(we->waypoint(j)->stateTo()->id());
+      }
+    } else if (le) {
+      c.kind = ComponentArchive::kLevelSetEdge;
+      c.conditionConstraints = le->conditionConstraints();
+      c.paramConstraints = le->paramConstraints();
+    }
+    data.components.push_back(c);
+  }
+}
+
+/// Names of the functions of numerical constraints.
+void constraintNames(const core::NumericalConstraints_t& constraints,
+                     Names_t& names) {
+  names.length((ULong)constraints.size());
+  for (std::size_t i = 0; i < constraints.size(); ++i)
+    names[(ULong)i] = constraints[i]->function().name().c_str();
+}
+
+/// Add the constraints that are not in the problem solver under their name.
+void registerConstraints(const ProblemSolverPtr_t& ps,
+                         const core::NumericalConstraints_t& constraints) {
+  for (core::NumericalConstraints_t::const_iterator it = constraints.begin();
+       it != constraints.end(); ++it) {
+    const std::string& name((*it)->function().name());
+    if (!ps->numericalConstraints.has(name))
+      ps->numericalConstraints.add(name, *it);
+  }
+}
+
+graph::GraphPtr_t loadGraphArchive(const ProblemSolverPtr_t& ps,
+                                   const GraphArchive& data) {
+  typedef std::map<std::size_t, graph::StatePtr_t> States_t;
+  typedef std::map<std::size_t, EdgePtr_t> Edges_t;
+  States_t states;
+  Edges_t edges;
+  auto state = [&states](std::size_t id) -> graph::StatePtr_t {
+    States_t::const_iterator it = states.find(id);
+    if (it == states.end()) HPP_THROW(Error, "Unknown state " << id << ".");
+    return it->second;
+  };
+  auto edge = [&edges](std::size_t id) -> EdgePtr_t {
+    Edges_t::const_iterator it = edges.find(id);
+    if (it == edges.end()) HPP_THROW(Error, "Unknown edge " << id << ".");
+    return it->second;
+  };
+
+  graph::GraphPtr_t g =
+      graph::Graph::create(data.name, ps->robot(), ps->problem());
+  g->maxIterations(data.maxIterations);
+  g->errorThreshold(data.errorThreshold);
+  for (const constraints::ImplicitPtr_t& nc : data.constraints)
+    g->addNumericalConstraint(nc);
+  registerConstraints(ps, data.constraints);
+
+  // States are created with the same priority, in the order they were saved.
+  for (const ComponentArchive& c : data.components) {
+    if (c.kind != ComponentArchive::kState) continue;
+    graph::StatePtr_t s =
+        g->stateSelector()->createState(c.name, c.waypoint, 0);
+    for (const constraints::ImplicitPtr_t& nc : c.constraints)
+      s->addNumericalConstraint(nc);
+    for (const constraints::ImplicitPtr_t& nc : c.constraintsForPath)
+      s->addNumericalConstraintForPath(nc);
+    registerConstraints(ps, c.constraints);
+    registerConstraints(ps, c.constraintsForPath);
+    states[c.id] = s;
+  }
+  for (const ComponentArchive& c : data.components) {
+    graph::State::EdgeFactory factory;
+    switch (c.kind) {
+      case ComponentArchive::kEdge:
+        factory = (graph::State::EdgeFactory)Edge::create;
+        break;
+      case ComponentArchive::kWaypointEdge:
+        factory = (graph::State::EdgeFactory)WaypointEdge::create;
+        break;
+      case ComponentArchive::kLevelSetEdge:
+        factory = (graph::State::EdgeFactory)LevelSetEdge::create;
+        break;
+      default:
+        continue;
+    }
+    EdgePtr_t e = state(c.from)->linkTo(c.name, state(c.to), c.weight, factory);
+    e->state(state(c.containingState));
+    e->setShort(c.isShort);
+    for (const constraints::ImplicitPtr_t& nc : c.constraints)
+      e->addNumericalConstraint(nc);
+    registerConstraints(ps, c.constraints);
+    for (std::size_t i = 0; i < c.margins.size(); ++i)
+      e->securityMarginForPair(c.marginJoints1[i], c.marginJoints2[i],
+                               c.margins[i]);
+    if (c.kind == ComponentArchive::kWaypointEdge) {
+      HPP_STATIC_PTR_CAST(WaypointEdge, e)
+          ->nbWaypoints(c.waypointEdges.size() - 1);
+    } else if (c.kind == ComponentArchive::kLevelSetEdge) {
+      LevelSetEdgePtr_t le = HPP_STATIC_PTR_CAST(LevelSetEdge, e);
+      for (const constraints::ImplicitPtr_t& nc : c.conditionConstraints)
+        le->insertConditionConstraint(nc);
+      for (const constraints::ImplicitPtr_t& nc : c.paramConstraints)
+        le->insertParamConstraint(nc);
+      registerConstraints(ps, c.conditionConstraints);
+      registerConstraints(ps, c.paramConstraints);
+    }
+    edges[c.id] = e;
+  }
+  // Waypoints refer to edges that may be created after the waypoint edge.
+  for (const ComponentArchive& c : data.components) {
+    if (c.kind != ComponentArchive::kWaypointEdge) continue;
+    WaypointEdgePtr_t we = HPP_STATIC_PTR_CAST(WaypointEdge, edge(c.id));
+    for (std::size_t j = 0; j < c.waypointEdges.size(); ++j)
+      we->setWaypoint(j, edge(c.waypointEdges[j]), state(c.waypointStates[j]));
+  }
+  return g;
+}
+
+bool isXml(const std::string& filename) {
+  return filename.size() >= 4 &&
+         filename.compare(filename.size() - 4, 4, ".xml") == 0;
+}
+
+template <class BaseArchive, class Stream>
+void serializeGraphArchive(const std::string& filename,
+                           const DevicePtr_t& robot, GraphArchive& data) {
+  typedef hpp::serialization::archive_tpl<
+      BaseArchive, hpp::serialization::remove_duplicate::vector_archive>
+      archive_type;
+  Stream fs(filename.c_str(), std::ios::binary);
+  if (!fs.is_open()) HPP_THROW(Error, "Cannot open file " << filename);
+  archive_type ar(fs);
+  ar.initialize();
+  ar.insert(robot->name(), robot.get());
+  ar& boost::serialization::make_nvp("graph", data);
+}
+
+/// Project configurations in several threads
+/// \param constraint the constraints. Each thread works on a copy.
+/// \param qRhs if not null, the right hand side of the copies is set from
+///        this configuration.
+/// \param nThreads number of threads, capped at the maximal number of
+///        threads of the problem solver, 0 for this maximal number.
+void applyConstraints(const ProblemSolverPtr_t& ps,
+                      const ConstraintSetPtr_t& constraint,
+                      const Configuration_t* qRhs, Long nThreads,
+                      std::vector<Configuration_t>& configs,
+                      std::vector<value_type>& residualErrors,
+                      std::vector<bool>& success) {
+  const std::size_t n = configs.size();
+  const std::size_t nt = numberOfThreads(ps, nThreads, n);
+  std::vector<ConstraintSetPtr_t> copies(nt);
+  for (std::size_t t = 0; t < nt; ++t) {
+    copies[t] = HPP_DYNAMIC_PTR_CAST(ConstraintSet, constraint->copy());
+    if (qRhs && copies[t]->configProjector())
+      copies[t]->configProjector()->rightHandSideFromConfig(*qRhs);
+  }
+  residualErrors.assign(n, 0);
+  success.assign(n, false);
+  std::vector<char> done(n, false);
+  std::vector<std::string> errors(nt);
+  auto project = [&](std::size_t t) {
+    try {
+      const ConstraintSetPtr_t& cs = copies[t];
+      for (std::size_t i = t; i < n; i += nt) {
+        done[i] = cs->apply(configs[i]);
+        if (core::ConfigProjectorPtr_t cp = cs->configProjector())
+          residualErrors[i] = cp->residualError();
+      }
+    } catch (const std::exception& exc) {
+      errors[t] = exc.what();
+    }
+  };
+  if (nt == 1)
+    project(0);
+  else {
+    std::vector<std::thread> threads;
+    for (std::size_t t = 0; t < nt; ++t) threads.emplace_back(project, t);
+    for (std::thread& thread : threads) thread.join();
+  }
+  for (const std::string& error : errors)
+    if (!error.empty()) throw std::runtime_error(error);
+  for (std::size_t i = 0; i < n; ++i) success[i] = done[i];
+}
+
+void toCorba(const std::vector<Configuration_t>& configs,
+             const std::vector<value_type>& residualErrors,
+             const std::vector<bool>& success, hpp::floatSeqSeq_out outputs,
+             hpp::floatSeq_out residualErrorsOut, hpp::boolSeq_out successOut) {
+  const ULong n = (ULong)configs.size();
+  hpp::floatSeqSeq_var qs = new hpp::floatSeqSeq();
+  hpp::floatSeq_var errs = new hpp::floatSeq();
+  hpp::boolSeq_var oks = new hpp::boolSeq();
+  qs->length(n);
+  errs->length(n);
+  oks->length(n);
+  for (ULong i = 0; i < n; ++i) {
+    hpp::floatSeq_var q = vectorToFloatSeq(configs[i]);
+    qs[i] = q.in();
+    errs[i] = residualErrors[i];
+    oks[i] = success[i];
+  }
+  outputs = qs._retn();
+  residualErrorsOut = errs._retn();
+  successOut = oks._retn();
+}
 }  // namespace
 
 Graph::Graph() : server_(0x0) {}
@@ -288,57 +641,316 @@ void Graph::setWaypoint(const ID waypointEdgeId, const Long index,
   }
 }
 
-void Graph::getGraph(GraphComp_out graph_out, GraphElements_out elmts) {
-  GraphComps_t comp_n, comp_e;
-  GraphComp comp_g, current;
+hpp::IDseq* Graph::applyOperations(const GraphOperations& operations) {
+  using namespace hpp::corbaserver::manipulation;
+  enum Kind { kNone, kGraph, kState, kEdge, kWaypointEdge, kLevelSetEdge };
+  const ULong n = operations.length();
+  // Kind of the component created by each operation and number of waypoints
+  // of created waypoint edges.
+  std::vector<Kind> kinds(n, kNone);
+  std::vector<Long> nbWaypoints(n, 0);
 
-  graph::StatePtr_t n;
-  graph::EdgePtr_t e;
+  try {
+    graph::GraphPtr_t g = graph();
+    // Return the kind of the component referred to by id in operation i.
+    auto kindOf = [&](ULong i, ID id) -> Kind {
+      if (id < 0) {
+        ULong k = (ULong)(-1 - id);
+        if (k >= i || kinds[k] == kNone) {
+          HPP_THROW(Error, "Operation " << i << ": " << id
+                                        << " does not refer to a component "
+                                           "created by a previous operation.");
+        }
+        return kinds[k];
+      }
+      graph::GraphComponentPtr_t comp = g->get((std::size_t)id).lock();
+      if (HPP_DYNAMIC_PTR_CAST(graph::Graph, comp)) return kGraph;
+      if (HPP_DYNAMIC_PTR_CAST(graph::State, comp)) return kState;
+      if (HPP_DYNAMIC_PTR_CAST(WaypointEdge, comp)) return kWaypointEdge;
+      if (HPP_DYNAMIC_PTR_CAST(LevelSetEdge, comp)) return kLevelSetEdge;
+      if (HPP_DYNAMIC_PTR_CAST(Edge, comp)) return kEdge;
+      HPP_THROW(Error, "Operation " << i << ": ID " << id
+                                    << " is not a component of the graph.");
+    };
+    auto check = [&](ULong i, ID id, bool ok, const char* type) {
+      if (!ok) {
+        HPP_THROW(Error, "Operation " << i << ": ID " << id << " is not a "
+                                      << type << ".");
+      }
+    };
+    auto isEdge = [](Kind k) {
+      return k == kEdge || k == kWaypointEdge || k == kLevelSetEdge;
+    };
+    auto checkConstraints = [&](ULong i, const Names_t& names) {
+      for (ULong j = 0; j < names.length(); ++j) {
+        if (!problemSolver()->numericalConstraints.has(std::string(names[j]))) {
+          HPP_THROW(Error, "Operation " << i << ": numerical constraint \""
+                                        << names[j] << "\" does not exist.");
+        }
+      }
+    };
+
+    // Check all the operations before modifying the graph.
+    for (ULong i = 0; i < n; ++i) {
+      const GraphOperation& op = operations[i];
+      ULong nIds = 0, nValues = 0;
+      switch (op.type) {
+        case CREATE_NODE:
+          nIds = 1;
+          nValues = 2;
+          break;
+        case CREATE_EDGE:
+        case CREATE_LEVEL_SET_EDGE:
+          nIds = 3;
+          nValues = 1;
+          break;
+        case CREATE_WAYPOINT_EDGE:
+          nIds = 3;
+          nValues = 2;
+          break;
+        case SET_WAYPOINT:
+          nIds = 3;
+          nValues = 1;
+          break;
+        case SET_CONTAINING_NODE:
+          nIds = 2;
+          break;
+        case SET_SHORT:
+          nIds = 1;
+          nValues = 1;
+          break;
+        case ADD_NUMERICAL_CONSTRAINTS:
+        case ADD_NUMERICAL_CONSTRAINTS_FOR_PATH:
+        case ADD_LEVEL_SET_FOLIATION:
+          nIds = 1;
+          break;
+        default: {
+          HPP_THROW(Error, "Operation " << i << ": unknown type.");
+        }
+      }
+      if (op.ids.length() != nIds || op.values.length() < nValues) {
+        HPP_THROW(Error, "Operation " << i << ": expecting " << nIds
+                                      << " IDs and " << nValues << " values.");
+      }
+      std::vector<Kind> k(nIds);
+      for (ULong j = 0; j < nIds; ++j) k[j] = kindOf(i, op.ids[j]);
+      switch (op.type) {
+        case CREATE_NODE:
+          check(i, op.ids[0], k[0] == kGraph, "Graph");
+          if (!g->stateSelector()) throw Error("Graph has no state selector.");
+          kinds[i] = kState;
+          break;
+        case CREATE_EDGE:
+        case CREATE_LEVEL_SET_EDGE:
+        case CREATE_WAYPOINT_EDGE:
+          for (ULong j = 0; j < 3; ++j)
+            check(i, op.ids[j], k[j] == kState, "Node");
+          if (op.type == CREATE_EDGE) {
+            kinds[i] = kEdge;
+          } else if (op.type == CREATE_LEVEL_SET_EDGE) {
+            kinds[i] = kLevelSetEdge;
+          } else {
+            kinds[i] = kWaypointEdge;
+            nbWaypoints[i] = op.values[0];
+          }
+          break;
+        case SET_WAYPOINT: {
+          check(i, op.ids[0], k[0] == kWaypointEdge, "WaypointEdge");
+          check(i, op.ids[1], isEdge(k[1]), "Edge");
+          check(i, op.ids[2], k[2] == kState, "Node");
+          Long nb = op.ids[0] < 0
+                        ? nbWaypoints[(ULong)(-1 - op.ids[0])]
+                        : (Long)getComp<WaypointEdge>(op.ids[0])->nbWaypoints();
+          if (op.values[0] < 0 || op.values[0] > nb) {
+            HPP_THROW(Error, "Operation " << i << ": invalid index.");
+          }
+        } break;
+        case SET_CONTAINING_NODE:
+          check(i, op.ids[0], isEdge(k[0]), "Edge");
+          check(i, op.ids[1], k[1] == kState, "Node");
+          break;
+        case SET_SHORT:
+          check(i, op.ids[0], isEdge(k[0]), "Edge");
+          break;
+        case ADD_NUMERICAL_CONSTRAINTS:
+          check(i, op.ids[0], k[0] != kNone, "component");
+          checkConstraints(i, op.constraints);
+          break;
+        case ADD_NUMERICAL_CONSTRAINTS_FOR_PATH:
+          check(i, op.ids[0], k[0] == kState, "Node");
+          checkConstraints(i, op.constraints);
+          break;
+        case ADD_LEVEL_SET_FOLIATION:
+          check(i, op.ids[0], k[0] == kLevelSetEdge, "LevelSetEdge");
+          checkConstraints(i, op.constraints);
+          checkConstraints(i, op.paramConstraints);
+          break;
+        default:
+          break;
+      }
+    }
+  } catch (const std::exception& exc) {
+    throw Error(exc.what());
+  }
+
+  // Apply the operations.
+  hpp::IDseq_var res = new hpp::IDseq();
+  res->length(n);
+  auto id = [&](ID i) -> ID { return i < 0 ? res[(ULong)(-1 - i)] : i; };
+  for (ULong i = 0; i < n; ++i) {
+    const GraphOperation& op = operations[i];
+    res[i] = -1;
+    switch (op.type) {
+      case CREATE_NODE:
+        res[i] = createNode(id(op.ids[0]), op.name, (bool)op.values[0],
+                            op.values[1]);
+        break;
+      case CREATE_EDGE:
+        res[i] = createEdge(id(op.ids[0]), id(op.ids[1]), op.name, op.values[0],
+                            id(op.ids[2]));
+        break;
+      case CREATE_WAYPOINT_EDGE:
+        res[i] = createWaypointEdge(id(op.ids[0]), id(op.ids[1]), op.name,
+                                    op.values[0], op.values[1], id(op.ids[2]));
+        break;
+      case CREATE_LEVEL_SET_EDGE:
+        res[i] = createLevelSetEdge(id(op.ids[0]), id(op.ids[1]), op.name,
+                                    op.values[0], id(op.ids[2]));
+        break;
+      case SET_WAYPOINT:
+        setWaypoint(id(op.ids[0]), op.values[0], id(op.ids[1]), id(op.ids[2]));
+        break;
+      case SET_CONTAINING_NODE:
+        setContainingNode(id(op.ids[0]), id(op.ids[1]));
+        break;
+      case SET_SHORT:
+        setShort(id(op.ids[0]), (CORBA::Boolean)op.values[0]);
+        break;
+      case ADD_NUMERICAL_CONSTRAINTS:
+        addNumericalConstraints(id(op.ids[0]), op.constraints);
+        break;
+      case ADD_NUMERICAL_CONSTRAINTS_FOR_PATH:
+        addNumericalConstraintsForPath(id(op.ids[0]), op.constraints);
+        break;
+      case ADD_LEVEL_SET_FOLIATION:
+        addLevelSetFoliation(id(op.ids[0]), op.constraints,
+                             op.paramConstraints);
+        break;
+      default:
+        break;
+    }
+  }
+  return res._retn();
+}
 
-  ULong len_edges = 0;
-  ULong len_nodes = 0;
+void Graph::getGraph(GraphComp_out graph_out, GraphElements_out elmts) {
   try {
     graph::GraphPtr_t g = graph();
+    std::vector<graph::StatePtr_t> states;
+    std::vector<graph::EdgePtr_t> edges;
+    for (std::size_t i = 0; i < g->nbComponents(); ++i) {
+      if (i == g->id()) continue;
+      graph::GraphComponentPtr_t gcomponent = g->get(i).lock();
+      graph::StatePtr_t n = HPP_DYNAMIC_PTR_CAST(graph::State, gcomponent);
+      graph::EdgePtr_t e = HPP_DYNAMIC_PTR_CAST(graph::Edge, gcomponent);
+      if (n)
+        states.push_back(n);
+      else if (e)
+        edges.push_back(e);
+    }
 
     // Set the graph values
     graph_out = new GraphComp();
     graph_out->name = g->name().c_str();
     graph_out->id = (Long)g->id();
 
+    elmts = new GraphElements;
+    elmts->nodes.length((ULong)states.size());
+    for (std::size_t i = 0; i < states.size(); ++i) {
+      GraphComp& current = elmts->nodes[(ULong)i];
+      current.name = states[i]->name().c_str();
+      current.id = (Long)states[i]->id();
+    }
+    elmts->edges.length((ULong)edges.size());
+    for (std::size_t i = 0; i < edges.size(); ++i) {
+      const graph::EdgePtr_t& e = edges[i];
+      GraphComp& current = elmts->edges[(ULong)i];
+      current.name = e->name().c_str();
+      current.id = (Long)e->id();
+      graph::WaypointEdgePtr_t we =
+          HPP_DYNAMIC_PTR_CAST(graph::WaypointEdge, e);
+      if (we) {
+        current.waypoints.length((ULong)we->nbWaypoints());
+        for (std::size_t j = 0; j < we->nbWaypoints(); ++j)
+          current.waypoints[(ULong)j] = (ID)we->waypoint(j)->stateTo()->id();
+      }
+      current.start = (Long)e->stateFrom()->id();
+      current.end = (Long)e->stateTo()->id();
+    }
+  } catch (std::out_of_range& e) {
+    throw Error(e.what());
+  }
+}
+
+GraphSnapshot* Graph::getGraphSnapshot() {
+  try {
+    graph::GraphPtr_t g = graph();
+    std::vector<graph::StatePtr_t> states;
+    std::vector<graph::EdgePtr_t> edges;
     for (std::size_t i = 0; i < g->nbComponents(); ++i) {
       if (i == g->id()) continue;
       graph::GraphComponentPtr_t gcomponent = g->get(i).lock();
-      if (!gcomponent) continue;
-      current.name = gcomponent->name().c_str();
-      current.id = (Long)gcomponent->id();
-      n = HPP_DYNAMIC_PTR_CAST(graph::State, gcomponent);
-      e = HPP_DYNAMIC_PTR_CAST(graph::Edge, gcomponent);
-      if (n) {
-        comp_n.length(len_nodes + 1);
-        comp_n[len_nodes] = current;
-        len_nodes++;
-      } else if (e) {
-        comp_e.length(len_edges + 1);
-        graph::WaypointEdgePtr_t we =
-            HPP_DYNAMIC_PTR_CAST(graph::WaypointEdge, e);
-        if (we) {
-          current.waypoints.length((ULong)we->nbWaypoints());
-          for (std::size_t i = 0; i < we->nbWaypoints(); ++i)
-            current.waypoints[(ULong)i] = (ID)we->waypoint(i)->stateTo()->id();
-        } else {
-          current.waypoints.length(0);
-        }
-        current.start = (Long)e->stateFrom()->id();
-        current.end = (Long)e->stateTo()->id();
-        comp_e[len_edges] = current;
-        len_edges++;
+      graph::StatePtr_t n = HPP_DYNAMIC_PTR_CAST(graph::State, gcomponent);
+      graph::EdgePtr_t e = HPP_DYNAMIC_PTR_CAST(graph::Edge, gcomponent);
+      if (n)
+        states.push_back(n);
+      else if (e)
+        edges.push_back(e);
+    }
+
+    GraphSnapshot_var res = new GraphSnapshot();
+    res->name = g->name().c_str();
+    res->id = (ID)g->id();
+    constraintNames(g->numericalConstraints(), res->constraints);
+    res->nodes.length((ULong)states.size());
+    for (std::size_t i = 0; i < states.size(); ++i) {
+      const graph::StatePtr_t& n = states[i];
+      NodeSnapshot& node = res->nodes[(ULong)i];
+      node.name = n->name().c_str();
+      node.id = (ID)n->id();
+      node.waypoint = n->isWaypoint();
+      constraintNames(n->numericalConstraints(), node.constraints);
+      constraintNames(n->numericalConstraintsForPath(),
+                      node.constraintsForPath);
+    }
+    res->edges.length((ULong)edges.size());
+    for (std::size_t i = 0; i < edges.size(); ++i) {
+      const graph::EdgePtr_t& e = edges[i];
+      EdgeSnapshot& edge = res->edges[(ULong)i];
+      edge.name = e->name().c_str();
+      edge.id = (ID)e->id();
+      edge.start = (ID)e->stateFrom()->id();
+      edge.end = (ID)e->stateTo()->id();
+      edge.containingNode = (ID)e->state()->id();
+      edge.weight = (Long)e->stateFrom()->getWeight(e);
+      edge.isShort = e->isShort();
+      constraintNames(e->numericalConstraints(), edge.constraints);
+      WaypointEdgePtr_t we = HPP_DYNAMIC_PTR_CAST(WaypointEdge, e);
+      LevelSetEdgePtr_t le = HPP_DYNAMIC_PTR_CAST(LevelSetEdge, e);
+      if (we) {
+        edge.type = toStr<WaypointEdge>().c_str();
+        edge.waypoints.length((ULong)we->nbWaypoints());
+        for (std::size_t j = 0; j < we->nbWaypoints(); ++j)
+          edge.waypoints[(ULong)j] = (ID)we->waypoint(j)->stateTo()->id();
+      } else if (le) {
+        edge.type = toStr<LevelSetEdge>().c_str();
+      } else {
+        edge.type = toStr<Edge>().c_str();
       }
     }
-    elmts = new GraphElements;
-    elmts->nodes = comp_n;
-    elmts->edges = comp_e;
-  } catch (std::out_of_range& e) {
-    throw Error(e.what());
+    return res._retn();
+  } catch (const std::exception& exc) {
+    throw Error(exc.what());
   }
 }
 
@@ -387,6 +999,28 @@ Long Graph::getFrequencyOfNodeInRoadmap(ID nodeId,
   }
 }
 
+intSeq* Graph::getFrequenciesOfNodesInRoadmap(const hpp::IDseq& nodeIds) {
+  try {
+    graph::States_t states;
+    for (CORBA::ULong i = 0; i < nodeIds.length(); ++i)
+      states.push_back(getComp<graph::State>(nodeIds[i], true));
+    std::vector<std::size_t> freqs(states.size(), 0);
+    const core::ConnectedComponents_t& ccs =
+        problemSolver()->roadmap()->connectedComponents();
+    core::ConnectedComponents_t::const_iterator _cc;
+    for (_cc = ccs.begin(); _cc != ccs.end(); ++_cc) {
+      manipulation::ConnectedComponentPtr_t cc =
+          HPP_DYNAMIC_PTR_CAST(manipulation::ConnectedComponent, *_cc);
+      if (!cc) throw Error("Connected component is not of the right type.");
+      for (std::size_t i = 0; i < states.size(); ++i)
+        freqs[i] += cc->getRoadmapNodes(states[i]).size();
+    }
+    return toIntSeq(freqs.begin(), freqs.end());
+  } catch (std::out_of_range& e) {
+    throw Error(e.what());
+  }
+}
+
 bool Graph::getConfigProjectorStats(ID elmt, ConfigProjStat_out config,
                                     ConfigProjStat_out path) {
   try {
@@ -593,6 +1227,70 @@ void Graph::getNode(const hpp::floatSeq& dofArray, ID_out output) {
   }
 }
 
+void Graph::getNodes(const hpp::floatSeqSeq& dofArrays, CORBA::Boolean parallel,
+                     hpp::IDseq_out output) {
+  DevicePtr_t robot = getRobotOrThrow(problemSolver());
+  try {
+    graph::GraphPtr_t g = graph();
+    const std::size_t n = dofArrays.length();
+    std::vector<Configuration_t> configs;
+    configs.reserve(n);
+    for (std::size_t i = 0; i < n; ++i)
+      configs.push_back(floatSeqToConfig(robot, dofArrays[(ULong)i], true));
+    // -1 for the configurations that are in no state
+    std::vector<ID> ids(n, -1);
+    // The states are checked in the order of the state selector, as by
+    // graph::Graph::getState.
+    const graph::States_t states = g->stateSelector()->getStates();
+
+    std::size_t nThreads =
+        parallel ? numberOfThreads(problemSolver(), 0, n / 2) : 1;
+    if (nThreads <= 1) {
+      for (std::size_t i = 0; i < n; ++i) {
+        std::size_t k = 0;
+        while (k < states.size() &&
+               !g->configConstraint(states[k])->isSatisfied(configs[i]))
+          ++k;
+        if (k < states.size()) ids[i] = (ID)states[k]->id();
+      }
+    } else {
+      // The constraints of the states are not thread safe: each thread
+      // works with its own copies of them.
+      std::vector<std::vector<core::ConstraintPtr_t> > constraints(nThreads);
+      for (std::size_t t = 0; t < nThreads; ++t)
+        for (const graph::StatePtr_t& state : states)
+          constraints[t].push_back(g->configConstraint(state)->copy());
+      std::vector<std::string> errors(nThreads);
+      std::vector<std::thread> threads;
+      for (std::size_t t = 0; t < nThreads; ++t) {
+        threads.emplace_back([&, t]() {
+          try {
+            for (std::size_t i = t; i < n && errors[t].empty(); i += nThreads) {
+              std::size_t k = 0;
+              while (k < states.size() &&
+                     !constraints[t][k]->isSatisfied(configs[i]))
+                ++k;
+              if (k < states.size()) ids[i] = (ID)states[k]->id();
+            }
+          } catch (const std::exception& exc) {
+            errors[t] = exc.what();
+          }
+        });
+      }
+      for (std::thread& thread : threads) thread.join();
+      for (const std::string& error : errors)
+        if (!error.empty()) throw std::runtime_error(error);
+    }
+
+    hpp::IDseq_var res = new hpp::IDseq();
+    res->length((ULong)n);
+    for (std::size_t i = 0; i < n; ++i) res[(ULong)i] = ids[i];
+    output = res._retn();
+  } catch (std::exception& e) {
+    throw Error(e.what());
+  }
+}
+
 bool Graph::applyNodeConstraints(hpp::ID id, const hpp::floatSeq& input,
                                  hpp::floatSeq_out output,
                                  double& residualError) {
@@ -631,6 +1329,40 @@ bool Graph::applyNodeConstraints(hpp::ID id, const hpp::floatSeq& input,
   }
 }
 
+void Graph::applyNodeConstraintsBatch(hpp::ID id,
+                                      const hpp::floatSeqSeq& inputs,
+                                      Long nThreads,
+                                      hpp::floatSeqSeq_out outputs,
+                                      hpp::floatSeq_out residualErrors,
+                                      hpp::boolSeq_out success) {
+  try {
+    graph::GraphComponentPtr_t comp = graph()->get((size_t)id).lock();
+    graph::EdgePtr_t edge = HPP_DYNAMIC_PTR_CAST(graph::Edge, comp);
+    graph::StatePtr_t state = HPP_DYNAMIC_PTR_CAST(graph::State, comp);
+    DevicePtr_t robot = getRobotOrThrow(problemSolver());
+    ConstraintSetPtr_t constraint;
+    Configuration_t qRhs;
+    if (edge) {
+      constraint = graph(false)->targetConstraint(edge);
+      qRhs = robot->currentConfiguration();
+    } else if (state)
+      constraint = graph(false)->configConstraint(state);
+    else
+      HPP_THROW(Error, "ID " << id << " is neither an edge nor a state");
+    std::vector<Configuration_t> configs;
+    configs.reserve(inputs.length());
+    for (ULong i = 0; i < inputs.length(); ++i)
+      configs.push_back(floatSeqToConfig(robot, inputs[i], true));
+    std::vector<value_type> errors;
+    std::vector<bool> oks;
+    applyConstraints(problemSolver(), constraint, edge ? &qRhs : NULL, nThreads,
+                     configs, errors, oks);
+    toCorba(configs, errors, oks, outputs, residualErrors, success);
+  } catch (const std::exception& exc) {
+    throw hpp::Error(exc.what());
+  }
+}
+
 bool Graph::applyEdgeLeafConstraints(hpp::ID IDedge, const hpp::floatSeq& qleaf,
                                      const hpp::floatSeq& input,
                                      hpp::floatSeq_out output,
@@ -668,6 +1400,32 @@ bool Graph::applyEdgeLeafConstraints(hpp::ID IDedge, const hpp::floatSeq& qleaf,
   }
 }
 
+void Graph::applyEdgeLeafConstraintsBatch(
+    hpp::ID IDedge, const hpp::floatSeq& qleaf, const hpp::floatSeqSeq& inputs,
+    Long nThreads, hpp::floatSeqSeq_out outputs,
+    hpp::floatSeq_out residualErrors, hpp::boolSeq_out success) {
+  try {
+    graph::EdgePtr_t edge = getComp<graph::Edge>(IDedge);
+    DevicePtr_t robot = getRobotOrThrow(problemSolver());
+    Configuration_t qRhs = floatSeqToConfig(robot, qleaf, true);
+    ConstraintSetPtr_t cs(edge->pathConstraint());
+    std::vector<Configuration_t> configs;
+    configs.reserve(inputs.length());
+    for (ULong i = 0; i < inputs.length(); ++i)
+      configs.push_back(floatSeqToConfig(robot, inputs[i], true));
+    std::vector<value_type> errors(configs.size(), 0);
+    std::vector<bool> oks(configs.size(), false);
+    // As applyEdgeLeafConstraints, configurations are left unchanged if the
+    // leaf has no numerical constraint.
+    if (cs->configProjector())
+      applyConstraints(problemSolver(), cs, &qRhs, nThreads, configs, errors,
+                       oks);
+    toCorba(configs, errors, oks, outputs, residualErrors, success);
+  } catch (const std::exception& exc) {
+    throw hpp::Error(exc.what());
+  }
+}
+
 bool Graph::generateTargetConfig(hpp::ID IDedge, const hpp::floatSeq& qleaf,
                                  const hpp::floatSeq& input,
                                  hpp::floatSeq_out output,
@@ -715,6 +1473,116 @@ bool Graph::generateTargetConfig(hpp::ID IDedge, const hpp::floatSeq& qleaf,
   }
 }
 
+bool Graph::generateTargetConfigFromSeeds(
+    hpp::ID IDedge, const hpp::floatSeq& qleaf, const hpp::floatSeqSeq& inputs,
+    Long nSeeds, double timeout, Long nThreads, hpp::floatSeq_out output,
+    double& residualError, Long& attempts) {
+  typedef std::chrono::steady_clock clock;
+  try {
+    graph::EdgePtr_t edge = getComp<graph::Edge>(IDedge);
+    DevicePtr_t robot = getRobotOrThrow(problemSolver());
+    Configuration_t qRhs = floatSeqToConfig(robot, qleaf, true);
+    std::vector<Configuration_t> seeds;
+    for (ULong i = 0; i < inputs.length(); ++i)
+      seeds.push_back(floatSeqToConfig(robot, inputs[i], true));
+    if (seeds.empty()) {
+      // The configuration shooter is not thread safe: seeds are shot first.
+      core::ConfigurationShooterPtr_t shooter =
+          problemSolver()->problem()->configurationShooter();
+      for (Long i = 0; i < nSeeds; ++i) {
+        Configuration_t q(robot->configSize());
+        shooter->shoot(q);
+        seeds.push_back(q);
+      }
+    }
+    if (seeds.empty()) throw Error("No input configuration and no seed.");
+    const std::size_t n = seeds.size();
+    const clock::time_point deadline =
+        clock::now() + std::chrono::duration_cast<clock::duration>(
+                           std::chrono::duration<double>(timeout));
+
+    // Waypoint and level set edges generate configurations with several
+    // projections or with the histogram of their leaves: they are called
+    // sequentially. For other edges, each thread projects with its own copy
+    // of the target constraints, as Edge::generateTargetConfig.
+    bool parallel = !HPP_DYNAMIC_PTR_CAST(graph::WaypointEdge, edge) &&
+                    !HPP_DYNAMIC_PTR_CAST(graph::LevelSetEdge, edge);
+    const std::size_t nt =
+        parallel ? numberOfThreads(problemSolver(), nThreads, n) : 1;
+    std::vector<ConstraintSetPtr_t> copies;
+    if (parallel) {
+      for (std::size_t t = 0; t < nt; ++t) {
+        copies.push_back(HPP_DYNAMIC_PTR_CAST(
+            ConstraintSet, edge->targetConstraint()->copy()));
+        if (copies.back()->configProjector())
+          copies.back()->configProjector()->rightHandSideFromConfig(qRhs);
+      }
+    }
+    core::NodePtr_t nNode;
+    if (!parallel) {
+      value_type dist = 0;
+      nNode = problemSolver()->roadmap()->nearestNode(qRhs, dist);
+      if (dist >= 1e-8) nNode.reset();
+    }
+
+    std::atomic<bool> found(false);
+    std::atomic<Long> count(0);
+    std::mutex mutex;
+    bool success = false;
+    Configuration_t result = seeds[0];
+    value_type error = std::numeric_limits<value_type>::infinity();
+    std::vector<std::string> errors(nt);
+    auto generate = [&](std::size_t t) {
+      try {
+        for (std::size_t i = t; i < n && !found; i += nt) {
+          if (timeout > 0 && clock::now() > deadline) break;
+          ++count;
+          Configuration_t q = seeds[i];
+          bool ok;
+          value_type err = 0;
+          core::ConfigProjectorPtr_t cp;
+          if (parallel) {
+            if (edge->isShort()) q = qRhs;
+            ok = copies[t]->apply(q);
+            cp = copies[t]->configProjector();
+          } else {
+            ok = nNode ? edge->generateTargetConfig(nNode, q)
+                       : edge->generateTargetConfig(qRhs, q);
+            cp = edge->targetConstraint()->configProjector();
+          }
+          if (cp) err = cp->residualError();
+          std::lock_guard<std::mutex> lock(mutex);
+          if (success) break;
+          if (ok || err < error) {
+            success = ok;
+            result = q;
+            error = err;
+          }
+          if (ok) found = true;
+        }
+      } catch (const std::exception& exc) {
+        errors[t] = exc.what();
+      }
+    };
+    if (nt == 1)
+      generate(0);
+    else {
+      std::vector<std::thread> threads;
+      for (std::size_t t = 0; t < nt; ++t) threads.emplace_back(generate, t);
+      for (std::thread& thread : threads) thread.join();
+    }
+    for (const std::string& e : errors)
+      if (!e.empty()) throw std::runtime_error(e);
+
+    attempts = count;
+    residualError = std::isinf(error) ? 0 : error;
+    output = vectorToFloatSeq(result);
+    return success;
+  } catch (const std::exception& exc) {
+    throw hpp::Error(exc.what());
+  }
+}
+
 CORBA::Boolean Graph::getConfigErrorForNode(ID nodeId,
                                             const hpp::floatSeq& dofArray,
                                             hpp::floatSeq_out error) {
@@ -731,6 +1599,71 @@ CORBA::Boolean Graph::getConfigErrorForNode(ID nodeId,
   }
 }
 
+void Graph::getConfigErrorsForAllNodes(const hpp::floatSeqSeq& configs,
+                                       Long nThreads, hpp::IDseq_out nodeIds,
+                                       hpp::floatSeq_out errors,
+                                       hpp::boolSeq_out membership) {
+  DevicePtr_t robot = getRobotOrThrow(problemSolver());
+  try {
+    graph::GraphPtr_t g = graph();
+    const graph::States_t states = g->stateSelector()->getStates();
+    const std::size_t n = configs.length(), m = states.size();
+    std::vector<Configuration_t> qs;
+    qs.reserve(n);
+    for (std::size_t i = 0; i < n; ++i)
+      qs.push_back(floatSeqToConfig(robot, configs[(ULong)i], true));
+
+    hpp::floatSeq_var err = new hpp::floatSeq();
+    hpp::boolSeq_var sat = new hpp::boolSeq();
+    err->length((ULong)(n * m));
+    sat->length((ULong)(n * m));
+    const std::size_t nt = numberOfThreads(problemSolver(), nThreads, m);
+    if (nt == 1) {
+      vector_t e;
+      for (std::size_t i = 0; i < n; ++i)
+        for (std::size_t k = 0; k < m; ++k) {
+          sat[(ULong)(i * m + k)] =
+              g->getConfigErrorForState(qs[i], states[k], e);
+          err[(ULong)(i * m + k)] = e.norm();
+        }
+    } else {
+      // Each thread checks the configurations against the nodes k such that
+      // k % nt == t, with its own copies of their constraints. The threads
+      // write in distinct elements of the output buffers.
+      std::vector<std::string> messages(nt);
+      std::vector<std::thread> threads;
+      for (std::size_t t = 0; t < nt; ++t) {
+        threads.emplace_back([&, t]() {
+          try {
+            vector_t e;
+            for (std::size_t k = t; k < m; k += nt) {
+              core::ConstraintPtr_t c = g->configConstraint(states[k])->copy();
+              for (std::size_t i = 0; i < n; ++i) {
+                sat[(ULong)(i * m + k)] = c->isSatisfied(qs[i], e);
+                err[(ULong)(i * m + k)] = e.norm();
+              }
+            }
+          } catch (const std::exception& exc) {
+            messages[t] = exc.what();
+          }
+        });
+      }
+      for (std::thread& thread : threads) thread.join();
+      for (const std::string& message : messages)
+        if (!message.empty()) throw std::runtime_error(message);
+    }
+
+    hpp::IDseq_var ids = new hpp::IDseq();
+    ids->length((ULong)m);
+    for (std::size_t k = 0; k < m; ++k) ids[(ULong)k] = (ID)states[k]->id();
+    nodeIds = ids._retn();
+    errors = err._retn();
+    membership = sat._retn();
+  } catch (const std::exception& exc) {
+    throw Error(exc.what());
+  }
+}
+
 CORBA::Boolean Graph::getConfigErrorForEdge(ID edgeId,
                                             const hpp::floatSeq& dofArray,
                                             hpp::floatSeq_out error) {
@@ -905,6 +1838,49 @@ void Graph::display(const char* filename) {
   }
 }
 
+void Graph::saveGraph(const char* filename) {
+  try {
+    DevicePtr_t robot = getRobotOrThrow(problemSolver());
+    GraphArchive data;
+    saveGraphArchive(graph(), data);
+
+    std::string fn(filename);
+    if (isXml(fn)) {
+      serializeGraphArchive<boost::archive::xml_oarchive, std::ofstream>(
+          fn, robot, data);
+    } else {
+      serializeGraphArchive<boost::archive::binary_oarchive, std::ofstream>(
+          fn, robot, data);
+    }
+  } catch (const std::exception& exc) {
+    throw Error(exc.what());
+  }
+}
+
+Long Graph::loadGraph(const char* filename) {
+  try {
+    ProblemSolverPtr_t ps(problemSolver());
+    DevicePtr_t robot = getRobotOrThrow(ps);
+    GraphArchive data;
+    std::string fn(filename);
+    if (isXml(fn)) {
+      serializeGraphArchive<boost::archive::xml_iarchive, std::ifstream>(
+          fn, robot, data);
+    } else {
+      serializeGraphArchive<boost::archive::binary_iarchive, std::ifstream>(
+          fn, robot, data);
+    }
+
+    graph::GraphPtr_t g = loadGraphArchive(ps, data);
+    if (ps->graphs.has(data.name)) ps->graphs.erase(data.name);
+    ps->graphs.add(data.name, g);
+    ps->constraintGraph(data.name);
+    return (Long)g->id();
+  } catch (const std::exception& exc) {
+    throw Error(exc.what());
+  }
+}
+
 void Graph::getHistogramValue(ID edgeId, hpp::floatSeq_out freq,
                               hpp::floatSeqSeq_out values) {
   graph::LevelSetEdgePtr_t edge = getComp<graph::LevelSetEdge>(edgeId);
@@ -39,6 +39,7 @@ namespace hpp {
 namespace manipulation {
 namespace impl {
 using CORBA::Long;
+using hpp::corbaserver::manipulation::GraphOperations;
 using hpp::corbaserver::manipulation::Namess_t;
 using hpp::corbaserver::manipulation::Rules;
 
@@ -71,13 +72,19 @@ class Graph : public virtual POA_hpp::corbaserver::manipulation::Graph {
   virtual void setWaypoint(const ID waypointEdgeId, const Long index,
                            const ID edgeId, const ID nodeId);
 
+  virtual hpp::IDseq* applyOperations(const GraphOperations& operations);
+
   virtual void getGraph(GraphComp_out graph, GraphElements_out elmts);
 
+  virtual GraphSnapshot* getGraphSnapshot();
+
   virtual void getEdgeStat(ID edgeId, Names_t_out reasons, intSeq_out freqs);
 
   virtual Long getFrequencyOfNodeInRoadmap(
       ID nodeId, intSeq_out freqPerConnectedComponent);
 
+  virtual intSeq* getFrequenciesOfNodesInRoadmap(const hpp::IDseq& nodeIds);
+
   virtual bool getConfigProjectorStats(ID elmt, ConfigProjStat_out config,
                                        ConfigProjStat_out path);
 
@@ -120,6 +127,9 @@ class Graph : public virtual POA_hpp::corbaserver::manipulation::Graph {
 
   virtual void getNode(const hpp::floatSeq& dofArray, ID_out output);
 
+  virtual void getNodes(const hpp::floatSeqSeq& dofArrays,
+                        CORBA::Boolean parallel, hpp::IDseq_out output);
+
   virtual bool applyNodeConstraints(hpp::ID id, const hpp::floatSeq& input,
                                     hpp::floatSeq_out output,
                                     double& residualError);
@@ -130,15 +140,41 @@ class Graph : public virtual POA_hpp::corbaserver::manipulation::Graph {
                                         hpp::floatSeq_out output,
                                         double& residualError);
 
+  virtual void applyNodeConstraintsBatch(hpp::ID id,
+                                         const hpp::floatSeqSeq& inputs,
+                                         Long nThreads,
+                                         hpp::floatSeqSeq_out outputs,
+                                         hpp::floatSeq_out residualErrors,
+                                         hpp::boolSeq_out success);
+
+  virtual void applyEdgeLeafConstraintsBatch(hpp::ID IDedge,
+                                             const hpp::floatSeq& qleaf,
+                                             const hpp::floatSeqSeq& inputs,
+                                             Long nThreads,
+                                             hpp::floatSeqSeq_out outputs,
+                                             hpp::floatSeq_out residualErrors,
+                                             hpp::boolSeq_out success);
+
   virtual bool generateTargetConfig(hpp::ID IDedge, const hpp::floatSeq& qleaf,
                                     const hpp::floatSeq& input,
                                     hpp::floatSeq_out output,
                                     double& residualError);
 
+  virtual bool generateTargetConfigFromSeeds(
+      hpp::ID IDedge, const hpp::floatSeq& qleaf,
+      const hpp::floatSeqSeq& inputs, Long nSeeds, double timeout,
+      Long nThreads, hpp::floatSeq_out output, double& residualError,
+      Long& attempts);
+
   virtual CORBA::Boolean getConfigErrorForNode(ID nodeId,
                                                const hpp::floatSeq& dofArray,
                                                hpp::floatSeq_out error);
 
+  virtual void getConfigErrorsForAllNodes(const hpp::floatSeqSeq& configs,
+                                          Long nThreads, hpp::IDseq_out nodeIds,
+                                          hpp::floatSeq_out errors,
+                                          hpp::boolSeq_out membership);
+
   virtual CORBA::Boolean getConfigErrorForEdge(ID edgeId,
                                                const hpp::floatSeq& dofArray,
                                                hpp::floatSeq_out error);
@@ -165,6 +201,10 @@ class Graph : public virtual POA_hpp::corbaserver::manipulation::Graph {
 
   virtual void display(const char* filename);
 
+  virtual void saveGraph(const char* filename);
+
+  virtual Long loadGraph(const char* filename);
+
   virtual void getHistogramValue(ID edgeId, hpp::floatSeq_out freq,
                                  hpp::floatSeqSeq_out values);
 
@@ -7,6 +7,10 @@ from .client import Client  # noqa: F401
 from .constraint_graph import ConstraintGraph  # noqa: F401
 from .constraint_graph_factory import ConstraintGraphFactory  # noqa: F401
 from .constraints import Constraints  # noqa: F401
+from .dry_run import DryRunGraph, dryRun  # noqa: F401
+from .graph_cache import GraphCache  # noqa: F401
+from .instrumentation import Instrumentation  # noqa: F401
+from .mock_server import MockServer  # noqa: F401
 from .problem_solver import ProblemSolver, newProblem  # noqa: F401
 from .robot import CorbaClient, Robot  # noqa: F401
 from .security_margins import SecurityMargins  # noqa: F401
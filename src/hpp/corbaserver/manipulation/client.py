@@ -31,6 +31,8 @@
 from hpp.corbaserver.client import Client as _Parent
 from hpp_idl.hpp.corbaserver.manipulation import Graph, Problem, Robot
 
+from .instrumentation import Instrumentation
+
 
 class Client(_Parent):
     """
@@ -43,12 +45,36 @@ class Client(_Parent):
         "robot": Robot,
     }
 
-    def __init__(self, url=None, context="corbaserver"):
+    def __init__(self, url=None, context="corbaserver", server=None, instrument=False):
         """
         Initialize CORBA and create default clients.
         :param url: URL in the IOR, corbaloc, corbalocs, and corbanames formats.
                     For a remote corba server, use
                     url = "corbaloc:iiop:<host>:<port>/NameService"
+        :param server: a MockServer instance. If provided, the clients are
+                       in-process stand-ins and CORBA is not initialized.
+        :param instrument: True or an Instrumentation instance recording the
+                           requests of the clients. It is stored in
+                           attribute instrumentation. The clients are not
+                           instrumented by default.
         """
+        if instrument is True:
+            instrument = Instrumentation()
+        self.instrumentation = instrument or None
+        if server is not None:
+            for name, servant in server.servants("manipulation").items():
+                setattr(self, name, servant)
+            self._instrumentClients()
+            return
         self._initOrb(url)
         self._makeClients("manipulation", self.defaultClients, context)
+
+    def _makeClients(self, serviceId, clients, context):
+        super()._makeClients(serviceId, clients, context)
+        self._instrumentClients()
+
+    def _instrumentClients(self):
+        if self.instrumentation is None:
+            return
+        for name in self.defaultClients:
+            setattr(self, name, self.instrumentation.wrap(getattr(self, name), name))
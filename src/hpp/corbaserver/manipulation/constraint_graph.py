@@ -29,10 +29,225 @@
 # DAMAGE.
 
 
+import logging
 from subprocess import Popen
 
+from hpp_idl.hpp.corbaserver import manipulation as _idl
+
 from .constraints import Constraints
 
+_logger = logging.getLogger(__name__)
+
+
+class _PendingId:
+    """
+    ID of a graph component created by an operation not sent to the server yet
+
+    Pending IDs compare greater than any actual ID and follow the order of
+    creation, as the IDs assigned by the server.
+    """
+
+    __slots__ = ("id", "index")
+
+    def __init__(self, index):
+        self.index = index
+        # ID assigned by the server once the operation has been applied
+        self.id = None
+
+    def _key(self):
+        return (1, self.index) if self.id is None else (0, self.id)
+
+    def __lt__(self, other):
+        return self._key() < (
+            other._key() if isinstance(other, _PendingId) else (0, other)
+        )
+
+    def __gt__(self, other):
+        return self._key() > (
+            other._key() if isinstance(other, _PendingId) else (0, other)
+        )
+
+
+class _Index(dict):
+    """
+    Dictionary mapping names to IDs that also maps IDs back to names
+
+    \\sa name
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._names = dict()
+
+    def name(self, id):
+        """
+        Get the name of an ID
+        \\throw KeyError if no name maps to the ID.
+        """
+        return self._names[id]
+
+    def _forget(self, name, id):
+        if self._names.get(id) == name:
+            del self._names[id]
+
+    def __setitem__(self, name, id):
+        if name in self:
+            self._forget(name, self[name])
+        super().__setitem__(name, id)
+        self._names[id] = name
+
+    def __delitem__(self, name):
+        self._forget(name, self[name])
+        super().__delitem__(name)
+
+    def pop(self, name, *default):
+        if name not in self:
+            return super().pop(name, *default)
+        id = super().pop(name)
+        self._forget(name, id)
+        return id
+
+    def clear(self):
+        super().clear()
+        self._names.clear()
+
+    def update(self, *args, **kwargs):
+        for name, id in dict(*args, **kwargs).items():
+            self[name] = id
+
+    def setdefault(self, name, id=None):
+        if name not in self:
+            self[name] = id
+        return self[name]
+
+    def popitem(self):
+        name, id = super().popitem()
+        self._forget(name, id)
+        return name, id
+
+
+class _GraphOperationRecorder:
+    """
+    Stand-in for the Graph CORBA client that records graph building operations
+
+    Operations are sent to the server in one request by \\ref flush using
+    method hpp::corbaserver::manipulation::Graph::applyOperations. Methods
+    that do not build the graph are forwarded to the actual client after
+    the recorded operations have been flushed.
+    """
+
+    def __init__(self, graph):
+        # the actual Graph CORBA client
+        self.graph = graph
+        self.operations = list()
+        self.pending = list()
+
+    def _ref(self, id):
+        if isinstance(id, _PendingId):
+            return -1 - id.index if id.id is None else id.id
+        return id
+
+    def _record(self, type, ids, name="", values=(), constraints=(), param=()):
+        self.operations.append(
+            _idl.GraphOperation(
+                type,
+                name,
+                [self._ref(i) for i in ids],
+                [int(v) for v in values],
+                list(constraints),
+                list(param),
+            )
+        )
+        return len(self.operations) - 1
+
+    def _create(self, *args, **kwargs):
+        res = _PendingId(self._record(*args, **kwargs))
+        self.pending.append(res)
+        return res
+
+    def createNode(self, graphId, nodeName, waypoint, priority):
+        return self._create(
+            _idl.CREATE_NODE, (graphId,), nodeName, (waypoint, priority)
+        )
+
+    def createEdge(self, nodeFromId, nodeToId, edgeName, weight, isInNodeId):
+        return self._create(
+            _idl.CREATE_EDGE, (nodeFromId, nodeToId, isInNodeId), edgeName, (weight,)
+        )
+
+    def createWaypointEdge(
+        self, nodeFromId, nodeToId, edgeName, number, weight, isInNodeId
+    ):
+        return self._create(
+            _idl.CREATE_WAYPOINT_EDGE,
+            (nodeFromId, nodeToId, isInNodeId),
+            edgeName,
+            (number, weight),
+        )
+
+    def createLevelSetEdge(self, nodeFromId, nodeToId, edgeName, weight, isInNodeId):
+        return self._create(
+            _idl.CREATE_LEVEL_SET_EDGE,
+            (nodeFromId, nodeToId, isInNodeId),
+            edgeName,
+            (weight,),
+        )
+
+    def setWaypoint(self, waypointEdgeId, index, edgeId, nodeId):
+        self._record(
+            _idl.SET_WAYPOINT, (waypointEdgeId, edgeId, nodeId), values=(index,)
+        )
+
+    def setContainingNode(self, edgeId, nodeId):
+        self._record(_idl.SET_CONTAINING_NODE, (edgeId, nodeId))
+
+    def setShort(self, edgeId, isShort):
+        self._record(_idl.SET_SHORT, (edgeId,), values=(isShort,))
+
+    def addNumericalConstraints(self, graphComponentId, constraintNames):
+        if len(constraintNames) > 0:
+            self._record(
+                _idl.ADD_NUMERICAL_CONSTRAINTS,
+                (graphComponentId,),
+                constraints=constraintNames,
+            )
+
+    def addNumericalConstraintsForPath(self, nodeId, constraintNames):
+        if len(constraintNames) > 0:
+            self._record(
+                _idl.ADD_NUMERICAL_CONSTRAINTS_FOR_PATH,
+                (nodeId,),
+                constraints=constraintNames,
+            )
+
+    def addLevelSetFoliation(self, edgeId, condNC, paramNC):
+        self._record(
+            _idl.ADD_LEVEL_SET_FOLIATION,
+            (edgeId,),
+            constraints=condNC,
+            param=paramNC,
+        )
+
+    def flush(self):
+        """
+        Send the recorded operations to the server and set the pending IDs
+        """
+        if len(self.operations) > 0:
+            ids = self.graph.applyOperations(self.operations)
+            for p in self.pending:
+                p.id = ids[p.index]
+        self.operations = list()
+        self.pending = list()
+
+    def __getattr__(self, name):
+        method = getattr(self.graph, name)
+
+        def forward(*args):
+            self.flush()
+            return method(*(self._ref(a) for a in args))
+
+        return forward
+
 
 class ConstraintGraph:
     """
@@ -60,33 +275,87 @@ class ConstraintGraph:
         self.name = graphName
         self.grasps = dict()
         self.pregrasps = dict()
-        # A dictionnary mapping the node names to their ID
-        self.nodes = dict()
-        # A dictionnary mapping the edge names to their ID
-        self.edges = dict()
+        # A dictionnary mapping the node names to their ID. Method
+        # nodes.name maps the IDs back to the names.
+        self.nodes = _Index()
+        # A dictionnary mapping the edge names to their ID. Method
+        # edges.name maps the IDs back to the names.
+        self.edges = _Index()
         if makeGraph:
             self.graphId = self.graph.createGraph(graphName)
         else:
             # fetch graph
             try:
-                g = self.graph.getGraph()
-                self.graphId = g[0].id
-                for n in g[1].nodes:
-                    if n.name in self.nodes:
-                        print("Erasing node", n.name, "id", self.nodes[n.name])
-                    self.nodes[n.name] = n.id
-                for e in g[1].edges:
-                    if e.name in self.edges:
-                        print("Erasing edge", e.name, "id", self.edges[e.name])
-                    self.edges[e.name] = e.id
+                self._fetchGraph()
             except Exception:
                 pass
 
         self.textToTex = dict()
 
+    def _fetchGraph(self):
+        """
+        Set the graph ID and the node and edge IDs from the current graph
+        of the server
+
+        The names and IDs are fetched in one request with
+        hpp::corbaserver::manipulation::Graph::getGraph. The getters of the
+        edge attributes query the server, so that they are up to date.
+        """
+        graph, elements = self.graph.getGraph()
+        self.graphId = graph.id
+        for n in elements.nodes:
+            if n.name in self.nodes:
+                _logger.warning("Erasing node %s id %s", n.name, self.nodes[n.name])
+            self.nodes[n.name] = n.id
+        for e in elements.edges:
+            if e.name in self.edges:
+                _logger.warning("Erasing edge %s id %s", e.name, self.edges[e.name])
+            self.edges[e.name] = e.id
+
     # \\name Building the constraint graph
     # \\{
 
+    def beginBatch(self):
+        """
+        Record the operations that build the graph instead of sending them
+
+        Until \\ref endBatch is called, the creation of nodes and edges,
+        waypoints, containing nodes, short flags, level set foliations and
+        numerical constraints are stored locally. The IDs stored in
+        \\c nodes and \\c edges are placeholders until then.
+        Other calls to the server send the operations recorded so far first.
+        """
+        if isinstance(self.graph, _GraphOperationRecorder):
+            raise RuntimeError("ConstraintGraph is already in batch mode")
+        self.graph = _GraphOperationRecorder(self.graph)
+
+    def endBatch(self, commit=True):
+        """
+        Send the operations recorded since \\ref beginBatch in one request
+
+        \\param commit if False, the recorded operations are discarded.
+
+        The server checks all the operations before applying them: if one of
+        them is not valid, none is applied and the nodes and edges created
+        in batch mode are removed from \\c nodes and \\c edges.
+        \\sa hpp::corbaserver::manipulation::Graph::applyOperations
+        """
+        recorder = self.graph
+        if not isinstance(recorder, _GraphOperationRecorder):
+            raise RuntimeError("ConstraintGraph is not in batch mode")
+        self.graph = recorder.graph
+        try:
+            if commit:
+                recorder.flush()
+        finally:
+            for d in (self.nodes, self.edges):
+                for k, v in list(d.items()):
+                    if isinstance(v, _PendingId):
+                        if v.id is None:
+                            del d[k]
+                        else:
+                            d[k] = v.id
+
     def createNode(self, node, waypoint=False, priority=None):
         """
         Create one or several node
@@ -174,10 +443,10 @@ class ConstraintGraph:
         configuration to extend itself is projected in the destination
         node. This makes the rate of success higher.
         """
-        return self.client.graph.setShort(self.edges[edge], isShort)
+        return self.graph.setShort(self.edges[edge], isShort)
 
     def isShort(self, edge):
-        return self.client.graph.isShort(self.edges[edge])
+        return self.graph.isShort(self.edges[edge])
 
     def createWaypointEdge(
         self,
@@ -312,6 +581,35 @@ class ConstraintGraph:
         self.client.problem.createPreGrasp(self._(name), gripper, handle)
         self.pregrasps[name] = (self._(name),)
 
+    def createGrasps(self, names, grippers, handles, preGraspNames=None):
+        """
+        Create grasp and pre-grasp constraints for several gripper-handle pairs
+
+        \\param names, grippers, handles lists of same length. See
+               \\ref createGrasp.
+        \\param preGraspNames list of names of the pre-grasp constraints, see
+               \\ref createPreGrasp. If None, no pre-grasp is created.
+        \\return the list of names and the list of dimensions of the
+                numerical constraints of the grasps and pre-grasps.
+
+        Constraints that already exist are not created again.
+
+        \\sa hpp::corbaserver::manipulation::Problem::createGrasps
+        """
+        if preGraspNames is None:
+            preGraspNames = [""] * len(names)
+        res = self.client.problem.createGrasps(
+            [self._(n) for n in names],
+            [self._(n) if n else "" for n in preGraspNames],
+            grippers,
+            handles,
+        )
+        for n, pn in zip(names, preGraspNames):
+            self.grasps[n] = (self._(n),)
+            if pn:
+                self.pregrasps[pn] = (self._(pn),)
+        return res
+
     def setProblemConstraints(self, name, target):
         """
         Set the problem constraints to the specified constraint.
@@ -382,7 +680,7 @@ class ConstraintGraph:
                 + "graph argument should be a boolean, got "
                 + repr(graph)
             )
-        nc = numConstraints[:]
+        nc = list(numConstraints)
         if grasps is not None:
             for g in grasps:
                 for pair in self.grasps[g]:
@@ -449,7 +747,7 @@ class ConstraintGraph:
                 " constraints. Please merge elements in list"
                 " paramLJ with paramNC"
             )
-        cond_nc = condNC[:]
+        cond_nc = list(condNC)
         if condGrasps is not None:
             for g in condGrasps:
                 for pair in self.grasps[g]:
@@ -459,7 +757,7 @@ class ConstraintGraph:
                 for pair in self.pregrasps[g]:
                     cond_nc.append(pair.constraint)
 
-        param_nc = paramNC[:]
+        param_nc = list(paramNC)
         if paramGrasps is not None:
             for g in paramGrasps:
                 for pair in self.grasps[g]:
@@ -475,19 +773,19 @@ class ConstraintGraph:
         """
         Get weight of an edge
         """
-        return self.client.graph.getWeight(self.edges[edge])
+        return self.graph.getWeight(self.edges[edge])
 
     def setWeight(self, edge, weight):
         """
         Set weight of an edge
         """
-        if self.client.graph.getWeight(self.edges[edge]) == -1:
+        if self.getWeight(edge) == -1:
             raise RuntimeError(
                 'You cannot set weight for "'
                 + edge
                 + '". Perhaps it is a waypoint edge ?'
             )
-        return self.client.graph.setWeight(self.edges[edge], weight)
+        return self.graph.setWeight(self.edges[edge], weight)
 
     # # \\}
 
@@ -548,6 +846,35 @@ class ConstraintGraph:
             viewCmd.append(pdfOut + "." + format)
             Popen(viewCmd)
 
+    def saveGraph(self, filename):
+        """
+        Save the graph in a file
+
+        \\param filename name of the file on the server side. The file is
+               written in XML if its name ends with ".xml", in binary
+               otherwise.
+
+        \\sa hpp::corbaserver::manipulation::Graph::saveGraph
+        """
+        self.graph.saveGraph(filename)
+
+    def loadGraph(self, filename):
+        """
+        Replace the graph by a graph saved by \\ref saveGraph
+
+        \\param filename name of the file on the server side.
+
+        The name of the graph and the IDs of the nodes and edges are
+        updated.
+
+        \\sa hpp::corbaserver::manipulation::Graph::loadGraph
+        """
+        self.graph.loadGraph(filename)
+        self.nodes.clear()
+        self.edges.clear()
+        self._fetchGraph()
+        self.name = self.graph.getName(self.graphId)
+
     def getNodesConnectedByEdge(self, edge):
         """
         Get nodes connected by an edge
@@ -556,7 +883,7 @@ class ConstraintGraph:
         \\param from name of the node the edge starts from,
         \\param to name of the node the edge finishes in.
         """
-        return self.client.graph.getNodesConnectedByEdge(self.edges[edge])
+        return self.graph.getNodesConnectedByEdge(self.edges[edge])
 
     def applyNodeConstraints(self, node, input):
         """
@@ -567,7 +894,7 @@ class ConstraintGraph:
         \\retval output output configuration,
         \\retval error norm of the residual error.
         """
-        return self.client.graph.applyNodeConstraints(self.nodes[node], input)
+        return self.graph.applyNodeConstraints(self.nodes[node], input)
 
     def applyEdgeLeafConstraints(self, edge, qfrom, input):
         """
@@ -583,9 +910,48 @@ class ConstraintGraph:
         If success, the output configuration is reachable from qfrom along
         the transition.
         """
-        return self.client.graph.applyEdgeLeafConstraints(
-            self.edges[edge], qfrom, input
+        return self.graph.applyEdgeLeafConstraints(self.edges[edge], qfrom, input)
+
+    def applyNodeConstraintsBatch(self, node, inputs, nThreads=0):
+        """
+        Apply constaints to several configurations in one request
+
+        \\param node name of the node the constraints of which to apply
+        \\param inputs input configurations, as a list of lists or as a
+               two-dimensional array with one configuration per row,
+        \\param nThreads number of threads of the server projecting the
+               configurations, capped at the maximal number of threads of
+               the problem solver (see
+               hpp.corbaserver.Problem.setMaxNumThreads), 0 for this
+               maximal number.
+        \\retval success list of booleans telling whether each projection
+                succeeded,
+        \\retval outputs output configurations,
+        \\retval errors norms of the residual errors.
+        """
+        if hasattr(inputs, "tolist"):
+            inputs = inputs.tolist()
+        outputs, errors, success = self.graph.applyNodeConstraintsBatch(
+            self.nodes[node], inputs, nThreads
+        )
+        return success, outputs, errors
+
+    def applyEdgeLeafConstraintsBatch(self, edge, qfrom, inputs, nThreads=0):
+        """
+        Apply edge constaints to several configurations in one request
+
+        \\param edge name of the edge
+        \\param qfrom configuration defining the right hand side of the edge
+               constraint,
+        \\param inputs, nThreads see \\ref applyNodeConstraintsBatch.
+        \\retval success, outputs, errors see \\ref applyNodeConstraintsBatch.
+        """
+        if hasattr(inputs, "tolist"):
+            inputs = inputs.tolist()
+        outputs, errors, success = self.graph.applyEdgeLeafConstraintsBatch(
+            self.edges[edge], qfrom, inputs, nThreads
         )
+        return success, outputs, errors
 
     def generateTargetConfig(self, edge, qfrom, input):
         """
@@ -601,7 +967,39 @@ class ConstraintGraph:
         Compute a configuration in the destination node of the edge,
         reachable from qFrom.
         """
-        return self.client.graph.generateTargetConfig(self.edges[edge], qfrom, input)
+        return self.graph.generateTargetConfig(self.edges[edge], qfrom, input)
+
+    def generateTargetConfigFromSeeds(
+        self, edge, qfrom, inputs=None, nSeeds=0, timeout=0, nThreads=0
+    ):
+        """
+        Generate configuration in destination state from several seeds
+
+        \\param edge name of the edge
+        \\param qfrom configuration defining the right hand side of the edge
+               constraint,
+        \\param inputs list (or numpy array) of input configurations. If
+               None or empty, nSeeds random configurations are used,
+        \\param nSeeds number of random configurations if inputs is empty,
+        \\param timeout no seed is tried after timeout seconds, if positive,
+        \\param nThreads number of threads, see
+               \\ref applyNodeConstraintsBatch.
+        \\retval success whether a seed was projected successfully,
+        \\retval output the first successful output configuration, otherwise
+                the one with the lowest residual error,
+        \\retval error norm of the residual error,
+        \\retval attempts number of seeds tried before returning.
+
+        The seeds are tried in parallel and the request returns as soon as
+        one of them succeeds.
+        """
+        if inputs is None:
+            inputs = list()
+        elif hasattr(inputs, "tolist"):
+            inputs = inputs.tolist()
+        return self.graph.generateTargetConfigFromSeeds(
+            self.edges[edge], qfrom, inputs, nSeeds, timeout, nThreads
+        )
 
     def buildAndProjectPath(self, edge, qb, qe):
         """
@@ -621,6 +1019,29 @@ class ConstraintGraph:
         """
         return self.client.problem.buildAndProjectPath(self.edges[edge], qb, qe)
 
+    def buildAndProjectPaths(self, triples, nThreads=0, storePaths=False):
+        """
+        Build and project several paths in one request
+        \\param triples list of (edge name, qb, qe) triples,
+        \\param nThreads number of threads, see
+               \\ref applyNodeConstraintsBatch,
+        \\param storePaths whether the paths are added to the ProblemSolver
+               path vector.
+        \\retval success whether each path is built and fully projected,
+        \\retval ratios length of each projected path over the length of the
+                built path, 0 if the path could not be built,
+        \\retval indexesNotProj, indexesProj indexes of the paths in the
+                ProblemSolver path vector as in \\ref buildAndProjectPath,
+                -1 if storePaths is False.
+        No path validation is made.
+        """
+        edges = [self.edges[e] for e, _, _ in triples]
+        qbs = [list(qb) for _, qb, _ in triples]
+        qes = [list(qe) for _, _, qe in triples]
+        return self.client.problem.buildAndProjectPaths(
+            edges, qbs, qes, nThreads, storePaths
+        )
+
     def getConfigErrorForNode(self, nodeId, config):
         """
         Get error of a config with respect to a node constraint
@@ -633,7 +1054,30 @@ class ConstraintGraph:
         Call method core::ConstraintSet::isSatisfied for the node
         constraints.
         """
-        return self.client.graph.getConfigErrorForNode(self.nodes[nodeId], config)
+        return self.graph.getConfigErrorForNode(self.nodes[nodeId], config)
+
+    def getConfigErrorsForAllNodes(self, configs, nThreads=0):
+        """
+        Get errors of configurations with respect to all node constraints
+
+        \\param configs list (or numpy array) of configurations,
+        \\param nThreads number of threads, see
+               \\ref applyNodeConstraintsBatch.
+        \\retval nodes names of the nodes,
+        \\retval errors norms of the errors, flat list in row-major order
+                with one row per configuration and one column per node,
+        \\retval membership whether each configuration belongs to each node,
+                with the same layout as errors.
+
+        The matrices are obtained with
+        numpy.reshape(errors, (len(configs), len(nodes))).
+        """
+        if hasattr(configs, "tolist"):
+            configs = configs.tolist()
+        ids, errors, membership = self.graph.getConfigErrorsForAllNodes(
+            configs, nThreads
+        )
+        return [self.getNodeName(i) for i in ids], errors, membership
 
     def getNode(self, config):
         """
@@ -641,11 +1085,65 @@ class ConstraintGraph:
         \\param dofArray the configuration.
         \\return the name of the node
         """
-        nodeId = self.client.graph.getNode(config)
-        for n, id in self.nodes.items():
-            if id == nodeId:
-                return n
-        raise RuntimeError(f"No node with id {nodeId}")
+        nodeId = self.graph.getNode(config)
+        return self.getNodeName(nodeId)
+
+    def getNodes(self, configs, parallel=False):
+        """
+        Get the nodes corresponding to the states of several configurations
+        in one request.
+        \\param configs the configurations, as a list of lists or as a
+               two-dimensional array with one configuration per row.
+        \\param parallel whether the server classifies the configurations
+               in several threads. The server uses at most the maximal
+               number of threads of the problem solver, see
+               hpp.corbaserver.Problem.setMaxNumThreads.
+        \\return the list of the names of the nodes, None for the
+                configurations that are in no node.
+        \\sa hpp::corbaserver::manipulation::Graph::getNodes
+        """
+        if hasattr(configs, "tolist"):
+            configs = configs.tolist()
+        return [
+            None if id == -1 else self.getNodeName(id)
+            for id in self.graph.getNodes(configs, parallel)
+        ]
+
+    def getNodeName(self, nodeId):
+        """
+        Get the name of a node
+        \\param nodeId ID of the node
+        """
+        try:
+            return self.nodes.name(nodeId)
+        except KeyError:
+            raise RuntimeError(f"No node with id {nodeId}") from None
+
+    def getEdgeName(self, edgeId):
+        """
+        Get the name of an edge
+        \\param edgeId ID of the edge
+        """
+        try:
+            return self.edges.name(edgeId)
+        except KeyError:
+            raise RuntimeError(f"No edge with id {edgeId}") from None
+
+    def edgeAtParam(self, pathId, param):
+        """
+        Get the edge of the motion that generated the configuration of a
+        path at a given parameter
+        \\param pathId index of the path in the ProblemSolver path vector,
+        \\param param parameter along the path.
+        \\return the name of the edge.
+        \\sa hpp::corbaserver::manipulation::Problem::edgeAtParam
+        """
+        edgeId, graphName = self.client.problem.edgeAtParam(pathId, param)
+        if graphName != self.name:
+            raise RuntimeError(
+                f"Path {pathId} was generated by graph {graphName}, not {self.name}"
+            )
+        return self.getEdgeName(edgeId)
 
     def getConfigErrorForEdge(self, edgeId, config):
         """
@@ -660,7 +1158,7 @@ class ConstraintGraph:
         the input configuration and then core::ConstraintSet::isSatisfied
         on the edge constraints.
         """
-        return self.client.graph.getConfigErrorForEdge(self.edges[edgeId], config)
+        return self.graph.getConfigErrorForEdge(self.edges[edgeId], config)
 
     def getConfigErrorForEdgeLeaf(self, edgeId, leafConfig, config):
         """
@@ -676,7 +1174,7 @@ class ConstraintGraph:
         leafConfig and then core::ConstraintSet::isSatisfied with config.
         on the edge constraints.
         """
-        return self.client.graph.getConfigErrorForEdgeLeaf(
+        return self.graph.getConfigErrorForEdgeLeaf(
             self.edges[edgeId], leafConfig, config
         )
 
@@ -694,7 +1192,7 @@ class ConstraintGraph:
         leafConfig and then core::ConstraintSet::isSatisfied with config.
         on the edge constraints.
         """
-        return self.client.graph.getConfigErrorForEdgeTarget(
+        return self.graph.getConfigErrorForEdgeTarget(
             self.edges[edgeId], leafConfig, config
         )
 
@@ -29,8 +29,11 @@
 # DAMAGE.
 
 import abc
+import copy
+import multiprocessing
 import re
 from abc import ABC
+from collections import defaultdict, deque
 
 from .constraints import Constraints
 from .possible_grasps import PossibleGrasps
@@ -58,9 +61,20 @@ class GraspIsAllowed:
 
 
 class Rules:
+    """
+    Grasp validation defined by a list of rules
+
+    At construction, the regular expressions of each rule are evaluated on
+    all the handle names. For each gripper concerned by a rule, the rule
+    stores a bit mask of the accepted handles: bit 0 stands for the empty
+    handle (free gripper) and bit ih + 1 for handle of index ih.
+    """
+
     def __init__(self, grippers, handles, rules):
         rs = []
         status = []
+        # names matched by the regular expressions, "" for a free gripper
+        names = ("", *handles)
         for r in rules:
             # replace empty strings by the corresponding regexp "^$",
             # otherwise "" matches with all strings.
@@ -70,16 +84,21 @@ class Rules:
             for i in range(len(r.handles)):
                 if r.handles[i] == "":
                     r.handles[i] = "^$"
-            handlesRegex = [None] * len(grippers)
+            handlesMask = [None] * len(grippers)
             for j, gr in enumerate(r.grippers):
                 grc = re.compile(gr)
+                hc = re.compile(r.handles[j])
                 for i, g in enumerate(grippers):
                     if grc.match(g):
-                        assert handlesRegex[i] is None
-                        handlesRegex[i] = re.compile(r.handles[j])
+                        assert handlesMask[i] is None
+                        handlesMask[i] = sum(
+                            1 << k for k, n in enumerate(names) if hc.match(n)
+                        )
             status.append(r.link)
 
-            rs.append(tuple(handlesRegex))
+            rs.append(tuple((i, m) for i, m in enumerate(handlesMask) if m is not None))
+        # the rules, to build the validation for other grippers and handles
+        self.ruleList = tuple(rules)
         self.rules = tuple(rs)
         self.status = tuple(status)
         self.handles = tuple(handles)
@@ -87,19 +106,65 @@ class Rules:
 
     def __call__(self, grasps):
         for r, s in zip(self.rules, self.status):
-            apply = True
-            for i, h in enumerate(r):
-                if h is not None and not h.match(
-                    "" if grasps[i] is None else self.handles[grasps[i]]
-                ):
+            for i, m in r:
+                h = grasps[i]
+                if not m >> (0 if h is None else h + 1) & 1:
                     # This rule does not apply
-                    apply = False
                     break
-            if apply:
+            else:
                 return s
         return self.defaultAcceptation
 
 
+# grasp validation of the worker processes, see _initShards
+_shardValidation = None
+
+
+def _initShards(graspIsAllowed):
+    """
+    Store the grasp validation in a worker process
+
+    The validation is thus pickled once per process instead of once per
+    shard.
+    """
+    global _shardValidation
+    _shardValidation = graspIsAllowed
+
+
+def _evaluateShard(args):
+    """
+    Evaluate the grasp validation on the sets of grasps of a shard
+
+    \\param args tuple (nGrippers, nHandles, ig0, ih0).
+    The shard contains the sets of grasps in which gripper ig0 holds handle
+    ih0 and grippers of lower index are free.
+    \\return the lists of the codes of the allowed and of the forbidden sets
+            of grasps (see GraphFactoryAbstract._graspsCode).
+    """
+    nG, nH, ig0, ih0 = args
+    weights = tuple((nH + 1) ** ig for ig in range(nG))
+    allowed, forbidden = list(), list()
+    grasps = [None] * nG
+    grasps[ig0] = ih0
+
+    def visit(ig, code, hmask):
+        if ig == nG:
+            if _shardValidation(tuple(grasps)):
+                allowed.append(code)
+            else:
+                forbidden.append(code)
+            return
+        visit(ig + 1, code, hmask)
+        for ih in range(nH):
+            if not hmask >> ih & 1:
+                grasps[ig] = ih
+                visit(ig + 1, code + (ih + 1) * weights[ig], hmask | 1 << ih)
+        grasps[ig] = None
+
+    visit(ig0 + 1, (ih0 + 1) * weights[ig0], 1 << ih0)
+    return allowed, forbidden
+
+
 class GraphFactoryAbstract(ABC):
     """
     An abstract class which is loops over the different (gripper, handle) associations.
@@ -123,12 +188,13 @@ class GraphFactoryAbstract(ABC):
      \\li <b>available handles</b> as the handles that are not the second element
         of any pair of the set of grasps.
 
-     The first node is defined by the empty set. The graph is built recursiveley
-     as follows:
+     The first node is defined by the empty set. The sets of grasps are visited
+     once each, in breadth first order (by increasing number of grasps), as
+     follows:
 
      if the set of grasps defining the node is not allowed (method \\link
          constraint_graph_factory.GraphFactoryAbstract.graspIsAllowed
-         graspIsAllowed \\endlink), return.
+         graspIsAllowed \\endlink), only its successors are visited.
 
      Otherwise, for any pair \\f$(g,h)\f$ of available grippers and available
      handles,
@@ -142,7 +208,11 @@ class GraphFactoryAbstract(ABC):
      \\li build a loopTransition from the current state to itself (method \\link
          constraint_graph_factory.GraphFactoryAbstract.makeLoopTransition
          makeLoopTransition \\endlink)
-     \\li repeat the two above states to the new state.
+     \\li visit the new set of grasps later on.
+
+     The verdict of \\link
+     constraint_graph_factory.GraphFactoryAbstract.graspIsAllowed
+     graspIsAllowed \\endlink is computed once for each set of grasps.
     """
 
     def __init__(self):
@@ -158,6 +228,8 @@ class GraphFactoryAbstract(ABC):
         # # \name Internal variables
         # \{
 
+        # # states indexed by the integer code of their grasps,
+        # see \\ref _graspsCode
         self.states = dict()
         self.transitions = set()
         # # the handle names
@@ -174,6 +246,8 @@ class GraphFactoryAbstract(ABC):
         self.objectFromHandle = tuple()  # handle index to object index
         # # See \\ref setObjects
         self.contactsPerObjects = tuple()  # object index to contact names
+        # # See \\ref setSymmetricObjects
+        self.symmetricObjects = tuple()  # tuples of object indices
         # # \}
 
     # # \name Main API
@@ -222,6 +296,34 @@ class GraphFactoryAbstract(ABC):
         """
         self.envContacts = tuple(envContacts)
 
+    def setSymmetricObjects(self, classes):
+        """
+        Declare classes of identical objects
+
+        \\param classes a list of lists of object names. The objects of a
+               list have the same number of handles. Their handles of same
+               index are equivalent.
+
+        Two sets of grasps are symmetric if one is obtained from the other by
+        permuting the objects of some classes. \\ref graspIsAllowed is
+        assumed to give the same verdict for symmetric sets of grasps: it is
+        evaluated once for each class of symmetric sets. In lazy mode (see
+        \\ref generate), only one set of each class is created when
+        expanding a neighbour: the canonical set if it is a neighbour, the
+        first one otherwise. Other sets are created only when they are
+        expanded explicitly with \\ref expand.
+        """
+        symmetricObjects = []
+        for c in classes:
+            objects = tuple(self.objects.index(o) for o in c)
+            n = len(self.handlesPerObjects[objects[0]])
+            if any(len(self.handlesPerObjects[io]) != n for io in objects):
+                raise ValueError(
+                    "Symmetric objects should have the same number of handles"
+                )
+            symmetricObjects.append(objects)
+        self.symmetricObjects = tuple(symmetricObjects)
+
     def setRules(self, rules):
         """
         Set the function \\ref graspIsAllowed
@@ -238,13 +340,102 @@ class GraphFactoryAbstract(ABC):
         """
         self.graspIsAllowed.append(PossibleGrasps(self.grippers, self.handles, grasps))
 
-    def generate(self):
+    def generate(self, processes=1, lazy=False):
         """
         Go through the combinatorial defined by the grippers and handles
         and create the states and transitions.
+
+        \\param lazy if True, only the free state and its neighbours are
+               created. Other states are created by \\ref expand.
+        \\param processes number of processes evaluating \\ref graspIsAllowed.
+               If greater than 1, the sets of grasps are partitioned by their
+               grasp of lowest gripper index and \\ref graspIsAllowed is
+               evaluated on each part by a process of a multiprocessing pool.
+               \\ref graspIsAllowed must then be picklable. The states and
+               transitions are created afterwards in the calling process, in
+               the same order and with the same names and priorities as with
+               one process.
+
+        \\note All the sets of grasps are evaluated by the pool, whereas
+              only the reachable ones are evaluated by the calling process.
+              The pool is thus only used when generating the complete graph
+              with validations other than Rules and PossibleGrasps, which
+              are bit mask lookups cheaper than the transfer of the verdicts.
+        """
+        # Radix of the integer encoding of grasps: each gripper is given a
+        # digit equal to 0 if it is free and to 1 + the index of the handle
+        # it holds otherwise.
+        self._radix = len(self.handles) + 1
+        self._gripperWeights = tuple(
+            self._radix**ig for ig in range(len(self.grippers))
+        )
+        # graspIsAllowed verdicts indexed by the code of the set of grasps
+        self._allowed = dict()
+        if processes > 1 and not lazy and not self._cheapValidations():
+            self._evaluateInParallel(processes)
+        if lazy:
+            # codes of the expanded sets of grasps and pairs of codes of the
+            # sets linked by a transition
+            self._expanded = set()
+            self._linked = set()
+            self._expand(0)
+        else:
+            # the graph is complete
+            self._expanded = None
+            self._explore()
+
+    def expand(self, grasps):
+        """
+        Create the states and transitions around a set of grasps
+
+        \\param grasps a handle index (or None) for each gripper.
+
+        In lazy mode (see \\ref generate), create the allowed sets of grasps
+        obtained by adding or removing one grasp, and the transitions
+        linking them to grasps. Does nothing if grasps has already been
+        expanded, if it is not allowed by \\ref graspIsAllowed or if the
+        graph has been generated completely.
         """
-        grasps = (None,) * len(self.grippers)
-        self._recurse(self.grippers, self.handles, grasps, 0)
+        self._expand(self._graspsCode(grasps))
+
+    def addGripper(self, gripper, possibleGrasps=dict()):
+        """
+        Add a gripper to a generated graph
+
+        \\param gripper name of the gripper,
+        \\param possibleGrasps see \\ref addObject.
+
+        Only the states in which the new gripper holds a handle and their
+        transitions are created. See \\ref addObject.
+        """
+        self._extend((*self.grippers, gripper), self.objects, [], [], possibleGrasps)
+
+    def addObject(self, object, handles, contacts, possibleGrasps=dict()):
+        """
+        Add an object to a generated graph
+
+        \\param object name of the object,
+        \\param handles list of handle names of the object,
+        \\param contacts list of contact names of the object,
+        \\param possibleGrasps dictionary whose keys are grippers and whose
+               values are lists of handles, added to the possible grasps (see
+               \\ref setPossibleGrasps). The possible grasps do not allow the
+               new grippers and handles otherwise.
+
+        Only the states in which a handle of the new object is held and their
+        transitions are created. The object is placed in the existing states
+        (see \\ref addObjectToStates).
+
+        The rules and possible grasps are evaluated again on the new
+        grippers and handles. The verdicts of \\ref graspIsAllowed on the sets
+        of grasps that do not involve them are kept: no state is removed. In
+        lazy mode, the expanded states are expanded again. Other grasp
+        validations cannot be rebuilt: TypeError is raised if
+        \\ref graspIsAllowed contains any.
+        """
+        self._extend(
+            self.grippers, (*self.objects, object), handles, contacts, possibleGrasps
+        )
 
     # # \}
 
@@ -290,20 +481,95 @@ class GraphFactoryAbstract(ABC):
         """
         pass
 
+    def addObjectToStates(self, io, states):
+        """
+        Place a new object in existing states
+        \\param io index of the object added by \\ref addObject,
+        \\param states the objects returned by \\ref makeState for the
+               states that existed before the object was added.
+        """
+        pass
+
     # # \}
 
-    def _existState(self, grasps):
-        return grasps in self.states
+    # attributes saved by _saveState
+    _stateAttributes = (
+        "states",
+        "transitions",
+        "grippers",
+        "objects",
+        "handles",
+        "handlesPerObjects",
+        "objectFromHandle",
+        "contactsPerObjects",
+        "_radix",
+        "_gripperWeights",
+        "_allowed",
+        "_expanded",
+        "_linked",
+    )
+
+    def _saveState(self):
+        """
+        Copy the attributes modified by the generation of the graph
+
+        \\return an object to pass to \\ref _restoreState.
+        """
+        saved = dict(
+            (n, copy.copy(getattr(self, n)))
+            for n in self._stateAttributes
+            if hasattr(self, n)
+        )
+        validations = getattr(self.graspIsAllowed, "graspValidations_", None)
+        if validations is not None:
+            saved["graspValidations_"] = list(validations)
+        return saved
+
+    def _restoreState(self, saved):
+        """
+        Restore the attributes copied by \\ref _saveState
+        """
+        for n in self._stateAttributes:
+            if n in saved:
+                setattr(self, n, saved[n])
+            elif hasattr(self, n):
+                delattr(self, n)
+        if "graspValidations_" in saved:
+            self.graspIsAllowed.graspValidations_[:] = saved["graspValidations_"]
+
+    def _graspsCode(self, grasps):
+        """
+        Encode a set of grasps as an integer
+        \\param grasps a handle index (or None) for each gripper
+        """
+        return sum(
+            (ih + 1) * w
+            for ih, w in zip(grasps, self._gripperWeights)
+            if ih is not None
+        )
+
+    def _graspsFromCode(self, code):
+        """
+        Decode an integer built by \\ref _graspsCode into a tuple of grasps
+        """
+        grasps = []
+        for _ in self.grippers:
+            code, ih = divmod(code, self._radix)
+            grasps.append(ih - 1 if ih > 0 else None)
+        return tuple(grasps)
+
+    def _existState(self, code):
+        return code in self.states
 
-    def _makeState(self, grasps, priority):
-        if not self._existState(grasps):
-            state = self.makeState(grasps, priority)
-            self.states[grasps] = state
+    def _makeState(self, code, priority):
+        if not self._existState(code):
+            state = self.makeState(self._graspsFromCode(code), priority)
+            self.states[code] = state
 
             # Create loop transition
             self.makeLoopTransition(state)
         else:
-            state = self.states[grasps]
+            state = self.states[code]
         return state
 
     def _isObjectGrasped(self, grasps, object):
@@ -340,63 +606,354 @@ class GraphFactoryAbstract(ABC):
     def _loopTransitionName(self, grasps):
         return "Loop | " + self._stateName(grasps, True)
 
-    def _recurse(self, grippers, handles, grasps, depth):
+    def _isAllowed(self, code):
         """
-        Recurse across all possible sets of grasps
+        Cached call to \\ref graspIsAllowed
+        \\param code integer encoding a set of grasps (see \\ref _graspsCode)
+        """
+        try:
+            return self._allowed[code]
+        except KeyError:
+            canonical = self._canonicalCode(code)
+            if canonical != code:
+                res = self._allowed[code] = self._isAllowed(canonical)
+            else:
+                res = self._allowed[code] = self.graspIsAllowed(
+                    self._graspsFromCode(code)
+                )
+            return res
 
-        This method visits all possible set of grasps and create states
-        and transitions between those states.
+    def _canonicalCode(self, code):
+        """
+        Code of the canonical set of grasps symmetric to a set of grasps
 
-        \\param grippers list of names of available grippers: that do not hold
-               an handle yet,
-        \\param handles list of names of available handles that are not hold yet
-               by a gripper.
-        \\param grasps list of grasps already active. Grasps are represented by
-               a list of handle indices or None if the gripper is available.
-               the order in the list corresponds to the order of the gripper
-               in the list of all grippers.
-               For instance, if a robot has 3 grippers registered in the factory
-               ("g1", "g2", "g3"), handles ["h1", "h2"] are registered in
-               the factory, and grasps is equal to (1, 0, None), then
-                 \\li "g1" holds "h2",
-                 \\li "g2" holds "h1", and
-                 \\li "g3" does not hold anything.
+        In each class of \\ref symmetricObjects, the objects are sorted by
+        the grippers holding their handles. Grasped objects come first.
+        \\param code integer encoding a set of grasps (see \\ref _graspsCode)
+        """
+        if not self.symmetricObjects or code == 0:
+            return code
+        grasps = self._graspsFromCode(code)
+        nG = len(self.grippers)
+        # gripper holding each handle, nG if none
+        holder = [nG] * len(self.handles)
+        for ig, ih in enumerate(grasps):
+            if ih is not None:
+                holder[ih] = ig
+        canonical = list(grasps)
+        for objects in self.symmetricObjects:
+            signatures = sorted(
+                tuple(holder[ih] for ih in self.handlesPerObjects[io]) for io in objects
+            )
+            for io, signature in zip(objects, signatures):
+                for ih, ig in zip(self.handlesPerObjects[io], signature):
+                    if ig < nG:
+                        canonical[ig] = ih
+        return self._graspsCode(canonical)
 
+    def _cheapValidations(self):
+        """
+        Whether \\ref graspIsAllowed only calls Rules and PossibleGrasps
+        instances
         """
-        isAllowed = self.graspIsAllowed(grasps)
-        if isAllowed:
-            current = self._makeState(grasps, depth)
+        validations = getattr(self.graspIsAllowed, "graspValidations_", None)
+        return validations is not None and all(
+            isinstance(v, (Rules, PossibleGrasps)) for v in validations
+        )
 
-        if len(grippers) == 0 or len(handles) == 0:
+    def _evaluateInParallel(self, processes):
+        """
+        Fill the cache of \\ref graspIsAllowed verdicts using a pool of
+        processes
+        """
+        nG, nH = len(self.grippers), len(self.handles)
+        shards = [(nG, nH, ig, ih) for ig in range(nG) for ih in range(nH)]
+        with multiprocessing.Pool(
+            processes, _initShards, (self.graspIsAllowed,)
+        ) as pool:
+            results = pool.map(_evaluateShard, shards)
+        self._isAllowed(0)
+        for allowed, forbidden in results:
+            self._allowed.update(dict.fromkeys(allowed, True))
+            self._allowed.update(dict.fromkeys(forbidden, False))
+
+    def _successors(self, code, gmask, hmask):
+        """
+        Iterate over the sets of grasps obtained by adding one grasp
+
+        \\param code integer encoding the grasps already active
+               (see \\ref _graspsCode),
+        \\param gmask bit mask of the grippers that already hold a handle,
+        \\param hmask bit mask of the handles that are already hold by a
+               gripper.
+        \\return a generator of tuples (ig, nCode, ngmask, nhmask) where ig is
+                the index of the gripper that grasps a new handle and nCode,
+                ngmask, nhmask describe the new set of grasps.
+        """
+        for ig, w in enumerate(self._gripperWeights):
+            if gmask >> ig & 1:
+                continue
+            for ih in range(len(self.handles)):
+                if hmask >> ih & 1:
+                    continue
+                yield ig, code + (ih + 1) * w, gmask | 1 << ig, hmask | 1 << ih
+
+    def _expand(self, code):
+        """
+        Expand the set of grasps of given code, see \\ref expand
+        """
+        if (
+            self._expanded is None
+            or code in self._expanded
+            or not self._isAllowed(code)
+        ):
             return
-        for ig, g in enumerate(grippers):
-            # ngrippers = { grippers } \ grippers[ig]
-            ngrippers = grippers[:ig] + grippers[ig + 1 :]
-            # isg <- index of g in list of all grippers
-            isg = self.grippers.index(g)
-            for ih, h in enumerate(handles):
-                # nhandles = { handles } \ handles[ih]
-                nhandles = handles[:ih] + handles[ih + 1 :]
-                # ish <- index of h in all handles
-                ish = self.handles.index(h)
-                # nGrasp <- substitute current handle index at current gripper
-                # position.
-                nGrasps = (*grasps[:isg], ish, *grasps[isg + 1 :])
-
-                nextIsAllowed = self.graspIsAllowed(nGrasps)
-                isNewState = not self._existState(nGrasps)
-                if nextIsAllowed:
-                    nnext = self._makeState(nGrasps, depth + 1)
-
-                if (
-                    isAllowed
-                    and nextIsAllowed
-                    and self.transitionIsAllowed(stateFrom=current, stateTo=nnext)
+        self._expanded.add(code)
+        self._makeState(code, self._priority(code))
+        neighbours = [
+            (ig, lower, upper, upper if lower == code else lower)
+            for ig, lower, upper in self._neighbours(code)
+        ]
+        others = set(other for _, _, _, other in neighbours)
+        # Among the symmetric neighbours, only the canonical one, or the
+        # first one if the canonical set is not a neighbour, is created. The
+        # other ones are created when expanded.
+        representatives = dict()
+        for _, _, _, other in neighbours:
+            canonical = self._canonicalCode(other)
+            if canonical in others:
+                representatives[canonical] = canonical
+            else:
+                representatives.setdefault(canonical, other)
+        for ig, lower, upper, other in neighbours:
+            if not self._isAllowed(other):
+                continue
+            if (
+                other not in self._expanded
+                and other not in self.states
+                and representatives[self._canonicalCode(other)] != other
+            ):
+                continue
+            self._makeState(other, self._priority(other))
+            if (lower, upper) in self._linked:
+                continue
+            self._linked.add((lower, upper))
+            if self.transitionIsAllowed(
+                stateFrom=self.states[lower], stateTo=self.states[upper]
+            ):
+                self.makeTransition(self.states[lower], self.states[upper], ig)
+
+    def _priority(self, code):
+        """
+        Priority of the state of a set of grasps: \\f$2n-1\\f$ where
+        \\f$n>0\\f$ is the number of grasps, 0 for the free state.
+        """
+        n = sum(ih is not None for ih in self._graspsFromCode(code))
+        return 2 * n - 1 if n > 0 else 0
+
+    def _neighbours(self, code):
+        """
+        Iterate over the sets of grasps that differ by one grasp
+
+        \\param code integer encoding a set of grasps (see \\ref _graspsCode)
+        \\return a generator of tuples (ig, lower, upper) where lower and upper
+                are the codes of the sets of grasps without and with the grasp
+                of gripper ig. Sets with one grasp less come first.
+        """
+        grasps = self._graspsFromCode(code)
+        gmask = hmask = 0
+        for ig, ih in enumerate(grasps):
+            if ih is not None:
+                gmask |= 1 << ig
+                hmask |= 1 << ih
+                yield ig, code - (ih + 1) * self._gripperWeights[ig], code
+        for ig, nCode, _, _ in self._successors(code, gmask, hmask):
+            yield ig, code, nCode
+
+    def _extend(self, grippers, objects, handles, contacts, possibleGrasps):
+        """
+        Add grippers or an object and create the new states and transitions
+
+        \\param grippers, objects the new lists of grippers and objects,
+        \\param handles, contacts the handles and contacts of the new object
+               if any,
+        \\param possibleGrasps the grasps added to the possible grasps.
+        """
+        if not hasattr(self, "_radix"):
+            raise RuntimeError("The graph should be generated first.")
+        self._checkValidations()
+        nG, nH, nO = len(self.grippers), len(self.handles), len(self.objects)
+        oldRadix = self._radix
+        oldStates = list(self.states.values())
+
+        def recode(code):
+            grasps = []
+            for _ in range(nG):
+                code, ih = divmod(code, oldRadix)
+                grasps.append(ih - 1 if ih > 0 else None)
+            grasps += [None] * (len(grippers) - nG)
+            return self._graspsCode(grasps)
+
+        self.grippers = tuple(grippers)
+        if len(objects) > nO:
+            self.objects = tuple(objects)
+            self.handles += tuple(handles)
+            self.handlesPerObjects += (tuple(range(nH, nH + len(handles))),)
+            self.objectFromHandle += (nO,) * len(handles)
+            self.contactsPerObjects += (tuple(contacts),)
+        self._radix = len(self.handles) + 1
+        self._gripperWeights = tuple(
+            self._radix**ig for ig in range(len(self.grippers))
+        )
+        self.states = dict((recode(c), s) for c, s in self.states.items())
+        self._allowed = dict((recode(c), a) for c, a in self._allowed.items())
+        self._updateValidations(possibleGrasps)
+
+        if len(objects) > nO:
+            self.addObjectToStates(nO, oldStates)
+
+        if self._expanded is None:
+            self._exploreNew(nG, nH)
+        else:
+            expanded = [recode(c) for c in self._expanded]
+            self._linked = set((recode(a), recode(b)) for a, b in self._linked)
+            self._expanded = set()
+            for code in expanded:
+                self._expand(code)
+
+    def _checkValidations(self):
+        """
+        Check that the grasp validations can be rebuilt by
+        \\ref _updateValidations
+
+        Raises TypeError if \\ref graspIsAllowed is not a GraspIsAllowed
+        instance or if it contains validations other than Rules and
+        PossibleGrasps. These validations are defined for the grippers and
+        handles they were built with.
+        """
+        validations = getattr(self.graspIsAllowed, "graspValidations_", None)
+        if validations is None:
+            raise TypeError(
+                "Grippers and objects can only be added when graspIsAllowed "
+                "is a GraspIsAllowed instance"
+            )
+        for v in validations:
+            if not isinstance(v, (Rules, PossibleGrasps)):
+                raise TypeError(
+                    f"Grasp validation {v!r} cannot be rebuilt for the new "
+                    "grippers and handles. Only Rules and PossibleGrasps "
+                    "instances can."
+                )
+
+    def _updateValidations(self, possibleGrasps):
+        """
+        Build the rules and possible grasps for the current grippers and
+        handles
+
+        \\param possibleGrasps the grasps added to the possible grasps.
+        """
+        validations = self.graspIsAllowed.graspValidations_
+        for i, v in enumerate(validations):
+            if isinstance(v, Rules):
+                validations[i] = Rules(self.grippers, self.handles, v.ruleList)
+                validations[i].defaultAcceptation = v.defaultAcceptation
+            elif isinstance(v, PossibleGrasps):
+                grasps = dict((g, list(hs)) for g, hs in v.grasps.items())
+                for g, hs in possibleGrasps.items():
+                    grasps.setdefault(g, list()).extend(hs)
+                validations[i] = PossibleGrasps(self.grippers, self.handles, grasps)
+
+    def _newCodes(self, nG, nH):
+        """
+        Iterate over the sets of grasps that involve a new gripper or handle
+
+        \\param nG, nH the grippers of index greater than or equal to nG and
+               the handles of index greater than or equal to nH are new.
+        \\return a generator of the codes of the sets of grasps in which a
+                new gripper or a new handle is grasped.
+
+        The grasps are chosen gripper after gripper. Branches that cannot
+        contain a new grasp any more are pruned, so that each visited
+        partial set leads to at least one new set.
+        """
+        nGrippers, nHandles = len(self.grippers), len(self.handles)
+        weights = self._gripperWeights
+        # bit mask of the new handles
+        newHandles = (1 << nHandles) - (1 << nH)
+
+        def visit(ig, code, hmask, new):
+            if ig == nGrippers:
+                if new:
+                    yield code
+                return
+            if not new and nGrippers == nG and hmask & newHandles == newHandles:
+                # no new grasp can be added
+                return
+            yield from visit(ig + 1, code, hmask, new)
+            for ih in range(nHandles):
+                if not hmask >> ih & 1:
+                    yield from visit(
+                        ig + 1,
+                        code + (ih + 1) * weights[ig],
+                        hmask | 1 << ih,
+                        new or ig >= nG or ih >= nH,
+                    )
+
+        return visit(0, 0, 0, False)
+
+    def _exploreNew(self, nG, nH):
+        """
+        Create the states and transitions of the sets of grasps involving a
+        new gripper or handle
+
+        \\param nG, nH see \\ref _newCodes.
+
+        The states are created by increasing number of grasps, with the
+        same priorities as \\ref _explore. Each new state is linked to the
+        sets of grasps obtained by removing one of its grasps.
+        """
+        for code in sorted(self._newCodes(nG, nH), key=self._priority):
+            if not self._isAllowed(code):
+                continue
+            state = self._makeState(code, self._priority(code))
+            for ig, ih in enumerate(self._graspsFromCode(code)):
+                if ih is None:
+                    continue
+                lower = code - (ih + 1) * self._gripperWeights[ig]
+                if self._isAllowed(lower) and self.transitionIsAllowed(
+                    stateFrom=self.states[lower], stateTo=state
                 ):
-                    self.makeTransition(current, nnext, isg)
+                    self.makeTransition(self.states[lower], state, ig)
 
-                if isNewState:
-                    self._recurse(ngrippers, nhandles, nGrasps, depth + 2)
+    def _explore(self):
+        """
+        Visit all possible sets of grasps and create states and transitions
+
+        Sets of grasps are visited once each, in breadth first order. For a
+        given number of grasps, they are visited in the order they have been
+        reached, successors being ordered by gripper index, then by handle
+        index. States are created the first time they are reached, with
+        priority \\f$2n-1\\f$ where \\f$n>0\\f$ is the number of grasps.
+        """
+        queue = deque([(0, 0, 0, 0)])
+        visited = {0}
+        if self._isAllowed(0):
+            self._makeState(0, 0)
+        while queue:
+            code, gmask, hmask, depth = queue.popleft()
+            current = self.states[code] if self._isAllowed(code) else None
+            for ig, nCode, ngmask, nhmask in self._successors(code, gmask, hmask):
+                isNew = nCode not in visited
+                if isNew:
+                    visited.add(nCode)
+                if self._isAllowed(nCode):
+                    nnext = self._makeState(nCode, depth + 1)
+                    if current is not None and self.transitionIsAllowed(
+                        stateFrom=current, stateTo=nnext
+                    ):
+                        self.makeTransition(current, nnext, ig)
+                if isNew:
+                    queue.append((nCode, ngmask, nhmask, depth + 2))
 
 
 class ConstraintFactoryAbstract(ABC):
@@ -496,6 +1053,18 @@ class ConstraintFactoryAbstract(ABC):
 
     # # \}
 
+    def createConstraints(self, grasps, objects):
+        """
+        Create in advance the constraints of several grasps and placements
+
+        \\param grasps list of pairs (gripper index, handle index)
+        \\param objects list of object indices
+
+        This method does nothing by default. Constraints that are not
+        created here are created by \\ref buildGrasp and \\ref buildPlacement.
+        """
+        pass
+
     @abc.abstractmethod
     def buildGrasp(self, g, h):
         """
@@ -530,6 +1099,101 @@ class ConstraintFactoryAbstract(ABC):
         )
 
 
+class ConstraintRegistry:
+    """
+    Client side registry of the numerical constraints of a problem
+
+    Stores the names and dimensions of the numerical constraints so that
+    they are not fetched from the server for each grasp and placement.
+    - the registry is populated in one request at the first query,
+    - \\ref add stores the dimensions returned by the requests creating
+      constraints,
+    - \\ref update declares constraints created by the client. They are
+      fetched in one request at the next query,
+    - \\ref invalidate must be called when constraints are created or
+      removed by other means.
+
+    \\sa hpp::corbaserver::manipulation::Problem::getNumericalConstraintDimensions
+    """
+
+    def __init__(self, problem):
+        """
+        \\param problem the hpp::corbaserver::manipulation::Problem client
+        """
+        self.problem = problem
+        # dictionary mapping constraint names to their dimensions, None if
+        # the registry is not populated.
+        self._dimensions = None
+        # names of the constraints created since last query
+        self._updated = set()
+
+    def add(self, names, dimensions, created):
+        """
+        Store the dimensions of constraints as returned by the server
+        \\param names, dimensions the names and dimensions returned by the
+               server,
+        \\param created the names of the constraints passed to the server.
+
+        The server returns the constraints whose name starts with one of
+        created. Only the constraints named "name" or "name/..." for a name
+        in created are stored: "g grasps o/h" does not store "g grasps o/h2".
+        """
+        if self._dimensions is not None:
+            self._store(names, dimensions, set(created))
+
+    def invalidate(self):
+        """
+        Clear the registry. It is populated again at the next query.
+        """
+        self._dimensions = None
+        self._updated = set()
+
+    def update(self, name):
+        """
+        Declare that the constraints "name" and "name/..." were created
+        """
+        self._updated.add(name)
+
+    @staticmethod
+    def _isCreated(name, created):
+        # whether name is "n" or "n/..." for some n in created
+        while name not in created:
+            name, sep, _ = name.rpartition("/")
+            if not sep:
+                return False
+        return True
+
+    def _store(self, names, dimensions, created):
+        self._dimensions.update(
+            (n, tuple(d))
+            for n, d in zip(names, dimensions)
+            if self._isCreated(n, created)
+        )
+
+    def _fetch(self):
+        if self._dimensions is None:
+            names, dims = self.problem.getNumericalConstraintDimensions([])
+            self._dimensions = dict(zip(names, (tuple(d) for d in dims)))
+        elif len(self._updated) > 0:
+            names, dims = self.problem.getNumericalConstraintDimensions(
+                sorted(self._updated)
+            )
+            self._store(names, dims, self._updated)
+        self._updated = set()
+        return self._dimensions
+
+    def __contains__(self, name):
+        return name in self._fetch()
+
+    def dimensions(self, name):
+        """
+        Get the dimensions of a numerical constraint
+        \\return the input size, the input derivative size, the output size
+                and the output derivative size.
+        """
+        return self._fetch()[name]
+
+
 class ConstraintFactory(ConstraintFactoryAbstract):
     """
     Default implementation of ConstraintFactoryAbstract
@@ -548,8 +1212,7 @@ class ConstraintFactory(ConstraintFactoryAbstract):
             return [
                 n
                 for n in constraints
-                if n in problem.getAvailable("numericalconstraint")
-                and problem.getConstraintDimensions(n)[2] > 0
+                if n in self.registry and self.registry.dimensions(n)[2] > 0
             ]
         else:
             return constraints
@@ -560,26 +1223,62 @@ class ConstraintFactory(ConstraintFactoryAbstract):
     def __init__(self, graphfactory, graph):
         super().__init__(graphfactory)
         self.graph = graph
+        # names and dimensions of the numerical constraints of the problem
+        self.registry = ConstraintRegistry(graph.client.problem)
+
+    def createConstraints(self, grasps, objects):
+        """
+        Create the constraints of several grasps and placements
+
+        \\param grasps list of pairs (gripper index, handle index)
+        \\param objects list of object indices
+
+        Calls ConstraintGraph.createGrasps and Problem.createPlacements so
+        that the constraints are created in two requests. The returned names
+        and dimensions are stored in \\ref registry. Objects without contact
+        surfaces are left to \\ref buildPlacement.
+        """
+        gf = self.graphfactory
+        if len(grasps) > 0:
+            grippers = [gf.grippers[ig] for ig, ih in grasps]
+            handles = [gf.handles[ih] for ig, ih in grasps]
+            names = [g + " grasps " + h for g, h in zip(grippers, handles)]
+            preNames = [g + " pregrasps " + h for g, h in zip(grippers, handles)]
+            self.registry.add(
+                *self.graph.createGrasps(names, grippers, handles, preNames),
+                names + preNames,
+            )
+        if len(gf.envContacts) == 0:
+            return
+        objects = [io for io in objects if len(gf.contactsPerObjects[io]) > 0]
+        if len(objects) > 0:
+            names = ["place_" + gf.objects[io] for io in objects]
+            preNames = ["preplace_" + gf.objects[io] for io in objects]
+            self.registry.add(
+                *self.graph.client.problem.createPlacements(
+                    names,
+                    preNames,
+                    [gf.contactsPerObjects[io] for io in objects],
+                    gf.envContacts,
+                    [gf.getPreplacementDistance(gf.objects[io]) for io in objects],
+                ),
+                names + preNames,
+            )
 
     def buildGrasp(self, g, h):
         """
-        Calls ConstraintGraph.createGraph and ConstraintGraph.createPreGrasp
+        Calls ConstraintGraph.createGrasps to create the grasp and pre-grasp
+        constraints and get their dimensions in one request
         \\param g gripper string
         \\param h handle  string
         \note if the grasp constraint already exists, it is not created.
         """
         n = g + " grasps " + h
         pn = g + " pregrasps " + h
-        graspAlreadyCreated = n in self.graph.clientBasic.problem.getAvailable(
-            "numericalconstraint"
-        )
-        pregraspAlreadyCreated = pn in self.graph.clientBasic.problem.getAvailable(
-            "numericalconstraint"
-        )
-        if not graspAlreadyCreated:
-            self.graph.createGrasp(n, g, h)
-        if not pregraspAlreadyCreated:
-            self.graph.createPreGrasp(pn, g, h)
+        if n not in self.registry or pn not in self.registry:
+            # creates the missing constraints and returns their dimensions in
+            # one request
+            self.registry.add(*self.graph.createGrasps([n], [g], [h], [pn]), [n, pn])
         return dict(
             list(
                 zip(
@@ -626,9 +1325,8 @@ class ConstraintFactory(ConstraintFactoryAbstract):
         # Get distance of object to surface in preplacement
         distance = self.graphfactory.getPreplacementDistance(o)
         io = self.graphfactory.objects.index(o)
-        placeAlreadyCreated = n in self.graph.clientBasic.problem.getAvailable(
-            "numericalconstraint"
-        )
+        placeAlreadyCreated = n in self.registry
+        preplaceAlreadyCreated = pn in self.registry
         if (
             len(self.graphfactory.contactsPerObjects[io]) == 0
             or len(self.graphfactory.envContacts) == 0
@@ -639,6 +1337,7 @@ class ConstraintFactory(ConstraintFactoryAbstract):
                     ljs.append(n)
                     q = self.graph.clientBasic.robot.getJointConfig(n)
                     self.graph.clientBasic.problem.createLockedJoint(n, n, q)
+                    self.registry.update(n)
             return dict(
                 list(
                     zip(
@@ -657,13 +1356,15 @@ class ConstraintFactory(ConstraintFactoryAbstract):
                 self.graphfactory.contactsPerObjects[io],
                 self.graphfactory.envContacts,
             )
-        if pn not in self.graph.clientBasic.problem.getAvailable("numericalconstraint"):
+            self.registry.update(n)
+        if not preplaceAlreadyCreated:
             self.graph.client.problem.createPrePlacementConstraint(
                 pn,
                 self.graphfactory.contactsPerObjects[io],
                 self.graphfactory.envContacts,
                 distance,
             )
+            self.registry.update(pn)
         return dict(
             list(
                 zip(
@@ -760,6 +1461,148 @@ class ConstraintGraphFactory(GraphFactoryAbstract):
         # intersec to preplace
         self.preplaceGuide = False
 
+        # names of the edges constrained by the foliation of a state, indexed
+        # by the state name, names of the waypoint states and arguments of
+        # _makeLevelSetEdges for the transitions created without level set
+        # edges, indexed by their names. Used by addObjectToStates.
+        self._foliationEdges = defaultdict(list)
+        self._waypointStates = list()
+        self._withoutLevelSetEdges = dict()
+
+    def generate(self, processes=1, lazy=False):
+        """
+        Go through the combinatorial defined by the grippers and handles
+        and create the states and transitions.
+
+        \\param processes, lazy see GraphFactoryAbstract.generate
+
+        The constraints of the placements and of the grasps allowed alone
+        are created beforehand (see ConstraintFactory.createConstraints).
+        The graph building operations are sent to the server in one request
+        (see ConstraintGraph.beginBatch).
+        """
+        nG = len(self.grippers)
+        self.constraints.createConstraints(
+            [
+                (ig, ih)
+                for ig in range(nG)
+                for ih in range(len(self.handles))
+                if self.graspIsAllowed(
+                    tuple(ih if i == ig else None for i in range(nG))
+                )
+            ],
+            range(len(self.objects)),
+        )
+        self._build(super().generate, processes, lazy)
+
+    def expand(self, grasps):
+        """
+        Create the states and transitions around a set of grasps
+
+        \\param grasps a handle index (or None) for each gripper.
+        \\sa GraphFactoryAbstract.expand
+        \\note ConstraintGraph.initialize must be called afterwards.
+        """
+        self._build(super().expand, grasps)
+
+    def expandReached(self):
+        """
+        Expand the states that contain nodes of the roadmap
+
+        In lazy mode, the roadmap is polled in one request with
+        hpp::corbaserver::manipulation::Graph::getFrequenciesOfNodesInRoadmap
+        for the states that have not been expanded yet.
+        \\return the number of expanded states.
+        \\note ConstraintGraph.initialize must be called afterwards.
+        """
+        if self._expanded is None:
+            return 0
+        pending = [code for code in self.states if code not in self._expanded]
+        if len(pending) == 0:
+            return 0
+        frequencies = self.graph.graph.getFrequenciesOfNodesInRoadmap(
+            [self.states[code].id for code in pending]
+        )
+        reached = [code for code, f in zip(pending, frequencies) if f > 0]
+
+        def expandAll():
+            for code in reached:
+                self._expand(code)
+
+        self._build(expandAll)
+        return len(reached)
+
+    def addGripper(self, gripper, possibleGrasps=dict()):
+        """
+        Add a gripper to the generated graph
+
+        \\param gripper name of a gripper of the robot,
+        \\param possibleGrasps see GraphFactoryAbstract.addObject.
+        \\sa GraphFactoryAbstract.addGripper
+
+        The graph is initialized afterwards.
+        """
+        self._build(super().addGripper, gripper, possibleGrasps)
+        self.graph.initialize()
+
+    def addObject(self, object, handles, contacts, possibleGrasps=dict()):
+        """
+        Add an object to the generated graph
+
+        \\param object, handles, contacts the name of an object of the robot
+               and the names of its handles and contacts,
+        \\param possibleGrasps see GraphFactoryAbstract.addObject.
+        \\sa GraphFactoryAbstract.addObject
+
+        The graph is initialized afterwards.
+        """
+        self._build(super().addObject, object, handles, contacts, possibleGrasps)
+        self.graph.initialize()
+
+    def _build(self, method, *args):
+        """
+        Call method, sending the graph building operations in one request
+
+        If method or the request fails, the states and transitions of the
+        factory are restored, see \\ref _saveState.
+        """
+        saved = self._saveState()
+        self.graph.beginBatch()
+        try:
+            try:
+                method(*args)
+            except BaseException:
+                self.graph.endBatch(commit=False)
+                raise
+            self.graph.endBatch()
+        except BaseException:
+            self._restoreState(saved)
+            raise
+        for state in self.states.values():
+            state.id = self.graph.nodes[state.name]
+
+    def _saveState(self):
+        saved = super()._saveState()
+        saved["_foliationEdges"] = defaultdict(
+            list, ((n, list(edges)) for n, edges in self._foliationEdges.items())
+        )
+        saved["_waypointStates"] = list(self._waypointStates)
+        saved["_withoutLevelSetEdges"] = dict(self._withoutLevelSetEdges)
+        # constraints of the states, modified by addObjectToStates
+        saved["manifolds"] = [
+            (state, state.manifold, state.foliation) for state in self.states.values()
+        ]
+        return saved
+
+    def _restoreState(self, saved):
+        super()._restoreState(saved)
+        self._foliationEdges = saved["_foliationEdges"]
+        self._waypointStates = saved["_waypointStates"]
+        self._withoutLevelSetEdges = saved["_withoutLevelSetEdges"]
+        for state, manifold, foliation in saved["manifolds"]:
+            state.manifold = manifold
+            state.foliation = foliation
+
     # # \name Default functions
     # \{
 
@@ -777,6 +1620,7 @@ class ConstraintGraphFactory(GraphFactoryAbstract):
         n = self._loopTransitionName(state.grasps)
         self.graph.createEdge(state.name, state.name, n, weight=0, isInNode=state.name)
         self.graph.addConstraints(edge=n, constraints=state.foliation)
+        self._foliationEdges[state.name].append(n)
 
     def makeTransition(self, stateFrom, stateTo, ig):
         """
@@ -850,6 +1694,16 @@ class ConstraintGraphFactory(GraphFactoryAbstract):
         ):
             crossedFoliation = True
 
+        # The waypoint edges are in the state that comes last in depth first
+        # order of the sets of grasps, in which grasps are added by increasing
+        # gripper index: stateTo if no gripper of index greater than ig holds
+        # a handle in stateFrom, stateFrom otherwise. This does not depend on
+        # the order in which the states are created.
+        if all(h is None for h in sf.grasps[ig + 1 :]):
+            isInNode = st.name
+        else:
+            isInNode = sf.name
+
         def _createWaypointState(name, constraints):
             self.graph.createNode(name, True)
             self.graph.addConstraints(node=name, constraints=constraints)
@@ -878,91 +1732,27 @@ class ConstraintGraphFactory(GraphFactoryAbstract):
         # transitions = names[:]
         if nWaypoints > 0:
             self.graph.createWaypointEdge(
-                sf.name, st.name, names[0], nWaypoints, automaticBuilder=False
+                sf.name,
+                st.name,
+                names[0],
+                nWaypoints,
+                isInNode=isInNode,
+                automaticBuilder=False,
             )
             self.graph.createWaypointEdge(
-                st.name, sf.name, names[1], nWaypoints, automaticBuilder=False
+                st.name,
+                sf.name,
+                names[1],
+                nWaypoints,
+                isInNode=isInNode,
+                automaticBuilder=False,
             )
-            if crossedFoliation:
-                self.graph.createWaypointEdge(
-                    sf.name,
-                    st.name,
-                    names[0] + "_ls",
-                    nWaypoints,
-                    10,
-                    automaticBuilder=False,
-                )
-                if not noPlace:
-                    # If object is already grasped, the backward waypoint edge
-                    # with levelset edge is useless
-                    self.graph.createWaypointEdge(
-                        st.name,
-                        sf.name,
-                        names[1] + "_ls",
-                        nWaypoints,
-                        10,
-                        automaticBuilder=False,
-                    )
             wTransitions = []
             for i in range(nTransitions):
                 nf = f"{names[0]}_{i}{i + 1}"
                 nb = f"{names[1]}_{i + 1}{i}"
                 self.graph.createEdge(wStates[i], wStates[i + 1], nf, -1)
                 self.graph.createEdge(wStates[i + 1], wStates[i], nb, -1)
-                if crossedFoliation:
-                    nf_ls = nf
-                    nb_ls = nb
-                    # Add LevelSetEdges
-                    if i == 0:
-                        edgeName = nf_ls = nf + "_ls"
-                        # containing state is always start state
-                        containingState = sf.name
-                        self.graph.createLevelSetEdge(
-                            wStates[i], wStates[i + 1], edgeName, -1, containingState
-                        )
-                        paramNC = (st.foliation - sf.foliation).numConstraints
-                        condNC = (st.manifold - sf.manifold).numConstraints
-                        self.graph.addLevelSetFoliation(
-                            edgeName, condNC=condNC, paramNC=paramNC
-                        )
-                        self.graph.addConstraints(
-                            edge=edgeName, constraints=sf.foliation
-                        )
-                    if i == nTransitions - 1 and crossedFoliation:
-                        edgeName = nb_ls = nb + "_ls"
-                        # containing state is goal state if an object in
-                        # placement is grasped, start state otherwise.
-                        if not noPlace:
-                            containingState = st.name
-                            self.graph.createLevelSetEdge(
-                                wStates[i + 1],
-                                wStates[i],
-                                edgeName,
-                                -1,
-                                containingState,
-                            )
-                            pNC = (sf.foliation - st.foliation).numConstraints
-                            cNC = sf.manifold.numConstraints
-                            self.graph.addLevelSetFoliation(
-                                edgeName, condNC=cNC, paramNC=pNC
-                            )
-                            self.graph.addConstraints(
-                                edge=edgeName, constraints=st.foliation
-                            )
-                    self.graph.graph.setWaypoint(
-                        self.graph.edges[names[0] + "_ls"],
-                        i,
-                        self.graph.edges[nf_ls],
-                        self.graph.nodes[wStates[i + 1]],
-                    )
-                    if not noPlace:
-                        self.graph.graph.setWaypoint(
-                            self.graph.edges[names[1] + "_ls"],
-                            nTransitions - 1 - i,
-                            self.graph.edges[nb_ls],
-                            self.graph.nodes[wStates[i]],
-                        )
-
                 self.graph.graph.setWaypoint(
                     self.graph.edges[names[0]],
                     i,
@@ -976,10 +1766,18 @@ class ConstraintGraphFactory(GraphFactoryAbstract):
                     self.graph.nodes[wStates[i]],
                 )
                 wTransitions.append((nf, nb))
+            if crossedFoliation:
+                self._makeLevelSetEdges(sf, st, names, wStates, noPlace, isInNode)
+            else:
+                # created by addObjectToStates if both foliations become non
+                # empty
+                self._withoutLevelSetEdges[names] = (sf, st, wStates, noPlace, isInNode)
 
             # Set states
             M = 0 if gc.empty() else 1 + pregrasp
+            self._waypointStates.extend(wStates[1:-1])
             for i in range(M):
+                self._foliationEdges[sf.name].extend(wTransitions[i])
                 self.graph.setContainingNode(wTransitions[i][0], sf.name)
                 self.graph.addConstraints(
                     edge=wTransitions[i][0], constraints=sf.foliation
@@ -989,6 +1787,7 @@ class ConstraintGraphFactory(GraphFactoryAbstract):
                     edge=wTransitions[i][1], constraints=sf.foliation
                 )
             for i in range(M, nTransitions):
+                self._foliationEdges[st.name].extend(wTransitions[i])
                 self.graph.setContainingNode(wTransitions[i][0], st.name)
                 self.graph.addConstraints(
                     edge=wTransitions[i][0], constraints=st.foliation
@@ -1024,6 +1823,120 @@ class ConstraintGraphFactory(GraphFactoryAbstract):
 
         self.transitions.add(names)
 
+    def _makeLevelSetEdges(self, sf, st, names, wStates, noPlace, isInNode):
+        """
+        Create the waypoint edges of a transition that cross the foliations
+
+        \\param sf, st the states linked by the transition,
+        \\param names the names of the forward and backward waypoint edges,
+        \\param wStates the names of the states and waypoint states along the
+               transition,
+        \\param noPlace whether the grasped object is already grasped in sf,
+        \\param isInNode the containing state of the waypoint edges.
+        """
+        nWaypoints = len(wStates) - 2
+        nTransitions = nWaypoints + 1
+        self.graph.createWaypointEdge(
+            sf.name,
+            st.name,
+            names[0] + "_ls",
+            nWaypoints,
+            10,
+            isInNode,
+            automaticBuilder=False,
+        )
+        if not noPlace:
+            # If object is already grasped, the backward waypoint edge
+            # with levelset edge is useless
+            self.graph.createWaypointEdge(
+                st.name,
+                sf.name,
+                names[1] + "_ls",
+                nWaypoints,
+                10,
+                isInNode,
+                automaticBuilder=False,
+            )
+        for i in range(nTransitions):
+            nf = f"{names[0]}_{i}{i + 1}"
+            nb = f"{names[1]}_{i + 1}{i}"
+            nf_ls = nf
+            nb_ls = nb
+            # Add LevelSetEdges
+            if i == 0:
+                edgeName = nf_ls = nf + "_ls"
+                # containing state is always start state
+                containingState = sf.name
+                self.graph.createLevelSetEdge(
+                    wStates[i], wStates[i + 1], edgeName, -1, containingState
+                )
+                paramNC = (st.foliation - sf.foliation).numConstraints
+                condNC = (st.manifold - sf.manifold).numConstraints
+                self.graph.addLevelSetFoliation(
+                    edgeName, condNC=condNC, paramNC=paramNC
+                )
+                self.graph.addConstraints(edge=edgeName, constraints=sf.foliation)
+                self._foliationEdges[sf.name].append(edgeName)
+            if i == nTransitions - 1:
+                edgeName = nb_ls = nb + "_ls"
+                # containing state is goal state if an object in
+                # placement is grasped, start state otherwise.
+                if not noPlace:
+                    containingState = st.name
+                    self.graph.createLevelSetEdge(
+                        wStates[i + 1],
+                        wStates[i],
+                        edgeName,
+                        -1,
+                        containingState,
+                    )
+                    pNC = (sf.foliation - st.foliation).numConstraints
+                    cNC = sf.manifold.numConstraints
+                    self.graph.addLevelSetFoliation(edgeName, condNC=cNC, paramNC=pNC)
+                    self.graph.addConstraints(edge=edgeName, constraints=st.foliation)
+                    self._foliationEdges[st.name].append(edgeName)
+            self.graph.graph.setWaypoint(
+                self.graph.edges[names[0] + "_ls"],
+                i,
+                self.graph.edges[nf_ls],
+                self.graph.nodes[wStates[i + 1]],
+            )
+            if not noPlace:
+                self.graph.graph.setWaypoint(
+                    self.graph.edges[names[1] + "_ls"],
+                    nTransitions - 1 - i,
+                    self.graph.edges[nb_ls],
+                    self.graph.nodes[wStates[i]],
+                )
+
+    def addObjectToStates(self, io, states):
+        """
+        Add the placement of a new object to existing states
+
+        The placement is added to the states and to the waypoint states, the
+        placement complement to the edges constrained by the foliation of
+        the states. The transitions that now cross the foliations of the
+        states they link get their level set edges.
+        """
+        pc = self.constraints.p(io, "placement")
+        pcc = self.constraints.p(io, "placementComplement")
+        for state in states:
+            state.manifold += pc
+            state.foliation += pcc
+            self.graph.addConstraints(node=state.name, constraints=pc)
+            for edge in self._foliationEdges[state.name]:
+                self.graph.addConstraints(edge=edge, constraints=pcc)
+        for name in self._waypointStates:
+            self.graph.addConstraints(node=name, constraints=pc)
+        for names, args in list(self._withoutLevelSetEdges.items()):
+            sf, st, wStates, noPlace, isInNode = args
+            if (
+                len(sf.foliation.numConstraints) > 0
+                and len(st.foliation.numConstraints) > 0
+            ):
+                del self._withoutLevelSetEdges[names]
+                self._makeLevelSetEdges(sf, st, names, wStates, noPlace, isInNode)
+
     # # \}
 
     # # \name Tuning the constraints
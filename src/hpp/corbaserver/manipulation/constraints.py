@@ -29,6 +29,21 @@
 # DAMAGE.
 
 
+from weakref import WeakValueDictionary
+
+
+def _names(mask):
+    """
+    Names of the constraints whose identifiers are the bits of mask
+    """
+    res = []
+    while mask:
+        low = mask & -mask
+        res.append(Constraints._names[low.bit_length() - 1])
+        mask ^= low
+    return tuple(res)
+
+
 class Constraints:
     """
     Container of numerical constraints
@@ -37,9 +52,37 @@ class Constraints:
     \\li grasp,
     \\li pregrasp, or
     \\li numerical constraint,
+
+    Instances are immutable: <c>a += b</c> binds <c>a</c> to
+    <c>a + b</c>. Constraint names are given an integer identifier and
+    each category is stored as a bit set. Instances containing the same
+    constraints are the same object. The names are returned as tuples,
+    decoded once per instance.
+
+    The identifiers are shared by all the instances of the process and are
+    never reused: the tables grow with the number of distinct constraint
+    names. When several problems are built in the same process, call
+    \\ref clearNames between them, once the instances (and the factories
+    storing them) are deleted.
     """
 
-    def __init__(self, grasps=[], pregrasps=[], numConstraints=[], lockedJoints=[]):
+    __slots__ = (
+        "__weakref__",
+        "_grasps",
+        "_hash",
+        "_lists",
+        "_numConstraints",
+        "_pregrasps",
+    )
+
+    # identifiers of the constraint names and names of the identifiers, for
+    # the lifetime of the process or until clearNames is called.
+    _ids = dict()
+    _names = list()
+    # instances indexed by their bit sets
+    _instances = WeakValueDictionary()
+
+    def __new__(cls, grasps=[], pregrasps=[], numConstraints=[], lockedJoints=[]):
         if isinstance(grasps, str):
             raise TypeError("argument grasps should be a list of strings")
         if isinstance(pregrasps, str):
@@ -55,66 +98,114 @@ class Constraints:
                 + "is deprecated. Locked joints are handled as numerical "
                 + "constraints."
             )
-            numConstraints.extend(lockedJoints)
-        self._grasps = set(grasps)
-        self._pregrasps = set(pregrasps)
-        self._numConstraints = set(numConstraints)
+            numConstraints = list(numConstraints) + list(lockedJoints)
+        return cls._get(
+            cls._mask(grasps), cls._mask(pregrasps), cls._mask(numConstraints)
+        )
+
+    @classmethod
+    def clearNames(cls):
+        """
+        Forget the identifiers of the constraint names
+
+        \\note Raises RuntimeError if a non empty instance is still alive,
+              since its bit sets refer to the identifiers.
+        """
+        alive = sum(key != (0, 0, 0) for key in cls._instances.keys())
+        if alive > 0:
+            raise RuntimeError(f"{alive} instances of Constraints are still alive.")
+        cls._ids.clear()
+        cls._names.clear()
+
+    @classmethod
+    def _mask(cls, names):
+        mask = 0
+        for n in names:
+            id = cls._ids.get(n)
+            if id is None:
+                id = cls._ids[n] = len(cls._names)
+                cls._names.append(n)
+            mask |= 1 << id
+        return mask
+
+    @classmethod
+    def _get(cls, grasps, pregrasps, numConstraints):
+        """
+        Get the instance of given bit sets, creating it if needed
+        """
+        key = (grasps, pregrasps, numConstraints)
+        res = cls._instances.get(key)
+        if res is None:
+            res = object.__new__(cls)
+            res._grasps, res._pregrasps, res._numConstraints = key
+            res._hash = hash(key)
+            res._lists = None
+            cls._instances[key] = res
+        return res
 
     def __add__(self, other):
-        res = Constraints(
-            grasps=self._grasps | other._grasps,
-            pregrasps=self._pregrasps | other._pregrasps,
-            numConstraints=self._numConstraints | other._numConstraints,
+        return Constraints._get(
+            self._grasps | other._grasps,
+            self._pregrasps | other._pregrasps,
+            self._numConstraints | other._numConstraints,
         )
-        return res
 
     def __sub__(self, other):
-        res = Constraints(
-            grasps=self._grasps - other._grasps,
-            pregrasps=self._pregrasps - other._pregrasps,
-            numConstraints=self._numConstraints - other._numConstraints,
+        return Constraints._get(
+            self._grasps & ~other._grasps,
+            self._pregrasps & ~other._pregrasps,
+            self._numConstraints & ~other._numConstraints,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Constraints):
+            return NotImplemented
+        return (
+            self._grasps == other._grasps
+            and self._pregrasps == other._pregrasps
+            and self._numConstraints == other._numConstraints
         )
-        return res
 
-    def __iadd__(self, other):
-        self._grasps |= other._grasps
-        self._pregrasps |= other._pregrasps
-        self._numConstraints |= other._numConstraints
-        return self
+    def __hash__(self):
+        return self._hash
 
-    def __isub__(self, other):
-        self._grasps -= other._grasps
-        self._pregrasps -= other._pregrasps
-        self._numConstraints -= other._numConstraints
-        return self
+    def __reduce__(self):
+        return (Constraints, (self.grasps, self.pregrasps, self.numConstraints))
 
     def empty(self):
-        for s in [self._grasps, self._pregrasps, self._numConstraints]:
-            if len(s) > 0:
-                return False
-        return True
+        return (self._grasps | self._pregrasps | self._numConstraints) == 0
+
+    def _decode(self):
+        if self._lists is None:
+            self._lists = (
+                _names(self._grasps),
+                _names(self._pregrasps),
+                _names(self._numConstraints),
+            )
+        return self._lists
 
     @property
     def grasps(self):
-        return list(self._grasps)
+        return self._decode()[0]
 
     @property
     def pregrasps(self):
-        return list(self._pregrasps)
+        return self._decode()[1]
 
     @property
     def numConstraints(self):
-        return list(self._numConstraints)
+        return self._decode()[2]
 
     def __str__(self):
+        grasps, pregrasps, numConstraints = self._decode()
         res = "constraints\n"
         res += "  grasps: "
-        for c in self._grasps:
+        for c in grasps:
             res += c + ", "
         res += "\n  pregrasps: "
-        for c in self._pregrasps:
+        for c in pregrasps:
             res += c + ", "
         res += "\n  numConstraints: "
-        for c in self._numConstraints:
+        for c in numConstraints:
             res += c + ", "
         return res
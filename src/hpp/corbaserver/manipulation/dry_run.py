@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2026 CNRS
+#
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+
+import time
+from collections import Counter
+
+from .constraint_graph import ConstraintGraph
+from .mock_server import MockServer
+
+
+class DryRunGraph(ConstraintGraph):
+    """
+    Constraint graph built without server
+
+    An instance can be given to ConstraintGraphFactory in place of a
+    ConstraintGraph. The graph building requests are handled in-process
+    by a minimal model of the server which counts the graph components,
+    the numerical constraints and the requests. It makes it possible to
+    evaluate the size of the graph produced by a set of rules before
+    building it.
+
+    The minimal usage is the following:
+    >>> graph = DryRunGraph()
+    >>> factory = ConstraintGraphFactory(graph)
+    >>> factory.setGrippers(["gripper1", ... ])
+    >>> factory.setObjects(["object1", ], [ [ "object1/handle1", ... ] ], [ [] ])
+    >>> factory.setRules([ Rule(["gripper1", ..], ["handle1", ...], True), ... ])
+    >>> report = dryRun(factory)
+
+    \\note The dimensions of the constraints are not computed. Grasps are
+    assumed to constrain 6 degrees of freedom, unless specified otherwise,
+    and placements 3 degrees of freedom.
+    """
+
+    def __init__(self, graphName="graph", handleDimensions=dict(), jointNames=()):
+        """
+        \\param graphName name of the graph,
+        \\param handleDimensions dictionary mapping handle names to the number
+               of degrees of freedom constrained by their grasps (6 by
+               default),
+        \\param jointNames names of the joints of the robot. The joints of
+               objects without contact surfaces are locked in placement.
+        """
+        self.server = MockServer(handleDimensions, jointNames)
+        super().__init__(self.server.robot, graphName)
+
+    def report(self):
+        """
+        Return a dictionary with the following keys:
+        \\li "states", "waypointStates": the number of states and waypoint states,
+        \\li "edges", "waypointEdges", "levelSetEdges": the number of edges of
+            each type,
+        \\li "constraints": the number of numerical constraints created,
+        \\li "constraintReferences": the number of numerical constraints
+            attached to graph components,
+        \\li "operations": the number of graph building operations,
+        \\li "rpcs": the number of requests to the server,
+        \\li "rpcsPerMethod": the number of requests per method.
+        """
+        kinds = Counter(self.server.kinds.values())
+        res = dict(
+            (k, kinds[k])
+            for k in (
+                "states",
+                "waypointStates",
+                "edges",
+                "waypointEdges",
+                "levelSetEdges",
+            )
+        )
+        res["constraints"] = len(self.server.constraints)
+        res["constraintReferences"] = self.server.constraintReferences
+        res["operations"] = self.server.operations
+        res["rpcs"] = sum(self.server.rpcs.values())
+        res["rpcsPerMethod"] = dict(self.server.rpcs)
+        return res
+
+
+def dryRun(factory):
+    """
+    Generate the graph of a factory built on a DryRunGraph instance
+
+    \\param factory a ConstraintGraphFactory instance, the graph of which is
+           a DryRunGraph.
+    \\return the report of the graph (see DryRunGraph.report) with the
+            generation time in seconds under key "time".
+    """
+    if not isinstance(factory.graph, DryRunGraph):
+        raise TypeError("factory.graph should be of type DryRunGraph")
+    start = time.perf_counter()
+    factory.generate()
+    res = factory.graph.report()
+    res["time"] = time.perf_counter() - start
+    return res
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2026 CNRS
+#
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+
+import hashlib
+import json
+import os
+
+from .constraint_graph_factory import Rules
+from .possible_grasps import PossibleGrasps
+
+
+def _jsonDefault(o):
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    raise TypeError(f"Object of type {type(o).__name__} cannot be hashed")
+
+
+class GraphCache:
+    """
+    On-disk cache of the constraint graphs built by ConstraintGraphFactory
+
+    A graph is stored in a file the name of which is a hash of the inputs
+    of the factory (grippers, handles, objects, contact surfaces, grasp
+    validations, preplacement distances) and of the robot model (joints,
+    configuration size, gripper and handle positions, handle masks, gripper
+    and handle clearances, polygons of the contact surfaces, configuration
+    of the objects locked in placement). It is saved and restored by the server with
+    hpp::corbaserver::manipulation::Graph::saveGraph and
+    hpp::corbaserver::manipulation::Graph::loadGraph. Restoring a graph thus
+    takes a single load request instead of building the numerical constraints, the
+    states and the transitions.
+
+    The minimal usage is the following:
+    >>> factory = ConstraintGraphFactory(graph)
+    >>> factory.setGrippers(["gripper1", ... ])
+    >>> factory.setObjects(["object1", ], [ [ "object1/handle1", ... ] ], [ [] ])
+    >>> margins = SecurityMargins(ps, factory, ["robot", "object1"])
+    >>> margins.setSecurityMarginBetween("robot", "object1", 0.02)
+    >>> cache = GraphCache("/tmp/graphs", securityMargins=margins)
+    >>> cache.generate(factory)
+    >>> graph.initialize()
+
+    \\note The files are written and read by the server: the directory
+    should be accessible by the server under the same path.
+    \\note After restoring a graph, only the ConstraintGraph instance is
+    up to date. The states and transitions of the factory are not.
+    \\note The grasp validations other than Rules and PossibleGrasps are
+    hashed from their attributes. Functions and objects without attributes
+    cannot be told apart: \\ref key raises TypeError for them.
+    """
+
+    # Increase when the content of the key or of the files changes.
+    version = 3
+
+    def __init__(self, directory, extra=None, securityMargins=None):
+        """
+        \\param directory directory where the graphs are stored,
+        \\param extra object convertible to JSON added to the key. It should
+               describe the other modifications of the graph made after
+               generation,
+        \\param securityMargins a SecurityMargins instance applied by
+               \\ref generate. Its margins are part of the key.
+        """
+        self.directory = directory
+        self.extra = extra
+        self.securityMargins = securityMargins
+
+    def key(self, factory):
+        """
+        Return the hash of the inputs of a factory and of the robot model
+        \\param factory a ConstraintGraphFactory instance the inputs of which
+               are set.
+        \\note Raises TypeError if a grasp validation cannot be hashed.
+        """
+        validations = getattr(factory.graspIsAllowed, "graspValidations_", None)
+        if validations is None:
+            raise TypeError(
+                "factory.graspIsAllowed should be a GraspIsAllowed instance"
+            )
+        inputs = dict(
+            version=self.version,
+            factory=type(factory).__module__ + "." + type(factory).__qualname__,
+            graph=factory.graph.name,
+            grippers=factory.grippers,
+            objects=factory.objects,
+            handlesPerObjects=[
+                [factory.handles[ih] for ih in handles]
+                for handles in factory.handlesPerObjects
+            ],
+            contactsPerObjects=factory.contactsPerObjects,
+            envContacts=factory.envContacts,
+            graspValidations=[self._validation(v) for v in validations],
+            preplaceDistances=[
+                factory.getPreplacementDistance(o) for o in factory.objects
+            ],
+            preplaceGuide=factory.preplaceGuide,
+            robot=self._robot(factory),
+            contacts=self._contacts(factory),
+            securityMargins=self._securityMargins(),
+            extra=self.extra,
+        )
+        data = json.dumps(inputs, sort_keys=True, default=_jsonDefault)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def filename(self, factory):
+        """Return the name of the file storing the graph of a factory"""
+        return os.path.join(self.directory, self.key(factory) + ".graph")
+
+    def load(self, factory):
+        """
+        Restore the graph of a factory if it is in the cache
+
+        \\return whether the graph has been restored.
+        The graph of the server is replaced by the stored graph and the IDs
+        of factory.graph are updated.
+        """
+        filename = self.filename(factory)
+        if not os.path.isfile(filename):
+            return False
+        factory.graph.loadGraph(filename)
+        return True
+
+    def save(self, factory):
+        """
+        Store the current graph of the server for the inputs of a factory
+        """
+        filename = self.filename(factory)
+        os.makedirs(self.directory, exist_ok=True)
+        # Write in a temporary file so that concurrent processes do not
+        # read incomplete files.
+        tmp = f"{filename}.{os.getpid()}"
+        factory.graph.saveGraph(tmp)
+        os.replace(tmp, filename)
+
+    def generate(self, factory, processes=1):
+        """
+        Restore the graph of a factory or generate and store it
+
+        \\param processes see ConstraintGraphFactory.generate
+        \\return whether the graph has been restored.
+        The security margins are applied to a generated graph before it is
+        stored.
+        """
+        if self.load(factory):
+            return True
+        factory.generate(processes)
+        if self.securityMargins is not None:
+            self.securityMargins.apply()
+        self.save(factory)
+        return False
+
+    def clear(self):
+        """Remove all the stored graphs"""
+        if not os.path.isdir(self.directory):
+            return
+        for f in os.listdir(self.directory):
+            if f.endswith(".graph"):
+                os.remove(os.path.join(self.directory, f))
+
+    @staticmethod
+    def _validation(v):
+        if isinstance(v, Rules):
+            return dict(
+                type="Rules",
+                handles=v.handles,
+                rules=v.rules,
+                status=v.status,
+                defaultAcceptation=v.defaultAcceptation,
+            )
+        if isinstance(v, PossibleGrasps):
+            return dict(type="PossibleGrasps", possibleGrasps=v.possibleGrasps)
+        # Other validations are hashed from their attributes. Functions have
+        # none.
+        state = getattr(v, "__dict__", None)
+        if not state:
+            raise TypeError(
+                f"Grasp validation {v!r} cannot be hashed: it has no attributes"
+            )
+        return dict(type=type(v).__module__ + "." + type(v).__qualname__, **state)
+
+    def _securityMargins(self):
+        margins = self.securityMargins
+        if margins is None:
+            return None
+        return dict(
+            defaultMargin=margins.defaultMargin,
+            robotsAndObjects=margins.robotsAndObjects,
+            margins=sorted(
+                [sorted(pair), margin] for pair, margin in margins.marginMatrix.items()
+            ),
+        )
+
+    @staticmethod
+    def _robot(factory):
+        robot = factory.graph.clientBasic.robot
+        manipulationRobot = factory.graph.client.robot
+        jointNames = robot.getJointNames()
+        lockedJoints = dict()
+        for io, o in enumerate(factory.objects):
+            if (
+                len(factory.contactsPerObjects[io]) == 0
+                or len(factory.envContacts) == 0
+            ):
+                for n in jointNames:
+                    if n.startswith(o + "/"):
+                        lockedJoints[n] = robot.getJointConfig(n)
+        return dict(
+            name=robot.getRobotName(),
+            configSize=robot.getConfigSize(),
+            numberDof=robot.getNumberDof(),
+            jointNames=jointNames,
+            grippers=[
+                manipulationRobot.getGripperPositionInJoint(g) for g in factory.grippers
+            ],
+            handles=[
+                manipulationRobot.getHandlePositionInJoint(h) for h in factory.handles
+            ],
+            gripperClearances=[
+                manipulationRobot.getGripperClearance(g) for g in factory.grippers
+            ],
+            handleMasks=[manipulationRobot.getHandleMask(h) for h in factory.handles],
+            lockedJoints=lockedJoints,
+        )
+
+    @staticmethod
+    def _contacts(factory):
+        # joints, numbers of vertices and vertices of the polygons of the
+        # contact surfaces
+        problem = factory.graph.client.problem
+        return dict(
+            robot=[
+                [problem.getRobotContact(c) for c in contacts]
+                for contacts in factory.contactsPerObjects
+            ],
+            environment=[problem.getEnvironmentContact(c) for c in factory.envContacts],
+        )
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2026 CNRS
+#
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+
+def payloadSize(value):
+    """
+    Estimate the size of the CDR encoding of a value, alignment excepted
+    """
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, int):
+        return 4
+    if isinstance(value, float):
+        return 8
+    if isinstance(value, str):
+        return 5 + len(value.encode())
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        # structure
+        return sum(map(payloadSize, value))
+    if hasattr(value, "__dict__"):
+        # structure, object reference or enumerated value
+        fields = [v for k, v in vars(value).items() if not k.startswith("_")]
+        return sum(map(payloadSize, fields)) if len(fields) > 0 else 4
+    try:
+        # sequence
+        return 4 + sum(map(payloadSize, value))
+    except TypeError:
+        # other scalar
+        return 8
+
+
+class _InstrumentedClient:
+    """
+    Proxy of a CORBA client that records the requests in an Instrumentation
+    """
+
+    def __init__(self, client, interface, instrumentation):
+        self._client = client
+        self._interface = interface
+        self._instrumentation = instrumentation
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        method = self._interface + "." + name
+        instrumentation = self._instrumentation
+
+        def call(*args):
+            res = None
+            start = time.perf_counter()
+            try:
+                res = attr(*args)
+                return res
+            finally:
+                instrumentation.record(
+                    method,
+                    time.perf_counter() - start,
+                    sum(map(payloadSize, args)),
+                    payloadSize(res),
+                )
+
+        # the next calls do not go through __getattr__
+        setattr(self, name, call)
+        return call
+
+
+class Instrumentation:
+    """
+    Record the number, the latency and the payload size of CORBA requests
+
+    Instrumentation is opt-in: the clients of a Client built with argument
+    \\c instrument are wrapped by proxies recording each request. Other
+    clients are left untouched and cost nothing.
+
+    >>> client = Client(instrument=True)
+    >>> ...
+    >>> print(client.instrumentation)
+    >>> with client.instrumentation.measure() as scope:
+    ...     factory.generate()
+    >>> scope.report()
+
+    \\note Payload sizes are estimated from the CDR encoding of the
+          arguments and return values, alignment excepted. The latency is
+          measured before the estimation and does not include it.
+    """
+
+    def __init__(self):
+        # latencies in seconds per method
+        self.latencies = defaultdict(list)
+        # estimated size in bytes of the arguments and of the return values
+        # per method
+        self.bytesSent = Counter()
+        self.bytesReceived = Counter()
+        self._scopes = list()
+
+    def wrap(self, client, interface):
+        """
+        Get a proxy of a CORBA client that records its requests
+
+        \\param client the CORBA client,
+        \\param interface the prefix of the method names in the report.
+        """
+        return _InstrumentedClient(client, interface, self)
+
+    def record(self, method, latency, sent, received):
+        """
+        Record a request
+        \\param method name of the method prefixed by the interface name,
+        \\param latency duration of the request in seconds,
+        \\param sent, received estimated payload sizes in bytes.
+        """
+        for i in (self, *self._scopes):
+            i.latencies[method].append(latency)
+            i.bytesSent[method] += sent
+            i.bytesReceived[method] += received
+
+    def reset(self):
+        """
+        Forget the recorded requests
+        """
+        self.latencies.clear()
+        self.bytesSent.clear()
+        self.bytesReceived.clear()
+
+    @contextmanager
+    def measure(self):
+        """
+        Record the requests of a block of code in a separate instance
+
+        \\return a context manager giving an Instrumentation instance that
+                records the requests sent in the block.
+        """
+        scope = Instrumentation()
+        self._scopes.append(scope)
+        try:
+            yield scope
+        finally:
+            self._scopes.remove(scope)
+
+    def report(self):
+        """
+        Return a dictionary mapping the method names to dictionaries with keys
+        \\li "calls": the number of requests,
+        \\li "total", "mean", "p50", "p90", "p99", "max": the cumulative,
+            mean, percentile and maximal latencies in seconds,
+        \\li "bytesSent", "bytesReceived": the estimated payload sizes.
+
+        Methods are sorted by decreasing cumulative latency.
+        """
+
+        def percentile(latencies, p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        res = dict()
+        for method, latencies in sorted(
+            self.latencies.items(), key=lambda item: -sum(item[1])
+        ):
+            latencies = sorted(latencies)
+            total = sum(latencies)
+            res[method] = dict(
+                calls=len(latencies),
+                total=total,
+                mean=total / len(latencies),
+                p50=percentile(latencies, 0.5),
+                p90=percentile(latencies, 0.9),
+                p99=percentile(latencies, 0.99),
+                max=latencies[-1],
+                bytesSent=self.bytesSent[method],
+                bytesReceived=self.bytesReceived[method],
+            )
+        return res
+
+    def __str__(self):
+        lines = [
+            f"{'method':40} {'calls':>8} {'total (s)':>10} {'p50 (ms)':>9} "
+            f"{'p99 (ms)':>9} {'sent (B)':>10} {'received (B)':>12}"
+        ]
+        for method, r in self.report().items():
+            lines.append(
+                f"{method:40} {r['calls']:8} {r['total']:10.4f} "
+                f"{1e3 * r['p50']:9.3f} {1e3 * r['p99']:9.3f} "
+                f"{r['bytesSent']:10} {r['bytesReceived']:12}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,635 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2026 CNRS
+#
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+
+from collections import Counter, defaultdict
+
+from hpp_idl.hpp.corbaserver import manipulation as _idl
+
+from .instrumentation import payloadSize
+
+
+class _Servant:
+    """
+    In-process stand-in for a CORBA client of the mock server
+
+    Each method call is counted as a request. Method "m" of interface "i"
+    is implemented by method "i_m" of the server. Calling a method without
+    implementation raises NotImplementedError. Stand-ins for remote objects
+    pass their key as first argument.
+    """
+
+    def __init__(self, server, interface, *key):
+        self._server = server
+        self._interface = interface
+        self._key = key
+
+    def __getattr__(self, name):
+        impl = getattr(self._server, self._interface + "_" + name, None)
+
+        def call(*args):
+            server = self._server
+            method = self._interface + "." + name
+            if impl is None:
+                raise NotImplementedError(method)
+            res = impl(*self._key, *args)
+            server.rpcs[method] += 1
+            server.bytesSent[method] += sum(map(payloadSize, args))
+            server.bytesReceived[method] += payloadSize(res)
+            if server.record:
+                server.calls.append((method, args, res))
+            return res
+
+        return call
+
+
+class _Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class MockServer:
+    """
+    Minimal in-process model of the manipulation server
+
+    Stands in for the graph, problem and robot interfaces of the
+    manipulation and basic servers, so that the Python layer can be run and
+    profiled without CORBA naming service nor server. It stores the graph
+    components, the names and estimated dimensions of the numerical
+    constraints, and counts the requests and the size of their payload.
+
+    The minimal usage is the following:
+    >>> server = MockServer(jointNames=["box/root_joint"])
+    >>> graph = ConstraintGraph(server.robot, "graph")
+    >>> ...
+    >>> server.rpcs, server.bytesSent, server.bytesReceived
+
+    A Client or a CorbaClient built with argument \\c server uses the mock
+    server instead of connecting to a CORBA server.
+
+    \\note The payload sizes are estimated from the CDR encoding of the
+          arguments and return values, alignment excepted.
+    """
+
+    def __init__(self, handleDimensions=dict(), jointNames=(), record=False):
+        """
+        \\param handleDimensions dictionary mapping handle names to the number
+               of degrees of freedom constrained by their grasps (6 by
+               default),
+        \\param jointNames names of the joints of the robot,
+        \\param record whether to store the calls in \\ref calls.
+        """
+        self.handleDimensions = handleDimensions
+        self.jointNames = list(jointNames)
+        # number of calls per method, prefixed by the interface name
+        self.rpcs = Counter()
+        # estimated size in bytes of the arguments and of the return values
+        # per method
+        self.bytesSent = Counter()
+        self.bytesReceived = Counter()
+        # list of (method, arguments, return value) if record is True
+        self.record = record
+        self.calls = list()
+        # names of the graph components and of the graph, indexed by ID
+        self.names = dict()
+        # kind of each graph component, indexed by ID
+        self.kinds = dict()
+        # numerical constraint names to (input size, input derivative size,
+        # output size, output derivative size)
+        self.constraints = dict()
+        # number of numerical constraints attached to graph components
+        self.constraintReferences = 0
+        # number of graph building operations
+        self.operations = 0
+        # IDs of the states linked by each edge
+        self.endpoints = dict()
+        # weight, short flag, containing state and waypoint states of each
+        # edge
+        self.edgeAttributes = dict()
+        # names of the numerical constraints of each graph component
+        self.numericalConstraints = defaultdict(list)
+        # names of the numerical constraints for path of each state
+        self.numericalConstraintsForPath = defaultdict(list)
+        # number of nodes of the roadmap in each state, 0 if absent
+        self.frequencies = dict()
+        # security margins of each edge, indexed by pairs of joint names
+        self.securityMargins = defaultdict(dict)
+        # whether Graph.initialize has been called on the current graph
+        self.initialized = False
+        # ID of the node of some configurations, as tuples. The other
+        # configurations are in no node.
+        self.configurationNodes = dict()
+        # maximal number of threads of the problem solver and number of
+        # device data of the robot
+        self.maxNumThreads = 1
+        self.numberDeviceData = 1
+        # number of threads of the last call of each multi-threaded method
+        self.threads = dict()
+        # number of paths in the ProblemSolver path vector
+        self.numberPaths = 0
+        # stand-in for a Robot instance, as expected by ConstraintGraph
+        self.robot = _Namespace(
+            name="robot",
+            client=_Namespace(
+                manipulation=_Namespace(**self.servants("manipulation")),
+                basic=_Namespace(**self.servants("basic")),
+            ),
+        )
+
+    def servants(self, server):
+        """
+        Get the stand-ins for the CORBA clients of a server
+
+        \\param server "manipulation" or "basic"
+        \\return a dictionary mapping the interface names to the stand-ins.
+        """
+        if server == "manipulation":
+            return dict(
+                graph=_Servant(self, "graph"),
+                problem=_Servant(self, "problem"),
+                robot=_Servant(self, "robot"),
+            )
+        if server == "basic":
+            return dict(
+                problem=_Servant(self, "basicProblem"),
+                robot=_Servant(self, "basicRobot"),
+                obstacle=_Servant(self, "basicObstacle"),
+            )
+        raise ValueError(f"Unknown server {server}")
+
+    def reset(self):
+        """
+        Reset the request counters and the recorded calls
+        """
+        self.rpcs.clear()
+        self.bytesSent.clear()
+        self.bytesReceived.clear()
+        self.calls = list()
+
+    def _add(self, kind, name):
+        id = len(self.kinds) + 1
+        self.kinds[id] = kind
+        self.names[id] = name
+        self.operations += 1
+        return id
+
+    def _addEdge(self, kind, name, nodeFromId, nodeToId, weight, isInNodeId, number=0):
+        id = self._add(kind, name)
+        self.endpoints[id] = (nodeFromId, nodeToId)
+        self.edgeAttributes[id] = dict(
+            weight=weight,
+            isShort=False,
+            containingNode=isInNodeId,
+            waypoints=[-1] * number,
+        )
+        return id
+
+    def _attach(self, names):
+        for n in names:
+            if n not in self.constraints:
+                raise RuntimeError(f'Numerical constraint "{n}" does not exist.')
+        self.constraintReferences += len(names)
+        self.operations += 1
+
+    def _register(self, name, size, complement=None):
+        self.constraints.setdefault(name, (7, 6, size, size))
+        if complement is not None:
+            self.constraints.setdefault(
+                name + "/complement", (7, 6, complement, complement)
+            )
+            self.constraints.setdefault(name + "/hold", (7, 6, 6, 6))
+
+    def _dimensions(self, prefixes):
+        names = [
+            n
+            for n in self.constraints
+            if len(prefixes) == 0 or any(n.startswith(p) for p in prefixes)
+        ]
+        return names, [list(self.constraints[n]) for n in names]
+
+    def _numberOfThreads(self, method, nThreads, n):
+        # as numberOfThreads in src/tools.cc
+        nt = self.maxNumThreads
+        if nThreads > 0:
+            nt = min(nt, nThreads)
+        nt = max(1, min(nt, n))
+        self.numberDeviceData = max(self.numberDeviceData, nt)
+        self.threads[method] = nt
+
+    # # \name Graph interface
+    # \{
+
+    def graph_createGraph(self, graphName):
+        # the graph replaces the previous one and its components
+        self.names = {0: graphName}
+        self.kinds.clear()
+        self.endpoints.clear()
+        self.edgeAttributes.clear()
+        self.numericalConstraints.clear()
+        self.numericalConstraintsForPath.clear()
+        self.frequencies.clear()
+        self.securityMargins.clear()
+        self.initialized = False
+        self.constraintReferences = 0
+        self.operations = 0
+        return 0
+
+    def graph_createNode(self, graphId, nodeName, waypoint, priority):
+        return self._add("waypointStates" if waypoint else "states", nodeName)
+
+    def graph_createEdge(self, nodeFromId, nodeToId, edgeName, weight, isInNodeId):
+        return self._addEdge(
+            "edges", edgeName, nodeFromId, nodeToId, weight, isInNodeId
+        )
+
+    def graph_createWaypointEdge(
+        self, nodeFromId, nodeToId, edgeName, number, weight, isInNodeId
+    ):
+        return self._addEdge(
+            "waypointEdges", edgeName, nodeFromId, nodeToId, weight, isInNodeId, number
+        )
+
+    def graph_createLevelSetEdge(
+        self, nodeFromId, nodeToId, edgeName, weight, isInNodeId
+    ):
+        return self._addEdge(
+            "levelSetEdges", edgeName, nodeFromId, nodeToId, weight, isInNodeId
+        )
+
+    def graph_setWaypoint(self, waypointEdgeId, index, edgeId, nodeId):
+        waypoints = self.edgeAttributes[waypointEdgeId]["waypoints"]
+        if index < len(waypoints):
+            waypoints[index] = nodeId
+        self.operations += 1
+
+    def graph_setContainingNode(self, edgeId, nodeId):
+        self.edgeAttributes[edgeId]["containingNode"] = nodeId
+        self.operations += 1
+
+    def graph_setShort(self, edgeId, isShort):
+        self.edgeAttributes[edgeId]["isShort"] = bool(isShort)
+        self.operations += 1
+
+    def graph_isShort(self, edgeId):
+        return self.edgeAttributes[edgeId]["isShort"]
+
+    def graph_getContainingNode(self, edgeId):
+        return self.names[self.edgeAttributes[edgeId]["containingNode"]]
+
+    def graph_getNodesConnectedByEdge(self, edgeId):
+        start, end = self.endpoints[edgeId]
+        return self.names[start], self.names[end]
+
+    def graph_getWeight(self, edgeId):
+        return self.edgeAttributes[edgeId]["weight"]
+
+    def graph_setWeight(self, edgeId, weight):
+        self.edgeAttributes[edgeId]["weight"] = weight
+
+    def graph_addNumericalConstraints(self, graphComponentId, constraintNames):
+        self._attach(constraintNames)
+        self.numericalConstraints[graphComponentId].extend(constraintNames)
+
+    def graph_addNumericalConstraintsForPath(self, nodeId, constraintNames):
+        self._attach(constraintNames)
+        self.numericalConstraintsForPath[nodeId].extend(constraintNames)
+
+    def graph_addLevelSetFoliation(self, edgeId, condNC, paramNC):
+        self._attach(list(condNC) + list(paramNC))
+
+    def graph_applyOperations(self, operations):
+        ids = list()
+
+        def ref(id):
+            return ids[-1 - id] if id < 0 else id
+
+        for op in operations:
+            i = [ref(id) for id in op.ids]
+            v = op.values
+            if op.type == _idl.CREATE_NODE:
+                ids.append(self.graph_createNode(i[0], op.name, v[0], v[1]))
+            elif op.type == _idl.CREATE_EDGE:
+                ids.append(self.graph_createEdge(i[0], i[1], op.name, v[0], i[2]))
+            elif op.type == _idl.CREATE_WAYPOINT_EDGE:
+                ids.append(
+                    self.graph_createWaypointEdge(i[0], i[1], op.name, v[0], v[1], i[2])
+                )
+            elif op.type == _idl.CREATE_LEVEL_SET_EDGE:
+                ids.append(
+                    self.graph_createLevelSetEdge(i[0], i[1], op.name, v[0], i[2])
+                )
+            else:
+                ids.append(-1)
+                if op.type == _idl.ADD_LEVEL_SET_FOLIATION:
+                    self.graph_addLevelSetFoliation(
+                        i[0], op.constraints, op.paramConstraints
+                    )
+                elif op.type == _idl.ADD_NUMERICAL_CONSTRAINTS:
+                    self.graph_addNumericalConstraints(i[0], op.constraints)
+                elif op.type == _idl.ADD_NUMERICAL_CONSTRAINTS_FOR_PATH:
+                    self.graph_addNumericalConstraintsForPath(i[0], op.constraints)
+                elif op.type == _idl.SET_WAYPOINT:
+                    self.graph_setWaypoint(i[0], v[0], i[1], i[2])
+                elif op.type == _idl.SET_CONTAINING_NODE:
+                    self.graph_setContainingNode(i[0], i[1])
+                elif op.type == _idl.SET_SHORT:
+                    self.graph_setShort(i[0], v[0])
+                else:
+                    self.operations += 1
+        return ids
+
+    def graph_initialize(self):
+        self.initialized = True
+
+    def graph_setSecurityMarginForEdge(self, edgeId, joint1, joint2, margin):
+        self.securityMargins[edgeId][joint1, joint2] = margin
+
+    def graph_getNodes(self, dofArrays, parallel):
+        n = len(dofArrays) // 2 if parallel else 1
+        self._numberOfThreads("graph.getNodes", 0, n)
+        return [self.configurationNodes.get(tuple(q), -1) for q in dofArrays]
+
+    def _projectBatch(self, method, id, inputs, nThreads):
+        # the configurations are left unchanged and the projection succeeds
+        # if they are in the node or in the target node of the edge
+        self._numberOfThreads(method, nThreads, len(inputs))
+        target = self.endpoints[id][1] if id in self.endpoints else id
+        success = [self.configurationNodes.get(tuple(q)) == target for q in inputs]
+        return [list(q) for q in inputs], [0.0] * len(inputs), success
+
+    def graph_applyNodeConstraintsBatch(self, idComp, inputs, nThreads):
+        return self._projectBatch(
+            "graph.applyNodeConstraintsBatch", idComp, inputs, nThreads
+        )
+
+    def graph_applyEdgeLeafConstraintsBatch(self, idedge, qleaf, inputs, nThreads):
+        return self._projectBatch(
+            "graph.applyEdgeLeafConstraintsBatch", idedge, inputs, nThreads
+        )
+
+    def graph_generateTargetConfigFromSeeds(
+        self, IDedge, qleaf, inputs, nSeeds, timeout, nThreads
+    ):
+        # the random seeds are copies of qleaf. The seeds are tried in order
+        # and succeed if they are in the target node of the edge, with
+        # residual error 1 otherwise.
+        seeds = [list(q) for q in inputs] or [list(qleaf)] * nSeeds
+        if not seeds:
+            raise RuntimeError("No input configuration and no seed.")
+        method = "graph.generateTargetConfigFromSeeds"
+        if self.kinds[IDedge] == "edges":
+            self._numberOfThreads(method, nThreads, len(seeds))
+        else:
+            self.threads[method] = 1
+        target = self.endpoints[IDedge][1]
+        for i, q in enumerate(seeds):
+            if self.configurationNodes.get(tuple(q)) == target:
+                return True, q, 0.0, i + 1
+        return False, seeds[0], 1.0, len(seeds)
+
+    def graph_getConfigErrorsForAllNodes(self, configs, nThreads):
+        # the error is 0 in the node of the configuration, 1 elsewhere
+        states = ("states", "waypointStates")
+        ids = [id for id, k in self.kinds.items() if k in states]
+        self._numberOfThreads("graph.getConfigErrorsForAllNodes", nThreads, len(ids))
+        membership = [
+            self.configurationNodes.get(tuple(q)) == id for q in configs for id in ids
+        ]
+        return ids, [0.0 if m else 1.0 for m in membership], membership
+
+    def graph_getFrequencyOfNodeInRoadmap(self, nodeId):
+        n = self.frequencies.get(nodeId, 0)
+        return n, [n]
+
+    def graph_getFrequenciesOfNodesInRoadmap(self, nodeIds):
+        return [self.frequencies.get(id, 0) for id in nodeIds]
+
+    def graph_getName(self, elmtId):
+        return self.names[elmtId]
+
+    def graph_getGraph(self):
+        def element(id):
+            return _Namespace(name=self.names[id], id=id)
+
+        states = ("states", "waypointStates")
+        return (
+            element(0),
+            _Namespace(
+                nodes=[element(id) for id, k in self.kinds.items() if k in states],
+                edges=[element(id) for id, k in self.kinds.items() if k not in states],
+            ),
+        )
+
+    def graph_getGraphSnapshot(self):
+        nodes, edges = list(), list()
+        for id, kind in self.kinds.items():
+            if kind in ("states", "waypointStates"):
+                nodes.append(
+                    _Namespace(
+                        name=self.names[id],
+                        id=id,
+                        waypoint=kind == "waypointStates",
+                        constraints=list(self.numericalConstraints[id]),
+                        constraintsForPath=list(self.numericalConstraintsForPath[id]),
+                    )
+                )
+                continue
+            a = self.edgeAttributes[id]
+            edges.append(
+                _Namespace(
+                    name=self.names[id],
+                    id=id,
+                    start=self.endpoints[id][0],
+                    end=self.endpoints[id][1],
+                    containingNode=a["containingNode"],
+                    weight=a["weight"],
+                    isShort=a["isShort"],
+                    type={
+                        "edges": "Edge",
+                        "waypointEdges": "WaypointEdge",
+                        "levelSetEdges": "LevelSetEdge",
+                    }[kind],
+                    waypoints=list(a["waypoints"]),
+                    constraints=list(self.numericalConstraints[id]),
+                )
+            )
+        return _Namespace(
+            name=self.names[0],
+            id=0,
+            constraints=list(self.numericalConstraints[0]),
+            nodes=nodes,
+            edges=edges,
+        )
+
+    # # \}
+
+    # # \name Remote objects
+    # Stand-ins for the problem, the graph components and their numerical
+    # constraints as returned by Problem.getProblem
+    # \{
+
+    def remoteProblem_getConstraintGraph(self):
+        return _Servant(self, "remoteGraphComponent", 0)
+
+    def remoteGraphComponent_get(self, id, componentId):
+        return _Servant(self, "remoteGraphComponent", componentId)
+
+    def remoteGraphComponent_name(self, id):
+        return self.names[id]
+
+    def remoteGraphComponent_stateFrom(self, id):
+        return _Servant(self, "remoteGraphComponent", self.endpoints[id][0])
+
+    def remoteGraphComponent_stateTo(self, id):
+        return _Servant(self, "remoteGraphComponent", self.endpoints[id][1])
+
+    def remoteGraphComponent_numericalConstraints(self, id):
+        return [
+            _Servant(self, "remoteImplicit", n) for n in self.numericalConstraints[id]
+        ]
+
+    def remoteImplicit_function(self, name):
+        return _Servant(self, "remoteFunction", name)
+
+    def remoteFunction_name(self, name):
+        return name
+
+    # # \}
+
+    # # \name Problem interfaces
+    # \{
+
+    def problem_getNumericalConstraintDimensions(self, prefixes):
+        return self._dimensions(prefixes)
+
+    def problem_createGrasp(self, graspName, gripperName, handleName):
+        d = self.handleDimensions.get(handleName, 6)
+        self._register(graspName, d, 6 - d)
+
+    def problem_createPreGrasp(self, name, gripper, handle):
+        self._register(name, self.handleDimensions.get(handle, 6))
+
+    def problem_createGrasps(self, graspNames, preGraspNames, grippers, handles):
+        for n, pn, g, h in zip(graspNames, preGraspNames, grippers, handles):
+            self.problem_createGrasp(n, g, h)
+            if pn:
+                self.problem_createPreGrasp(pn, g, h)
+        return self._dimensions([n for n in graspNames + preGraspNames if n])
+
+    def problem_createPlacementConstraint(
+        self, placementName, shapeName, envContactName
+    ):
+        self._register(placementName, 3, 3)
+
+    def problem_createPrePlacementConstraint(
+        self, placementName, shapeName, envContactName, width
+    ):
+        self._register(placementName, 3)
+
+    def problem_createPlacements(
+        self, placementNames, prePlacementNames, shapeNames, envContactNames, widths
+    ):
+        for n, pn in zip(placementNames, prePlacementNames):
+            self._register(n, 3, 3)
+            if pn:
+                self._register(pn, 3)
+        return self._dimensions([n for n in placementNames + prePlacementNames if n])
+
+    def problem_buildAndProjectPaths(self, IDedges, qbs, qes, nThreads, storePaths):
+        # the paths are always built and are fully projected if they end in
+        # the target node of the edge, half of them otherwise
+        n = len(IDedges)
+        if len(qbs) != n or len(qes) != n:
+            raise RuntimeError(
+                f"Got {n} edges, {len(qbs)} initial and {len(qes)} final "
+                "configurations."
+            )
+        self._numberOfThreads("problem.buildAndProjectPaths", nThreads, n)
+        success = [
+            self.configurationNodes.get(tuple(q)) == self.endpoints[id][1]
+            for id, q in zip(IDedges, qes)
+        ]
+        indexesNotProj, indexesProj = [-1] * n, [-1] * n
+        if storePaths:
+            for i in range(n):
+                indexesNotProj[i] = self.numberPaths
+                indexesProj[i] = self.numberPaths + 1
+                self.numberPaths += 2
+        ratios = [1.0 if ok else 0.5 for ok in success]
+        return success, ratios, indexesNotProj, indexesProj
+
+    def problem_getRobotContact(self, name):
+        return [], [], []
+
+    def problem_getEnvironmentContact(self, name):
+        return [], [], []
+
+    def basicProblem_getProblem(self):
+        return _Servant(self, "remoteProblem")
+
+    def basicProblem_setMaxNumThreads(self, n):
+        self.maxNumThreads = n
+        self.numberDeviceData = n
+
+    def basicProblem_getMaxNumThreads(self):
+        return self.maxNumThreads
+
+    def basicProblem_createLockedJoint(self, lockedJointName, jointName, value):
+        self.constraints.setdefault(lockedJointName, (7, 6, len(value), 6))
+
+    def robot_getGripperPositionInJoint(self, gripperName):
+        return "universe", [0.0] * 6 + [1.0]
+
+    def robot_getHandlePositionInJoint(self, handleName):
+        return "universe", [0.0] * 6 + [1.0]
+
+    def robot_getHandleMask(self, handleName):
+        return [True] * 6, 0.0
+
+    def robot_getGripperClearance(self, gripperName):
+        return 0.0
+
+    def basicRobot_getRobotName(self):
+        return self.robot.name
+
+    def basicRobot_getJointNames(self):
+        return self.jointNames
+
+    def basicRobot_getChildJoints(self, jointName, onlyDirectChildren):
+        return []
+
+    def basicRobot_getConfigSize(self):
+        return 7 * len(self.jointNames)
+
+    def basicRobot_getNumberDof(self):
+        return 6 * len(self.jointNames)
+
+    def basicRobot_getJointConfig(self, jointName):
+        return [0.0] * 7
+
+    # # \}
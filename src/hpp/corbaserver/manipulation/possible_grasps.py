@@ -43,12 +43,17 @@ class PossibleGrasps:
                factory and whose values are lists of handles also registered in
                the factory
         """
+        handleIndex = {h: ih for ih, h in enumerate(handles)}
+        self.grasps = grasps
+        # For each gripper, the set of indices of the handles it can grasp
         self.possibleGrasps = list()
         for ig, gripper in enumerate(grippers):
-            handles_ = grasps.get(gripper, list())
             handleIndices = list()
-            handleIndices = list(map(handles.index, handles_))
-            self.possibleGrasps.append(handleIndices)
+            for h in grasps.get(gripper, list()):
+                if h not in handleIndex:
+                    raise ValueError(f"{h} is not in the list of handles")
+                handleIndices.append(handleIndex[h])
+            self.possibleGrasps.append(frozenset(handleIndices))
 
     def __call__(self, grasps):
         for ig, ih in enumerate(grasps):
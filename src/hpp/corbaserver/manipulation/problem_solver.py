@@ -154,6 +154,38 @@ class ProblemSolver(Parent):
             return name, prename
         return name
 
+    def createPlacements(self, placementNames, shapeNames, envContactName, width=0.05):
+        """
+        Create placement and pre-placement constraints for several objects
+
+        \\param placementNames list of names of the placement constraints,
+        \\param shapeNames list of lists of robot contact surfaces,
+        \\param envContactName list of environment contact surfaces, common
+               to all the placements,
+        \\param width approaching distance, or list of approaching distances.
+               Set to None to skip creation of pre-placement constraints.
+        \\return the list of names and the list of dimensions of the
+                placement and pre-placement constraints.
+
+        Pre-placement constraints are named as in
+        \\ref createPlacementConstraints. Constraints that already exist are
+        not created again.
+
+        See hpp::corbaserver::manipulation::Problem::createPlacements
+        """
+        if width is None:
+            prenames = [""] * len(placementNames)
+            widths = [0.0] * len(placementNames)
+        else:
+            prenames = ["pre_" + name for name in placementNames]
+            if isinstance(width, (int, float)):
+                widths = [width] * len(placementNames)
+            else:
+                widths = width
+        return self.client.manipulation.problem.createPlacements(
+            placementNames, prenames, shapeNames, envContactName, widths
+        )
+
     def createQPStabilityConstraint(self, *args):
         """
         Create QP Static stability constraint
@@ -27,21 +27,49 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
 # DAMAGE.
 
+from types import SimpleNamespace
+
 from hpp.corbaserver.robot import Robot as Parent
 from hpp.corbaserver.robot import StaticStabilityConstraintsFactory
 
 from hpp.corbaserver import Client as BasicClient
 from hpp.corbaserver.manipulation import Client as ManipulationClient
 
+from .instrumentation import Instrumentation
+
 
 class CorbaClient:
     """
     Container for corba clients to various interfaces.
     """
 
-    def __init__(self, url=None, context="corbaserver"):
-        self.basic = BasicClient(url=url, context=context)
-        self.manipulation = ManipulationClient(url=url, context=context)
+    def __init__(self, url=None, context="corbaserver", server=None, instrument=False):
+        """
+        \\param server a MockServer instance. If provided, the clients are
+               in-process stand-ins and no CORBA connection is made.
+        \\param instrument True or an Instrumentation instance recording the
+               requests of the basic and manipulation clients. It is stored
+               in attribute instrumentation.
+        """
+        if instrument is True:
+            instrument = Instrumentation()
+        self.instrumentation = instrument or None
+        if server is not None:
+            self.basic = SimpleNamespace(**server.servants("basic"))
+        else:
+            self.basic = BasicClient(url=url, context=context)
+        if self.instrumentation is not None:
+            for name in ("problem", "robot", "obstacle"):
+                setattr(
+                    self.basic,
+                    name,
+                    self.instrumentation.wrap(
+                        getattr(self.basic, name), "basic." + name
+                    ),
+                )
+        self.manipulation = ManipulationClient(
+            url=url, context=context, server=server, instrument=self.instrumentation
+        )
 
 
 class Robot(Parent):
@@ -28,7 +28,9 @@
 
 #include "problem.impl.hh"
 
+#include <algorithm>
 #include <hpp/constraints/convex-shape-contact.hh>
+#include <hpp/constraints/differentiable-function.hh>
 #include <hpp/constraints/implicit.hh>
 #include <hpp/corbaserver/conversions.hh>
 #include <hpp/corbaserver/manipulation/server.hh>
@@ -44,6 +46,8 @@
 #include <hpp/pinocchio/gripper.hh>
 #include <hpp/pinocchio/serialization.hh>
 #include <hpp/util/debug.hh>
+#include <mutex>
+#include <thread>
 #ifdef HPP_CONSTRAINTS_USE_QPOASES
 #include <hpp/constraints/qp-static-stability.hh>
 #endif
@@ -124,6 +128,66 @@ Names_t* jointAndShapes(const JointAndShapes_t& js, intSeq_out indexes_out,
   }
   return jointNames;
 }
+
+/// Names and dimensions of the numerical constraints whose name starts with
+/// one of the prefixes, or of all of them if prefixes is empty.
+Names_t* numericalConstraintDimensions(const ProblemSolverPtr_t& ps,
+                                       const std::vector<std::string>& prefixes,
+                                       intSeqSeq_out dimensions) {
+  typedef std::map<std::string, constraints::ImplicitPtr_t> ConstraintMap;
+  const ConstraintMap& m = ps->numericalConstraints.map;
+
+  std::vector<std::string> names;
+  std::vector<const constraints::DifferentiableFunction*> functions;
+  for (ConstraintMap::const_iterator it = m.begin(); it != m.end(); ++it) {
+    bool match = prefixes.empty();
+    for (std::size_t i = 0; !match && i < prefixes.size(); ++i)
+      match = (it->first.compare(0, prefixes[i].size(), prefixes[i]) == 0);
+    if (!match) continue;
+    names.push_back(it->first);
+    functions.push_back(&it->second->function());
+  }
+
+  Eigen::Matrix<CORBA::Long, Eigen::Dynamic, Eigen::Dynamic> dims(names.size(),
+                                                                  4);
+  for (std::size_t i = 0; i < functions.size(); ++i) {
+    dims(i, 0) = (CORBA::Long)functions[i]->inputSize();
+    dims(i, 1) = (CORBA::Long)functions[i]->inputDerivativeSize();
+    dims(i, 2) = (CORBA::Long)functions[i]->outputSize();
+    dims(i, 3) = (CORBA::Long)functions[i]->outputDerivativeSize();
+  }
+  dimensions = matrixToIntSeqSeq(dims);
+  return toNames_t(names.begin(), names.end());
+}
+
+/// Initialize the steering method of the problem if the one of the graph is
+/// not completely set.
+void initSteeringMethod(const ProblemSolverPtr_t& ps,
+                        const graph::EdgePtr_t& edge) {
+  if (!edge->parentGraph()->problem()->manipulationSteeringMethod() ||
+      !edge->parentGraph()
+           ->problem()
+           ->manipulationSteeringMethod()
+           ->innerSteeringMethod()) {
+    ps->initSteeringMethod();
+    if (!edge->parentGraph()->problem()->manipulationSteeringMethod() ||
+        !edge->parentGraph()
+             ->problem()
+             ->manipulationSteeringMethod()
+             ->innerSteeringMethod())
+      throw Error("Could not initialize the steering method.");
+  }
+}
+
+core::PathVectorPtr_t toPathVector(const core::PathPtr_t& path) {
+  core::PathVectorPtr_t pv = HPP_DYNAMIC_PTR_CAST(core::PathVector, path);
+  if (!pv) {
+    pv = core::PathVector::create(path->outputSize(),
+                                  path->outputDerivativeSize());
+    pv->appendPath(path);
+  }
+  return pv;
+}
 }  // namespace
 
 Problem::Problem() : server_(0x0) {}
@@ -198,6 +262,18 @@ Names_t* Problem::getSelected(const char* what) {
   return toNames_t(ret.begin(), ret.end());
 }
 
+Names_t* Problem::getNumericalConstraintDimensions(const Names_t& prefixes,
+                                                   intSeqSeq_out dimensions) {
+  try {
+    return numericalConstraintDimensions(
+        problemSolver(),
+        corbaServer::toStrings<std::vector<std::string> >(prefixes),
+        dimensions);
+  } catch (const std::exception& exc) {
+    throw Error(exc.what());
+  }
+}
+
 void Problem::loadRoadmap(const char* filename) {
   try {
     ProblemSolverPtr_t ps(problemSolver());
@@ -239,6 +315,39 @@ void Problem::createPreGrasp(const char* graspName, const char* gripperName,
   }
 }
 
+Names_t* Problem::createGrasps(const Names_t& graspNames,
+                               const Names_t& preGraspNames,
+                               const Names_t& grippers, const Names_t& handles,
+                               intSeqSeq_out dimensions) {
+  try {
+    ProblemSolverPtr_t ps(problemSolver());
+    std::vector<std::string> gNames(
+        corbaServer::toStrings<std::vector<std::string> >(graspNames)),
+        pgNames(
+            corbaServer::toStrings<std::vector<std::string> >(preGraspNames)),
+        gs(corbaServer::toStrings<std::vector<std::string> >(grippers)),
+        hs(corbaServer::toStrings<std::vector<std::string> >(handles));
+    if (pgNames.size() != gNames.size() || gs.size() != gNames.size() ||
+        hs.size() != gNames.size()) {
+      HPP_THROW(Error, "Arguments of createGrasps must have the same length.");
+    }
+
+    std::vector<std::string> prefixes;
+    for (std::size_t i = 0; i < gNames.size(); ++i) {
+      if (!ps->numericalConstraints.has(gNames[i]))
+        ps->createGraspConstraint(gNames[i], gs[i], hs[i]);
+      prefixes.push_back(gNames[i]);
+      if (pgNames[i].empty()) continue;
+      if (!ps->numericalConstraints.has(pgNames[i]))
+        ps->createPreGraspConstraint(pgNames[i], gs[i], hs[i]);
+      prefixes.push_back(pgNames[i]);
+    }
+    return numericalConstraintDimensions(ps, prefixes, dimensions);
+  } catch (const std::exception& exc) {
+    throw Error(exc.what());
+  }
+}
+
 Names_t* Problem::getEnvironmentContactNames() {
   try {
     typedef std::map<std::string, JointAndShapes_t> ShapeMap;
@@ -331,6 +440,47 @@ void Problem::createPrePlacementConstraint(const char* placName,
   }
 }
 
+Names_t* Problem::createPlacements(const Names_t& placementNames,
+                                   const Names_t& prePlacementNames,
+                                   const Namess_t& shapeNames,
+                                   const Names_t& envContactNames,
+                                   const floatSeq& widths,
+                                   intSeqSeq_out dimensions) {
+  try {
+    ProblemSolverPtr_t ps(problemSolver());
+    std::vector<std::string> pNames(
+        corbaServer::toStrings<std::vector<std::string> >(placementNames)),
+        ppNames(corbaServer::toStrings<std::vector<std::string> >(
+            prePlacementNames)),
+        envs(
+            corbaServer::toStrings<std::vector<std::string> >(envContactNames));
+    if (ppNames.size() != pNames.size() ||
+        shapeNames.length() != pNames.size() ||
+        widths.length() != pNames.size()) {
+      HPP_THROW(Error,
+                "Arguments of createPlacements must have the same length.");
+    }
+
+    std::vector<std::string> prefixes;
+    for (std::size_t i = 0; i < pNames.size(); ++i) {
+      std::vector<std::string> shapes(
+          corbaServer::toStrings<std::vector<std::string> >(
+              shapeNames[(ULong)i]));
+      if (!ps->numericalConstraints.has(pNames[i]))
+        ps->createPlacementConstraint(pNames[i], shapes, envs, 1e-3);
+      prefixes.push_back(pNames[i]);
+      if (ppNames[i].empty()) continue;
+      if (!ps->numericalConstraints.has(ppNames[i]))
+        ps->createPrePlacementConstraint(ppNames[i], shapes, envs,
+                                         widths[(ULong)i], 1e-3);
+      prefixes.push_back(ppNames[i]);
+    }
+    return numericalConstraintDimensions(ps, prefixes, dimensions);
+  } catch (const std::exception& exc) {
+    throw Error(exc.what());
+  }
+}
+
 void Problem::createQPStabilityConstraint(const char* constraintName,
 #ifdef HPP_CONSTRAINTS_USE_QPOASES
                                           const char* comRootJointName,
@@ -539,37 +689,18 @@ bool Problem::buildAndProjectPath(hpp::ID IDedge, const hpp::floatSeq& qb,
     }
     // If steering method is not completely set in the graph, create
     // one.
-    if (!edge->parentGraph()->problem()->manipulationSteeringMethod() ||
-        !edge->parentGraph()
-             ->problem()
-             ->manipulationSteeringMethod()
-             ->innerSteeringMethod()) {
-      problemSolver()->initSteeringMethod();
-      if (!edge->parentGraph()->problem()->manipulationSteeringMethod() ||
-          !edge->parentGraph()
-               ->problem()
-               ->manipulationSteeringMethod()
-               ->innerSteeringMethod())
-        throw Error("Could not initialize the steering method.");
-    }
+    initSteeringMethod(problemSolver(), edge);
     bool success = false;
     DevicePtr_t robot = getRobotOrThrow(problemSolver());
     Configuration_t q1 = floatSeqToConfig(robot, qb, true);
     Configuration_t q2 = floatSeqToConfig(robot, qe, true);
-    core::PathVectorPtr_t pv;
     indexNotProj = -1;
     indexProj = -1;
     core::PathPtr_t path;
     success = edge->build(path, q1, q2);
     if (!success) return false;
-    pv = HPP_DYNAMIC_PTR_CAST(core::PathVector, path);
     indexNotProj = (CORBA::Long)problemSolver()->paths().size();
-    if (!pv) {
-      pv = core::PathVector::create(path->outputSize(),
-                                    path->outputDerivativeSize());
-      pv->appendPath(path);
-    }
-    problemSolver()->addPath(pv);
+    problemSolver()->addPath(toPathVector(path));
 
     core::PathPtr_t projPath;
     PathProjectorPtr_t pathProjector(
@@ -588,20 +719,124 @@ bool Problem::buildAndProjectPath(hpp::ID IDedge, const hpp::floatSeq& qb,
     if (!success) {
       if (!projPath || projPath->length() == 0) return false;
     }
-    pv = HPP_DYNAMIC_PTR_CAST(core::PathVector, projPath);
     indexProj = (CORBA::Long)problemSolver()->paths().size();
-    if (!pv) {
-      pv = core::PathVector::create(projPath->outputSize(),
-                                    projPath->outputDerivativeSize());
-      pv->appendPath(projPath);
-    }
-    problemSolver()->addPath(pv);
+    problemSolver()->addPath(toPathVector(projPath));
     return success;
   } catch (const std::exception& exc) {
     throw hpp::Error(exc.what());
   }
 }
 
+void Problem::buildAndProjectPaths(
+    const hpp::IDseq& IDedges, const hpp::floatSeqSeq& qbs,
+    const hpp::floatSeqSeq& qes, CORBA::Long nThreads,
+    CORBA::Boolean storePaths, hpp::boolSeq_out success,
+    hpp::floatSeq_out projectionRatios, hpp::intSeq_out indexesNotProj,
+    hpp::intSeq_out indexesProj) {
+  try {
+    const std::size_t n = IDedges.length();
+    if (qbs.length() != n || qes.length() != n)
+      HPP_THROW(Error, "Got " << n << " edges, " << qbs.length()
+                              << " initial and " << qes.length()
+                              << " final configurations.");
+    ProblemSolverPtr_t ps(problemSolver());
+    DevicePtr_t robot = getRobotOrThrow(ps);
+    std::vector<graph::EdgePtr_t> edges(n);
+    std::vector<Configuration_t> q1s, q2s;
+    for (std::size_t i = 0; i < n; ++i) {
+      ULong k = (ULong)i;
+      edges[i] = HPP_DYNAMIC_PTR_CAST(graph::Edge,
+                                      graph()->get((size_t)IDedges[k]).lock());
+      if (!edges[i]) HPP_THROW(Error, "ID " << IDedges[k] << " is not an edge");
+      initSteeringMethod(ps, edges[i]);
+      q1s.push_back(floatSeqToConfig(robot, qbs[k], true));
+      q2s.push_back(floatSeqToConfig(robot, qes[k], true));
+    }
+    PathProjectorPtr_t pathProjector(ps->problem()->pathProjector());
+    if (!pathProjector) {
+      ps->initPathProjector();
+      pathProjector = ps->problem()->pathProjector();
+    }
+
+    // Edge::build sets the right hand side of the path constraints of the
+    // edge: the paths are built one at a time. The built paths own a copy of
+    // their constraints and the path projectors only read their distance,
+    // steering method and step, so the projections run concurrently.
+    std::vector<core::PathPtr_t> paths(n), projPaths(n);
+    std::vector<char> projected(n, false);
+    std::vector<double> ratios(n, 0);
+    const std::size_t nt = numberOfThreads(ps, nThreads, n);
+    std::mutex buildMutex;
+    std::vector<std::string> errors(nt);
+    auto buildAndProject = [&](std::size_t t) {
+      try {
+        for (std::size_t i = t; i < n; i += nt) {
+          core::PathPtr_t path;
+          {
+            std::lock_guard<std::mutex> lock(buildMutex);
+            if (!edges[i]->build(path, q1s[i], q2s[i])) continue;
+          }
+          paths[i] = path;
+          core::PathPtr_t projPath;
+          bool ok = true;
+          if (pathProjector)
+            ok = pathProjector->apply(path, projPath);
+          else
+            projPath = path->copy();
+          projected[i] = ok;
+          if (projPath && projPath->length() > 0) projPaths[i] = projPath;
+          if (ok)
+            ratios[i] = 1;
+          else if (projPaths[i] && path->length() > 0)
+            ratios[i] = projPath->length() / path->length();
+        }
+      } catch (const std::exception& exc) {
+        errors[t] = exc.what();
+      }
+    };
+    if (nt == 1)
+      buildAndProject(0);
+    else {
+      std::vector<std::thread> threads;
+      for (std::size_t t = 0; t < nt; ++t)
+        threads.emplace_back(buildAndProject, t);
+      for (std::thread& thread : threads) thread.join();
+    }
+    for (const std::string& error : errors)
+      if (!error.empty()) throw std::runtime_error(error);
+
+    hpp::boolSeq_var s = new hpp::boolSeq();
+    hpp::floatSeq_var r = new hpp::floatSeq();
+    hpp::intSeq_var iNotProj = new hpp::intSeq(), iProj = new hpp::intSeq();
+    s->length((ULong)n);
+    r->length((ULong)n);
+    iNotProj->length((ULong)n);
+    iProj->length((ULong)n);
+    for (std::size_t i = 0; i < n; ++i) {
+      ULong k = (ULong)i;
+      s[k] = (projected[i] != 0);
+      r[k] = ratios[i];
+      iNotProj[k] = -1;
+      iProj[k] = -1;
+      if (!storePaths) continue;
+      if (paths[i]) {
+        iNotProj[k] = (CORBA::Long)ps->paths().size();
+        ps->addPath(toPathVector(paths[i]));
+      }
+      if (projPaths[i]) {
+        iProj[k] = (CORBA::Long)ps->paths().size();
+        ps->addPath(toPathVector(projPaths[i]));
+      }
+    }
+    success = s._retn();
+    projectionRatios = r._retn();
+    indexesNotProj = iNotProj._retn();
+    indexesProj = iProj._retn();
+  } catch (const std::exception& exc) {
+    throw hpp::Error(exc.what());
+  }
+}
+
 void Problem::setTargetState(hpp::ID IDstate) {
   try {
     graph::GraphComponentPtr_t comp = graph()->get((size_t)IDstate).lock();
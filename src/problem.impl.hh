@@ -44,6 +44,7 @@ using CORBA::Short;
 using CORBA::String_out;
 using CORBA::ULong;
 using CORBA::UShort;
+using hpp::corbaserver::manipulation::Namess_t;
 
 class Problem : public virtual POA_hpp::corbaserver::manipulation::Problem {
  public:
@@ -58,6 +59,9 @@ class Problem : public virtual POA_hpp::corbaserver::manipulation::Problem {
 
   virtual Names_t* getSelected(const char* what);
 
+  virtual Names_t* getNumericalConstraintDimensions(const Names_t& prefixes,
+                                                    intSeqSeq_out dimensions);
+
   virtual void loadRoadmap(const char* filename);
 
   virtual void createGrasp(const char* graspName, const char* gripperName,
@@ -66,6 +70,11 @@ class Problem : public virtual POA_hpp::corbaserver::manipulation::Problem {
   virtual void createPreGrasp(const char* graspName, const char* gripperName,
                               const char* handleName);
 
+  virtual Names_t* createGrasps(const Names_t& graspNames,
+                                const Names_t& preGraspNames,
+                                const Names_t& grippers, const Names_t& handles,
+                                intSeqSeq_out dimensions);
+
   virtual Names_t* getEnvironmentContactNames();
 
   virtual Names_t* getRobotContactNames();
@@ -85,6 +94,13 @@ class Problem : public virtual POA_hpp::corbaserver::manipulation::Problem {
                                             const Names_t& envContactName,
                                             CORBA::Double width);
 
+  virtual Names_t* createPlacements(const Names_t& placementNames,
+                                    const Names_t& prePlacementNames,
+                                    const Namess_t& shapeNames,
+                                    const Names_t& envContactNames,
+                                    const floatSeq& widths,
+                                    intSeqSeq_out dimensions);
+
   virtual void createQPStabilityConstraint(const char* constraintName,
                                            const char* comRootJointName,
                                            const Names_t& shapesName);
@@ -109,6 +125,13 @@ class Problem : public virtual POA_hpp::corbaserver::manipulation::Problem {
                                    CORBA::Long& indexNotProj,
                                    CORBA::Long& indexProj);
 
+  virtual void buildAndProjectPaths(
+      const hpp::IDseq& IDedges, const hpp::floatSeqSeq& qbs,
+      const hpp::floatSeqSeq& qes, CORBA::Long nThreads,
+      CORBA::Boolean storePaths, hpp::boolSeq_out success,
+      hpp::floatSeq_out projectionRatios, hpp::intSeq_out indexesNotProj,
+      hpp::intSeq_out indexesProj);
+
   virtual void setTargetState(hpp::ID IDstate);
 
   virtual ID edgeAtParam(ULong pathId, Double param, String_out name);
@@ -463,6 +463,35 @@ char* Robot::getHandlePositionInJoint(const char* handleName,
   }
 }
 
+::hpp::boolSeq* Robot::getHandleMask(const char* handleName,
+                                     double& clearance) {
+  try {
+    DevicePtr_t robot = getRobotOrThrow(problemSolver());
+    HandlePtr_t handle = robot->handles.get(handleName);
+    if (!handle) throw Error("This handle does not exists.");
+    clearance = handle->clearance();
+    const std::vector<bool>& mask = handle->mask();
+    ::hpp::boolSeq* res = new ::hpp::boolSeq;
+    res->length((CORBA::ULong)mask.size());
+    for (std::size_t i = 0; i < mask.size(); ++i)
+      (*res)[(CORBA::ULong)i] = mask[i];
+    return res;
+  } catch (const std::exception& exc) {
+    throw Error(exc.what());
+  }
+}
+
+double Robot::getGripperClearance(const char* gripperName) {
+  try {
+    DevicePtr_t robot = getRobotOrThrow(problemSolver());
+    GripperPtr_t gripper = robot->grippers.get(gripperName);
+    if (!gripper) throw Error("This gripper does not exists.");
+    return gripper->clearance();
+  } catch (const std::exception& exc) {
+    throw Error(exc.what());
+  }
+}
+
 void Robot::setHandlePositionInJoint(const char* handleName,
                                      const ::hpp::Transform_ position) {
   try {
@@ -107,6 +107,11 @@ class Robot : public virtual POA_hpp::corbaserver::manipulation::Robot {
   virtual char* getHandlePositionInJoint(const char* handleName,
                                          ::hpp::Transform__out position);
 
+  virtual ::hpp::boolSeq* getHandleMask(const char* handleName,
+                                        double& clearance);
+
+  virtual double getGripperClearance(const char* gripperName);
+
   virtual void setHandlePositionInJoint(const char* handleName,
                                         const ::hpp::Transform_ position);
 
@@ -28,10 +28,24 @@
 
 #include "tools.hh"
 
+#include <algorithm>
+#include <hpp/pinocchio/device.hh>
+
 namespace hpp {
 DevicePtr_t getRobotOrThrow(ProblemSolverPtr_t p) {
   DevicePtr_t robot = p->robot();
   if (!robot) throw Error("Robot not found.");
   return robot;
 }
+
+std::size_t numberOfThreads(ProblemSolverPtr_t p, long nThreads,
+                            std::size_t n) {
+  DevicePtr_t robot = getRobotOrThrow(p);
+  std::size_t nt = (std::size_t)p->maxNumThreads();
+  if (nThreads > 0) nt = std::min(nt, (std::size_t)nThreads);
+  nt = std::max<std::size_t>(1, std::min(nt, n));
+  if ((std::size_t)robot->numberDeviceData() < nt)
+    robot->numberDeviceData((pinocchio::size_type)nt);
+  return nt;
+}
 }  // namespace hpp
@@ -65,6 +65,16 @@ inline void hppTransformToTransform3s(const CORBA::Double* inConfig,
 }
 
 DevicePtr_t getRobotOrThrow(ProblemSolverPtr_t p);
+
+/// Number of threads of a parallel computation on the robot of a problem
+/// solver.
+/// \param nThreads requested number of threads, 0 for the maximal number.
+/// \param n number of tasks.
+/// \return the requested number of threads capped at
+///         ProblemSolver::maxNumThreads and at \c n, at least 1. The robot
+///         is given as many device data as threads, so that each thread
+///         computes with its own data.
+std::size_t numberOfThreads(ProblemSolverPtr_t p, long nThreads, std::size_t n);
 }  // namespace hpp
 
 #endif  // HPP_MANIPULATION_CORBA_TOOLS_HH
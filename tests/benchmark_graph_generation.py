@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2026 CNRS
+#
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+
+# Benchmark of the Python layer on synthetic scenes, run with the mock server
+#
+# For each scene and each stage among
+#   - "constraints": creation of the grasp and placement constraints,
+#   - "generate": ConstraintGraphFactory.generate,
+#   - "fetch": ConstraintGraph(makeGraph=False),
+#   - "securityMargins": SecurityMargins.apply,
+# the wall time, the number of requests, the payload sizes, the peak memory
+# allocated by Python and the number of states and edges are written in a
+# JSON file.
+#
+# Usage: python benchmark_graph_generation.py [-o results.json] [--repeat 3]
+#        [--processes 1 4]
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from hpp.corbaserver.manipulation import (
+    ConstraintGraph,
+    ConstraintGraphFactory,
+    DryRunGraph,
+    Rule,
+    SecurityMargins,
+)
+
+stages = ("constraints", "generate", "fetch", "securityMargins")
+ruleSets = ("none", "restricted", "custom")
+
+
+class ObjectPerGripper:
+    """
+    Grasp validation equivalent to the "restricted" rules written in Python
+
+    Unlike Rules instances, it is evaluated by the pool of processes of
+    ConstraintGraphFactory.generate.
+    """
+
+    def __init__(self, nObjects, nHandles):
+        self.nObjects = nObjects
+        self.nHandles = nHandles
+
+    def __call__(self, grasps):
+        return all(
+            ih is None or ih // self.nHandles == ig % self.nObjects
+            for ig, ih in enumerate(grasps)
+        )
+
+
+def makeFactory(nGrippers, nObjects, nHandles, rules):
+    """
+    Create a factory on a dry run graph
+
+    Gripper i may only grasp the handles of object i modulo the number of
+    objects if rules is "restricted" or "custom", any handle if rules is
+    "none".
+    """
+    objects = [f"o{i}" for i in range(nObjects)]
+    graph = DryRunGraph(jointNames=[o + "/root_joint" for o in objects])
+    factory = ConstraintGraphFactory(graph)
+    factory.setGrippers([f"g{i}" for i in range(nGrippers)])
+    factory.setObjects(
+        objects,
+        [[f"{o}/h{j}" for j in range(nHandles)] for o in objects],
+        [[o + "/surface"] for o in objects],
+    )
+    factory.environmentContacts(["table"])
+    if rules == "custom":
+        factory.graspIsAllowed.append(ObjectPerGripper(nObjects, nHandles))
+    elif rules == "restricted":
+        factory.setRules(
+            [
+                Rule(
+                    [f"g{i}" for i in range(nGrippers)],
+                    [f"^$|o{i % nObjects}/.*" for i in range(nGrippers)],
+                    True,
+                )
+            ]
+        )
+    return factory
+
+
+def problemSolver(factory):
+    """
+    Stand-in for the ProblemSolver methods used by SecurityMargins
+    """
+    server = factory.graph.server
+    client = server.robot.client
+    return SimpleNamespace(
+        robot=SimpleNamespace(
+            jointNames=server.jointNames,
+            getGripperPositionInJoint=client.manipulation.robot.getGripperPositionInJoint,
+            getChildJoints=lambda j: client.basic.robot.getChildJoints(j, False),
+        ),
+        getAvailable=lambda what: list(factory.grippers),
+        getEnvironmentContactNames=lambda: ["table"],
+        getEnvironmentContact=lambda s: (["universe"],),
+        getRobotContactNames=lambda: [o + "/surface" for o in factory.objects],
+        getRobotContact=lambda s: ([s.split("/")[0] + "/root_joint"],),
+    )
+
+
+def prepare(stage, scene, processes=1):
+    """
+    Build the scene up to a stage
+
+    \\param processes see ConstraintGraphFactory.generate
+    \\return the factory and a function running the stage.
+    """
+    factory = makeFactory(*scene)
+    if stage == "constraints":
+        nG, nH = len(factory.grippers), len(factory.handles)
+        return factory, lambda: factory.constraints.createConstraints(
+            list(itertools.product(range(nG), range(nH))),
+            range(len(factory.objects)),
+        )
+    if stage == "generate":
+        return factory, lambda: factory.generate(processes)
+    factory.generate()
+    graph = factory.graph
+    if stage == "fetch":
+        return factory, lambda: ConstraintGraph(
+            graph.server.robot, graph.name, makeGraph=False
+        )
+    margins = SecurityMargins(problemSolver(factory), factory, list(factory.objects))
+    margins.setSecurityMarginBetween("universe", factory.objects[0], 0.01)
+    return factory, margins.apply
+
+
+def measure(stage, scene, repeat, processes=1):
+    times = []
+    for _ in range(repeat):
+        factory, run = prepare(stage, scene, processes)
+        server = factory.graph.server
+        server.reset()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    # memory is measured separately as tracing slows down execution
+    factory, run = prepare(stage, scene, processes)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report = factory.graph.report()
+    return dict(
+        time=min(times),
+        times=times,
+        rpcs=sum(server.rpcs.values()),
+        bytesSent=sum(server.bytesSent.values()),
+        bytesReceived=sum(server.bytesReceived.values()),
+        peakMemory=peak,
+        states=report["states"] + report["waypointStates"],
+        edges=report["edges"] + report["waypointEdges"] + report["levelSetEdges"],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark of graph generation with the mock server"
+    )
+    parser.add_argument("-o", "--output", default="benchmark_graph_generation.json")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--grippers", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--objects", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--handles", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--rules", nargs="+", choices=ruleSets, default=ruleSets)
+    parser.add_argument("--stages", nargs="+", choices=stages, default=stages)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        nargs="+",
+        default=[1],
+        help="numbers of processes of the generate stage",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for scene in itertools.product(
+        args.grippers, args.objects, args.handles, args.rules
+    ):
+        for stage in args.stages:
+            for processes in args.processes if stage == "generate" else [1]:
+                res = dict(
+                    zip(("grippers", "objects", "handles", "rules"), scene),
+                    stage=stage,
+                    processes=processes,
+                )
+                res.update(measure(stage, scene, args.repeat, processes))
+                print(
+                    "{grippers} grippers, {objects} objects, {handles} handles, "
+                    "rules {rules}, {stage}, {processes} processes: {time:.4f}s, "
+                    "{rpcs} requests, {peakMemory} bytes, {states} states, "
+                    "{edges} edges".format(**res)
+                )
+                results.append(res)
+    with open(args.output, "w") as f:
+        json.dump(
+            dict(
+                python=sys.version,
+                machine=platform.machine(),
+                repeat=args.repeat,
+                results=results,
+            ),
+            f,
+            indent=1,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2026 CNRS
+#
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+
+
+# Tests of ConstraintGraph and of the mock server
+
+import pytest
+from test_constraint_graph_factory import graphDump, makeFactory
+
+from hpp.corbaserver.manipulation import ConstraintGraph, DryRunGraph
+
+
+class UnbatchedGraph(DryRunGraph):
+    """
+    Graph that sends each graph building operation in its own request
+    """
+
+    def beginBatch(self):
+        pass
+
+    def endBatch(self, commit=True):
+        pass
+
+
+def test_batch():
+    batched = makeFactory(2, 2, 2)
+    batched.generate()
+    unbatched = makeFactory(2, 2, 2, UnbatchedGraph)
+    unbatched.generate()
+    assert graphDump(batched.graph) == graphDump(unbatched.graph)
+    rpcs = batched.graph.server.rpcs
+    assert rpcs["graph.applyOperations"] == 1
+    assert rpcs["graph.createNode"] == rpcs["graph.createEdge"] == 0
+    assert unbatched.graph.server.rpcs["graph.applyOperations"] == 0
+
+
+def test_batch_forward():
+    graph = DryRunGraph()
+    server = graph.server
+    graph.beginBatch()
+    graph.createNode(["a", "b"])
+    graph.createEdge("a", "b", "a-b", 1, "a")
+    assert server.rpcs["graph.applyOperations"] == 0
+    # a call that does not build the graph sends the operations first
+    snapshot = graph.graph.getGraphSnapshot()
+    assert server.rpcs["graph.applyOperations"] == 1
+    assert [n.name for n in snapshot.nodes] == ["a", "b"]
+    graph.createNode("c")
+    graph.endBatch()
+    assert server.rpcs["graph.applyOperations"] == 2
+    assert server.names[graph.nodes["c"]] == "c"
+    assert server.endpoints[graph.edges["a-b"]] == (graph.nodes["a"], graph.nodes["b"])
+
+
+def test_batch_discard():
+    graph = DryRunGraph()
+    graph.createNode("a")
+    graph.beginBatch()
+    with pytest.raises(RuntimeError):
+        graph.beginBatch()
+    graph.createNode("b")
+    graph.createEdge("a", "b", "a-b", 1, "a")
+    graph.endBatch(commit=False)
+    assert "b" not in graph.nodes and "a-b" not in graph.edges
+    assert graph.server.rpcs["graph.applyOperations"] == 0
+    with pytest.raises(RuntimeError):
+        graph.endBatch()
+
+
+def test_index():
+    graph = DryRunGraph()
+    graph.createNode(["a", "b"])
+    graph.createEdge("a", "b", "a-b", 1, "a")
+    for name, id in graph.nodes.items():
+        assert graph.nodes.name(id) == name
+        assert graph.getNodeName(id) == name
+    assert graph.getEdgeName(graph.edges["a-b"]) == "a-b"
+    id = graph.nodes.pop("a")
+    with pytest.raises(KeyError):
+        graph.nodes.name(id)
+
+
+def test_mock_server():
+    graph = DryRunGraph(jointNames=["o/root_joint"])
+    server = graph.server
+    server.reset()
+    problem = graph.client.problem
+    names, dimensions = problem.createGrasps(["g grasps o/h"], [""], ["g"], ["o/h"])
+    assert names == ["g grasps o/h", "g grasps o/h/complement", "g grasps o/h/hold"]
+    assert dimensions[0] == [7, 6, 6, 6]
+    assert server.rpcs["problem.createGrasps"] == 1
+    assert server.bytesSent["problem.createGrasps"] > 0
+    assert server.bytesReceived["problem.createGrasps"] > 0
+    graph.createNode("a")
+    with pytest.raises(RuntimeError):
+        graph.graph.addNumericalConstraints(graph.nodes["a"], ["unknown"])
+    # methods without implementation are not silently accepted
+    with pytest.raises(NotImplementedError):
+        graph.graph.getConfigErrorForNode(graph.nodes["a"], [0.0])
+    assert server.rpcs["graph.getConfigErrorForNode"] == 0
+    server.reset()
+    assert sum(server.rpcs.values()) == 0 and server.calls == []
+    with pytest.raises(ValueError):
+        server.servants("unknown")
+
+
+def test_get_nodes():
+    graph = DryRunGraph()
+    graph.createNode(["a", "b"])
+    a, b = graph.nodes["a"], graph.nodes["b"]
+    server = graph.server
+    server.configurationNodes = {(0.0,): b, (2.0,): a}
+    configs = [[0.0], [1.0], [2.0]]
+    # the server returns -1 for the configurations that are in no node
+    assert graph.getNodes(configs) == ["b", None, "a"]
+    assert server.threads["graph.getNodes"] == 1
+    # the threads are capped at the maximal number of threads of the problem
+    # solver and the robot has as many device data
+    server.robot.client.basic.problem.setMaxNumThreads(3)
+    assert graph.getNodes(configs * 4, parallel=True) == ["b", None, "a"] * 4
+    assert server.threads["graph.getNodes"] == 3
+    assert server.numberDeviceData == 3
+    # and at half the number of configurations
+    assert graph.getNodes(configs, parallel=True) == ["b", None, "a"]
+    assert server.threads["graph.getNodes"] == 1
+    graph.server.graph_getNodes = lambda configs, parallel: [b + 1]
+    with pytest.raises(RuntimeError):
+        graph.getNodes([[0.0]])
+
+
+def test_apply_constraints_batch():
+    graph = DryRunGraph()
+    graph.createNode(["a", "b"])
+    graph.createEdge("a", "b", "a-b", 1, "a")
+    server = graph.server
+    server.configurationNodes = {(0.0,): graph.nodes["b"]}
+    configs = [[0.0], [1.0]] * 4
+    success, outputs, errors = graph.applyNodeConstraintsBatch("b", configs)
+    assert success == [True, False] * 4
+    assert outputs == configs and errors == [0.0] * 8
+    # 0 thread stands for the maximal number of threads of the problem solver
+    assert server.threads["graph.applyNodeConstraintsBatch"] == 1
+    server.robot.client.basic.problem.setMaxNumThreads(4)
+    graph.applyNodeConstraintsBatch("b", configs)
+    assert server.threads["graph.applyNodeConstraintsBatch"] == 4
+    graph.applyNodeConstraintsBatch("b", configs, nThreads=2)
+    assert server.threads["graph.applyNodeConstraintsBatch"] == 2
+    # more threads than the maximal number or than configurations are capped
+    success, _, _ = graph.applyEdgeLeafConstraintsBatch(
+        "a-b", [0.0], configs[:3], nThreads=8
+    )
+    assert success == [True, False, True]
+    assert server.threads["graph.applyEdgeLeafConstraintsBatch"] == 3
+    assert server.numberDeviceData == 4
+
+
+def test_generate_target_config_from_seeds():
+    graph = DryRunGraph()
+    graph.createNode(["a", "b"])
+    graph.createEdge("a", "b", "a-b", 1, "a")
+    graph.createLevelSetEdge("a", "b", "a-ls-b", 1, "a")
+    server = graph.server
+    server.configurationNodes = {(1.0,): graph.nodes["b"]}
+    server.robot.client.basic.problem.setMaxNumThreads(2)
+    seeds = [[0.0], [1.0], [2.0]]
+    assert graph.generateTargetConfigFromSeeds("a-b", [0.0], seeds) == (
+        True,
+        [1.0],
+        0.0,
+        2,
+    )
+    assert server.threads["graph.generateTargetConfigFromSeeds"] == 2
+    graph.generateTargetConfigFromSeeds("a-b", [0.0], seeds, nThreads=1)
+    assert server.threads["graph.generateTargetConfigFromSeeds"] == 1
+    # the seeds of level set edges are tried sequentially
+    graph.generateTargetConfigFromSeeds("a-ls-b", [0.0], seeds, nThreads=2)
+    assert server.threads["graph.generateTargetConfigFromSeeds"] == 1
+    # random seeds are used without input configuration
+    success, _, _, attempts = graph.generateTargetConfigFromSeeds(
+        "a-b", [0.0], nSeeds=5
+    )
+    assert not success and attempts == 5
+    with pytest.raises(RuntimeError):
+        graph.generateTargetConfigFromSeeds("a-b", [0.0])
+
+
+def test_config_errors_for_all_nodes():
+    graph = DryRunGraph()
+    graph.createNode(["a", "b", "c"])
+    server = graph.server
+    server.configurationNodes = {(0.0,): graph.nodes["b"]}
+    server.robot.client.basic.problem.setMaxNumThreads(8)
+    nodes, errors, membership = graph.getConfigErrorsForAllNodes([[0.0], [1.0]])
+    assert sorted(nodes) == ["a", "b", "c"]
+    # one row per configuration and one column per node
+    assert membership == [n == "b" for n in nodes] + [False] * 3
+    assert errors == [0.0 if m else 1.0 for m in membership]
+    # the threads split the nodes
+    assert server.threads["graph.getConfigErrorsForAllNodes"] == 3
+    graph.getConfigErrorsForAllNodes([[0.0]], nThreads=2)
+    assert server.threads["graph.getConfigErrorsForAllNodes"] == 2
+
+
+def test_build_and_project_paths():
+    graph = DryRunGraph()
+    graph.createNode(["a", "b"])
+    graph.createEdge("a", "b", "a-b", 1, "a")
+    graph.createEdge("b", "a", "b-a", 1, "a")
+    server = graph.server
+    server.configurationNodes = {(1.0,): graph.nodes["b"]}
+    triples = [("a-b", [0.0], [1.0]), ("b-a", [1.0], [1.0]), ("a-b", [0.0], [0.0])]
+    assert graph.buildAndProjectPaths(triples) == (
+        [True, False, False],
+        [1.0, 0.5, 0.5],
+        [-1] * 3,
+        [-1] * 3,
+    )
+    assert server.threads["problem.buildAndProjectPaths"] == 1
+    server.robot.client.basic.problem.setMaxNumThreads(2)
+    _, _, indexesNotProj, indexesProj = graph.buildAndProjectPaths(
+        triples, nThreads=4, storePaths=True
+    )
+    assert indexesNotProj == [0, 2, 4] and indexesProj == [1, 3, 5]
+    assert server.threads["problem.buildAndProjectPaths"] == 2
+    with pytest.raises(RuntimeError):
+        graph.client.problem.buildAndProjectPaths([1], [], [], 0, False)
+
+
+def test_edge_attributes():
+    graph = DryRunGraph()
+    graph.createNode(["a", "b"])
+    graph.createEdge("a", "b", "a-b", 1, "a")
+    # a second object reading the same graph does not cache the attributes
+    graph.server.reset()
+    other = ConstraintGraph(graph.server.robot, "graph", makeGraph=False)
+    # the names and IDs are fetched in one request
+    assert graph.server.rpcs == {"graph.getGraph": 1}
+    assert other.nodes == graph.nodes and other.edges == graph.edges
+    graph.setWeight("a-b", 5)
+    graph.setShort("a-b", True)
+    graph.setContainingNode("a-b", "b")
+    assert other.getWeight("a-b") == 5
+    assert other.isShort("a-b")
+    assert other.getContainingNode("a-b") == "b"
+    assert other.getNodesConnectedByEdge("a-b") == ("a", "b")
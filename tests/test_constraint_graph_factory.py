@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2026 CNRS
+#
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+
+
+# Tests of ConstraintGraphFactory run with the mock server
+
+import itertools
+
+import pytest
+
+from hpp.corbaserver.manipulation import (
+    ConstraintGraph,
+    ConstraintGraphFactory,
+    DryRunGraph,
+)
+
+
+def makeFactory(nGrippers, nObjects, nHandles, graphClass=DryRunGraph):
+    objects = [f"o{i}" for i in range(nObjects)]
+    graph = graphClass(jointNames=[o + "/root_joint" for o in objects])
+    factory = ConstraintGraphFactory(graph)
+    factory.setGrippers([f"g{i}" for i in range(nGrippers)])
+    factory.setObjects(
+        objects,
+        [[f"{o}/h{j}" for j in range(nHandles)] for o in objects],
+        [[o + "/surface"] for o in objects],
+    )
+    factory.environmentContacts(["table"])
+    return factory
+
+
+def containingNodes(graph):
+    """
+    Map the names of the waypoint edges of a graph to their containing node
+    """
+    snapshot = graph.graph.getGraphSnapshot()
+    names = {n.id: n.name for n in snapshot.nodes}
+    return {
+        e.name: names[e.containingNode]
+        for e in snapshot.edges
+        if e.type == "WaypointEdge"
+    }
+
+
+def graphDump(graph):
+    """
+    Describe the states and edges of a graph by their names
+
+    The lists of numerical constraints are sorted.
+    """
+    snapshot = graph.graph.getGraphSnapshot()
+    names = {n.id: n.name for n in snapshot.nodes}
+    names.update((e.id, e.name) for e in snapshot.edges)
+    res = dict()
+    for n in snapshot.nodes:
+        res["state " + n.name] = (
+            n.waypoint,
+            sorted(n.constraints),
+            sorted(n.constraintsForPath),
+        )
+    for e in snapshot.edges:
+        res["edge " + e.name] = (
+            e.type,
+            names[e.start],
+            names[e.end],
+            names[e.containingNode],
+            e.weight,
+            e.isShort,
+            [names.get(w) for w in e.waypoints],
+            sorted(e.constraints),
+        )
+    return res
+
+
+def test_containing_nodes():
+    # containing nodes of the graphs generated depth first
+    g00, g01 = "g0 grasps o0/h0", "g0 grasps o1/h0"
+    g10, g11 = "g1 grasps o0/h0", "g1 grasps o1/h0"
+    expected = {
+        "g0 < o0/h0 | 0-0": g00,
+        "g0 < o0/h0 | 0-0:1-1": g11,
+        "g0 < o0/h0 | 0-0_ls": g00,
+        "g0 < o1/h0 | 0-1": g01,
+        "g0 < o1/h0 | 0-1:1-0": g10,
+        "g0 < o1/h0 | 0-1_ls": g01,
+        "g0 > o0/h0 | 1-1": g11,
+        "g0 > o0/h0 | f": g00,
+        "g0 > o0/h0 | f_ls": g00,
+        "g0 > o1/h0 | 1-0": g10,
+        "g0 > o1/h0 | f": g01,
+        "g0 > o1/h0 | f_ls": g01,
+        "g1 < o0/h0 | 0-1:1-0": g01 + " : " + g10,
+        "g1 < o0/h0 | 1-0": g10,
+        "g1 < o0/h0 | 1-0_ls": g10,
+        "g1 < o1/h0 | 0-0:1-1": g00 + " : " + g11,
+        "g1 < o1/h0 | 1-1": g11,
+        "g1 < o1/h0 | 1-1_ls": g11,
+        "g1 > o0/h0 | 0-1": g01 + " : " + g10,
+        "g1 > o0/h0 | f": g10,
+        "g1 > o0/h0 | f_ls": g10,
+        "g1 > o1/h0 | 0-0": g00 + " : " + g11,
+        "g1 > o1/h0 | f": g11,
+        "g1 > o1/h0 | f_ls": g11,
+    }
+    factory = makeFactory(2, 2, 1)
+    factory.generate()
+    assert containingNodes(factory.graph) == expected
+
+
+def test_containing_nodes_lazy():
+    # the containing nodes do not depend on the order of creation of the states
+    factory = makeFactory(3, 2, 2)
+    factory.generate()
+    lazy = makeFactory(3, 2, 2)
+    lazy.generate(lazy=True)
+    # expand the states by decreasing code, the reverse of depth first order
+    while set(lazy.states) - lazy._expanded:
+        code = max(set(lazy.states) - lazy._expanded)
+        lazy.expand(lazy._graspsFromCode(code))
+    assert containingNodes(lazy.graph) == containingNodes(factory.graph)
+
+
+def test_registry_exact_names():
+    factory = makeFactory(1, 1, 1)
+    registry = factory.constraints.registry
+    assert "g0 grasps o0/h0" not in registry
+    # the server returns the constraints whose name starts with a prefix
+    names = ["g0 grasps o0/h0", "g0 grasps o0/h0/complement", "g0 grasps o0/h01"]
+    registry.add(names, [[7, 6, 5, 5], [7, 6, 1, 1], [7, 6, 6, 6]], names[:1])
+    assert names[0] in registry and names[1] in registry
+    assert names[2] not in registry
+
+
+def test_expand_reached():
+    factory = makeFactory(2, 2, 1)
+    factory.generate(lazy=True)
+    server = factory.graph.server
+    nStates = len(factory.states)
+    # a node of the roadmap in the state in which g0 holds o0/h0
+    reached = factory.states[factory._graspsCode((0, None))]
+    server.frequencies[reached.id] = 1
+    server.reset()
+    assert factory.expandReached() == 1
+    assert server.rpcs["graph.getFrequenciesOfNodesInRoadmap"] == 1
+    assert server.rpcs["graph.getFrequencyOfNodeInRoadmap"] == 0
+    assert len(factory.states) > nStates
+
+
+def test_add_object():
+    for nGrippers in (1, 2):
+        factory = makeFactory(nGrippers, 2, 2)
+        factory.generate()
+        incremental = makeFactory(nGrippers, 1, 2)
+        incremental.generate()
+        # the states in which o0 is grasped have no foliation before o1 is
+        # added: their transitions get level set edges afterwards.
+        incremental.addObject("o1", ["o1/h0", "o1/h1"], ["o1/surface"])
+        assert graphDump(incremental.graph) == graphDump(factory.graph)
+
+
+def test_add_gripper():
+    factory = makeFactory(3, 2, 1)
+    factory.generate()
+    incremental = makeFactory(2, 2, 1)
+    incremental.generate()
+    incremental.addGripper("g2")
+    assert graphDump(incremental.graph) == graphDump(factory.graph)
+
+
+def failAfter(factory, method, n):
+    """
+    Make a method of a factory raise RuntimeError after n calls
+    """
+    calls = itertools.count()
+    original = getattr(factory, method)
+
+    def fail(*args, **kwargs):
+        if next(calls) >= n:
+            raise RuntimeError("failure")
+        return original(*args, **kwargs)
+
+    setattr(factory, method, fail)
+
+
+def test_rollback():
+    factory = makeFactory(2, 2, 1)
+    factory.generate()
+    incremental = makeFactory(2, 1, 1)
+    incremental.generate()
+    dump = graphDump(incremental.graph)
+    states, transitions = dict(incremental.states), set(incremental.transitions)
+    failAfter(incremental, "makeTransition", 2)
+    with pytest.raises(RuntimeError):
+        incremental.addObject("o1", ["o1/h0"], ["o1/surface"])
+    del incremental.makeTransition
+    assert incremental.states == states and incremental.transitions == transitions
+    assert incremental.objects == ("o0",)
+    assert graphDump(incremental.graph) == dump
+    incremental.addObject("o1", ["o1/h0"], ["o1/surface"])
+    assert graphDump(incremental.graph) == graphDump(factory.graph)
+    # a failed generation leaves the factory as it was
+    failed = makeFactory(2, 2, 1)
+    failAfter(failed, "makeState", 3)
+    with pytest.raises(RuntimeError):
+        failed.generate()
+    del failed.makeState
+    assert failed.states == dict() and not hasattr(failed, "_radix")
+    failed.generate()
+    assert graphDump(failed.graph) == graphDump(factory.graph)
+
+
+def test_add_object_validations():
+    factory = makeFactory(1, 1, 1)
+    factory.graspIsAllowed.append(OneGraspPerObject(1))
+    factory.generate()
+    dump = graphDump(factory.graph)
+    with pytest.raises(TypeError):
+        factory.addObject("o1", ["o1/h0"], ["o1/surface"])
+    assert factory.objects == ("o0",)
+    assert graphDump(factory.graph) == dump
+    factory = makeFactory(1, 1, 1)
+    factory.graspIsAllowed = lambda grasps: True
+    factory.generate()
+    with pytest.raises(TypeError):
+        factory.addGripper("g1")
+
+
+def test_new_codes():
+    factory = makeFactory(3, 2, 2)
+    factory.generate()
+    nH = len(factory.handles)
+    allGrasps = [
+        grasps
+        for grasps in itertools.product([None, *range(nH)], repeat=3)
+        if len([ih for ih in grasps if ih is not None])
+        == len(set(ih for ih in grasps if ih is not None))
+    ]
+    for nG, nOldHandles in ((2, nH), (3, 2), (2, 2)):
+        expected = set(
+            factory._graspsCode(grasps)
+            for grasps in allGrasps
+            if any(
+                ih is not None and (ig >= nG or ih >= nOldHandles)
+                for ig, ih in enumerate(grasps)
+            )
+        )
+        codes = list(factory._newCodes(nG, nOldHandles))
+        assert len(codes) == len(expected) and set(codes) == expected
+
+
+def test_add_object_possible_grasps():
+    factory = makeFactory(2, 2, 1)
+    factory.setPossibleGrasps({"g0": ["o0/h0", "o1/h0"], "g1": ["o1/h0"]})
+    factory.generate()
+    incremental = makeFactory(2, 1, 1)
+    incremental.setPossibleGrasps({"g0": ["o0/h0"]})
+    incremental.generate()
+    incremental.addObject(
+        "o1", ["o1/h0"], ["o1/surface"], {"g0": ["o1/h0"], "g1": ["o1/h0"]}
+    )
+    assert graphDump(incremental.graph) == graphDump(factory.graph)
+
+
+def test_create_graph_resets_server():
+    factory = makeFactory(2, 2, 1)
+    factory.generate()
+    server = factory.graph.server
+    operations, constraintReferences = server.operations, server.constraintReferences
+    expected = graphDump(factory.graph)
+    # a new graph on the same server replaces the previous one
+    graph = ConstraintGraph(server.robot, "graph")
+    assert server.operations == server.constraintReferences == 0
+    assert len(server.edgeAttributes) == len(server.numericalConstraints) == 0
+    assert graph.graph.getGraphSnapshot().edges == []
+    factory = ConstraintGraphFactory(graph)
+    factory.setGrippers(["g0", "g1"])
+    factory.setObjects(
+        ["o0", "o1"], [["o0/h0"], ["o1/h0"]], [["o0/surface"], ["o1/surface"]]
+    )
+    factory.environmentContacts(["table"])
+    factory.generate()
+    assert graphDump(graph) == expected
+    assert server.operations == operations
+    assert server.constraintReferences == constraintReferences
+
+
+def test_lazy():
+    factory = makeFactory(2, 2, 2)
+    factory.generate()
+    lazy = makeFactory(2, 2, 2)
+    lazy.generate(lazy=True)
+    # only the free state and its neighbours are created
+    assert len(lazy.states) == 1 + 2 * 4
+    lazy.expand((None, None))
+    assert len(lazy.states) == 1 + 2 * 4
+    while set(lazy.states) - lazy._expanded:
+        code = min(set(lazy.states) - lazy._expanded)
+        lazy.expand(lazy._graspsFromCode(code))
+    assert graphDump(lazy.graph) == graphDump(factory.graph)
+
+
+class OneGraspPerObject:
+    """
+    Grasp validation that forbids grasping an object with two grippers
+    """
+
+    def __init__(self, nHandles):
+        self.nHandles = nHandles
+
+    def __call__(self, grasps):
+        objects = [ih // self.nHandles for ih in grasps if ih is not None]
+        return len(objects) == len(set(objects))
+
+
+def test_processes():
+    factory = makeFactory(3, 2, 2)
+    factory.graspIsAllowed.append(OneGraspPerObject(2))
+    factory.generate()
+    parallel = makeFactory(3, 2, 2)
+    parallel.graspIsAllowed.append(OneGraspPerObject(2))
+    parallel.generate(processes=2)
+    assert parallel._allowed == factory._allowed
+    assert graphDump(parallel.graph) == graphDump(factory.graph)
+
+
+class RecordingValidation:
+    """
+    Grasp validation that accepts all the sets of grasps and records them
+    """
+
+    def __init__(self):
+        self.calls = list()
+
+    def __call__(self, grasps):
+        self.calls.append(tuple(grasps))
+        return True
+
+
+def test_symmetric_objects():
+    factory = makeFactory(2, 3, 1)
+    validation = RecordingValidation()
+    factory.graspIsAllowed.append(validation)
+    factory.generate()
+    symmetric = makeFactory(2, 3, 1)
+    symmetricValidation = RecordingValidation()
+    symmetric.graspIsAllowed.append(symmetricValidation)
+    symmetric.setSymmetricObjects([["o0", "o1", "o2"]])
+    symmetric.generate()
+    assert graphDump(symmetric.graph) == graphDump(factory.graph)
+    # the sets of two grasps are evaluated once for each class
+    assert [g for g in validation.calls if None not in g] == [
+        (0, 1),
+        (0, 2),
+        (1, 0),
+        (1, 2),
+        (2, 0),
+        (2, 1),
+    ]
+    assert [g for g in symmetricValidation.calls if None not in g] == [(0, 1)]
+    with pytest.raises(ValueError):
+        makeFactory(1, 2, 1).setSymmetricObjects([["o0"], ["o0", "o1"], ["o2"]])
+
+
+def test_symmetric_objects_lazy():
+    factory = makeFactory(1, 3, 1)
+    factory.setSymmetricObjects([["o0", "o1", "o2"]])
+    factory.generate(lazy=True)
+    # only the canonical neighbour of the free state is created
+    assert sorted(s.name for s in factory.states.values()) == [
+        "free",
+        "g0 grasps o0/h0",
+    ]
+    factory.expand((2,))
+    assert "g0 grasps o2/h0" in factory.graph.nodes
+    # the neighbours of a non canonical set are created, one per class
+    factory = makeFactory(2, 3, 1)
+    factory.setSymmetricObjects([["o0", "o1", "o2"]])
+    factory.generate(lazy=True)
+    factory.expand((2, None))
+    assert "g0 grasps o2/h0 : g1 grasps o0/h0" in factory.graph.nodes
+    assert "g0 grasps o2/h0 : g1 grasps o1/h0" not in factory.graph.nodes
+
+
+def test_expand_forbidden():
+    factory = makeFactory(2, 2, 1)
+    factory.graspIsAllowed.append(lambda grasps: grasps != (0, None))
+    factory.generate(lazy=True)
+    states = set(factory.states)
+    # the neighbours of a forbidden set of grasps are not created
+    factory.expand((0, None))
+    assert set(factory.states) == states
+    assert factory._graspsCode((0, None)) not in factory._expanded
+    factory.expand((0, 1))
+    assert "g0 grasps o0/h0 : g1 grasps o1/h0" in factory.graph.nodes
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2026 CNRS
+#
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+
+
+import gc
+
+import pytest
+
+from hpp.corbaserver.manipulation import Constraints
+
+
+def test_clear_names():
+    a = Constraints(numConstraints=["a", "b"])
+    with pytest.raises(RuntimeError):
+        Constraints.clearNames()
+    del a
+    gc.collect()
+    empty = Constraints()
+    Constraints.clearNames()
+    assert Constraints._names == [] and empty.empty()
+    b = Constraints(grasps=["c"], numConstraints=["b"])
+    assert b.grasps == ("c",) and b.numConstraints == ("b",)
+    assert (b - Constraints(grasps=["c"])).numConstraints == ("b",)
+
+
+def test_interning():
+    a = Constraints(grasps=["g"], numConstraints=["a", "b"])
+    assert Constraints(numConstraints=["b", "a"], grasps=["g"]) is a
+    assert a.numConstraints is a.numConstraints
+    # the names are ordered by identifier
+    assert sorted(a.numConstraints) == ["a", "b"] and a.pregrasps == ()
+    c = a + Constraints(pregrasps=["p"], numConstraints=["b", "c"])
+    assert c.grasps == ("g",) and c.pregrasps == ("p",)
+    assert sorted(c.numConstraints) == ["a", "b", "c"]
+    assert c - Constraints(pregrasps=["p"], numConstraints=["c"]) is a
+    assert (c - c).empty() and (c - c) is Constraints()
+    b = a
+    b += Constraints(numConstraints=["c"])
+    assert sorted(a.numConstraints) == ["a", "b"] and b is not a
+
+
+def test_equality():
+    a = Constraints(numConstraints=["a"])
+    assert a == Constraints(numConstraints=["a"])
+    assert a != Constraints(grasps=["a"])
+    assert a != ["a"]
+    assert len({a, Constraints(numConstraints=["a"]), Constraints()}) == 2
+    assert hash(a) == hash(Constraints(numConstraints=["a"]))
+    with pytest.raises(TypeError):
+        Constraints(numConstraints="a")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2026 CNRS
+#
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+
+
+# Tests of the keys of GraphCache run with the mock server
+
+import pytest
+from benchmark_graph_generation import problemSolver
+from test_constraint_graph_factory import OneGraspPerObject, makeFactory
+
+from hpp.corbaserver.manipulation import GraphCache, SecurityMargins
+
+
+def test_key_validations():
+    cache = GraphCache("/tmp/graphs")
+    factory = makeFactory(2, 2, 1)
+    factory.setPossibleGrasps({"g0": ["o0/h0"], "g1": ["o1/h0"]})
+    key = cache.key(factory)
+    assert cache.key(factory) == key
+    factory.graspIsAllowed.append(OneGraspPerObject(1))
+    assert cache.key(factory) != key
+    other = makeFactory(2, 2, 1)
+    other.setPossibleGrasps({"g0": ["o0/h0"], "g1": ["o1/h0"]})
+    other.graspIsAllowed.append(OneGraspPerObject(2))
+    assert cache.key(other) != cache.key(factory)
+    # functions cannot be told apart
+    factory.graspIsAllowed.append(lambda grasps: True)
+    with pytest.raises(TypeError):
+        cache.key(factory)
+    factory.graspIsAllowed = lambda grasps: True
+    with pytest.raises(TypeError):
+        cache.key(factory)
+
+
+def test_key_security_margins():
+    factory = makeFactory(2, 2, 1)
+    key = GraphCache("/tmp/graphs").key(factory)
+    margins = SecurityMargins(problemSolver(factory), factory, ["o0", "o1"])
+    cache = GraphCache("/tmp/graphs", securityMargins=margins)
+    assert cache.key(factory) != key
+    key = cache.key(factory)
+    margins.setSecurityMarginBetween("universe", "o0", 0.01)
+    assert cache.key(factory) != key
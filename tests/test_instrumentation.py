@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2026 CNRS
+#
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+# DAMAGE.
+
+
+# Tests of the instrumentation of the clients run with the mock server
+
+import random
+from collections import namedtuple
+
+import pytest
+
+from hpp.corbaserver.manipulation import Client, Instrumentation, MockServer
+from hpp.corbaserver.manipulation.instrumentation import (
+    _InstrumentedClient,
+    payloadSize,
+)
+
+
+def test_payload_size():
+    assert payloadSize(None) == 0
+    assert payloadSize(True) == 1
+    assert payloadSize(3) == 4
+    assert payloadSize(0.5) == 8
+    assert payloadSize("ab") == 7
+    assert payloadSize([1, 2]) == 12
+    assert payloadSize([["a"], []]) == 4 + 4 + 6 + 4
+    assert payloadSize(namedtuple("Struct", "a b")(1, 0.5)) == 12
+
+
+def test_instrumented_client():
+    server = MockServer(jointNames=["o/root_joint"])
+    client = Client(server=server, instrument=True)
+    instrumentation = client.instrumentation
+    args = (["g grasps o/h"], [""], ["g"], ["o/h"])
+    client.problem.createGrasps(*args)
+    client.problem.createGrasps(*args)
+    # the proxy of the method is stored in the proxy of the client
+    assert "createGrasps" in vars(client.problem)
+    r = instrumentation.report()["problem.createGrasps"]
+    assert r["calls"] == 2
+    assert r["bytesSent"] == server.bytesSent["problem.createGrasps"]
+    assert r["bytesSent"] == 2 * sum(map(payloadSize, args))
+    assert r["bytesReceived"] == server.bytesReceived["problem.createGrasps"]
+    # failed requests are recorded too
+    with pytest.raises(NotImplementedError):
+        client.graph.getConfigErrorForNode(0, [0.0])
+    r = instrumentation.report()["graph.getConfigErrorForNode"]
+    assert r["calls"] == 1 and r["bytesReceived"] == 0
+    instrumentation.reset()
+    assert instrumentation.report() == dict()
+    # clients are not instrumented by default
+    client = Client(server=server)
+    assert client.instrumentation is None
+    assert not isinstance(client.problem, _InstrumentedClient)
+
+
+def test_report():
+    instrumentation = Instrumentation()
+    latencies = list(range(1, 101))
+    random.Random(0).shuffle(latencies)
+    for latency in latencies:
+        instrumentation.record("a.m", latency, 2, 3)
+    instrumentation.record("b.n", 10000, 1, 1)
+    report = instrumentation.report()
+    # methods are sorted by decreasing cumulative latency
+    assert list(report) == ["b.n", "a.m"]
+    assert report["a.m"] == dict(
+        calls=100,
+        total=5050,
+        mean=50.5,
+        p50=51,
+        p90=91,
+        p99=100,
+        max=100,
+        bytesSent=200,
+        bytesReceived=300,
+    )
+    assert "a.m" in str(instrumentation)
+
+
+def test_measure():
+    instrumentation = Instrumentation()
+    instrumentation.record("a.m", 1, 0, 0)
+    with instrumentation.measure() as outer:
+        instrumentation.record("a.m", 2, 0, 0)
+        with instrumentation.measure() as inner:
+            instrumentation.record("a.n", 3, 0, 0)
+    instrumentation.record("a.n", 4, 0, 0)
+    assert instrumentation.latencies == {"a.m": [1, 2], "a.n": [3, 4]}
+    assert outer.latencies == {"a.m": [2], "a.n": [3]}
+    assert inner.latencies == {"a.n": [3]}
+    assert instrumentation._scopes == []